@@ -2,20 +2,35 @@
 import asyncio
 import logging
 import os
+from datetime import date, datetime, timedelta, timezone
 from typing import Any
 
+from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from celery import Celery, Task
 from celery.schedules import crontab
+from celery.signals import worker_process_shutdown
 from myfi_backend.celery.utils import (
+    create_nav_partitions,
     insert_dummy_data,
     parse_and_save_amc_data,
     parse_and_save_scheme_data,
     parse_and_save_scheme_nav_data,
+    rebuild_nav_summaries,
 )
-from myfi_backend.services.api.accord_client import AmcClient
+from myfi_backend.services.api.accord_client import AccordFile, AmcClient, accord_date
+from myfi_backend.services.api.feed_cache import FeedCache
+from myfi_backend.services.api.http_client import http_client_pool
+from myfi_backend.services.portfolio.returns import refresh_portfolio_returns
+from myfi_backend.services.scheme.metrics import refresh_scheme_metrics
 from myfi_backend.settings import settings
+from myfi_backend.utils.redis import (
+    REDIS_HASH_NEW_USER,
+    REDIS_HASH_USER,
+    migrate_records,
+)
+from myfi_backend.web.api.otp.schema import OTP_RECORD_SERIALIZER
 
 celery = Celery(__name__)
 celery.conf.broker_url = os.environ.get("CELERY_BROKER_URL", settings.celery_broker)
@@ -30,6 +45,95 @@ celery.autodiscover_tasks()
 accord_token = settings.accord_token
 accord_base_url = settings.accord_base_url
 
+# Accord files the scheme master is built from, with the columns kept of them
+SCHEME_MASTER_FILES = (
+    AccordFile(
+        "Scheme_Details",
+        "MFMaster",
+        key="schemecode",
+        columns={
+            column: column
+            for column in (
+                "schemecode",
+                "s_name",
+                "amc_code",
+                "plan",
+                "classcode",
+                "fund_mgr1",
+            )
+        },
+    ),
+    AccordFile("Scheme_paum", "MFPortfolio", key="schemecode", columns={"aum": "aum"}),
+    AccordFile(
+        "Sclass_mst",
+        "MFMaster",
+        key="classcode",
+        columns={"scheme_type": "asset_type", "scheme_category": "sub_category"},
+    ),
+    AccordFile(
+        "Plan_mst", "MFMaster", key="plan_code", columns={"scheme_plan": "plan"}
+    ),
+    AccordFile(
+        "Scheme_master",
+        "MFMaster",
+        key="schemecode",
+        columns={"risk_level": "color"},
+    ),
+    AccordFile(
+        "Mf_abs_return",
+        "MFNav",
+        key="schemecode",
+        columns={
+            "nav": "c_nav",
+            "return_last_year": "1yrret",
+            "cagr": "1yrret",
+            "return_last3_year": "3yearret",
+            "return_last5_year": "5yearret",
+            "return_since_inception": "incret",
+        },
+    ),
+    AccordFile(
+        "Schemeload",
+        "MFMaster",
+        key="SCHEMECODE",
+        columns={"exit_load": "EXITLOAD"},
+    ),
+    AccordFile(
+        "MF_Ratios_DefaultBM",
+        "MFNav",
+        key="schemecode",
+        columns={
+            "standard_deviation": "sd",
+            "sharpe_ratio": "sharpe",
+            "sortino_ratio": "sortino",
+            "alpha": "alpha",
+            "beta": "beta",
+        },
+    ),
+    AccordFile(
+        "Mf_sip",
+        "MFMaster",
+        key="schemecode",
+        columns={"min_investment_sip": "sipmininvest"},
+    ),
+    AccordFile(
+        "Expenceratio", "MFOther", key="schemecode", columns={"ter": "expratio"}
+    ),
+    AccordFile(
+        "schemeisinmaster",
+        "MFMaster",
+        key="Schemecode",
+        columns={"isin": "ISIN"},
+    ),
+)
+
+CURRENT_NAV_FILE = AccordFile(
+    "Currentnav",
+    "MFNav",
+    key="schemecode",
+    columns={"nav_date": "navdate", "nav_value": "navrs"},
+)
+
 engine = create_async_engine(str(settings.get_db_url()), echo=settings.db_echo)
 session_factory = async_sessionmaker(
     engine,
@@ -46,6 +150,41 @@ def get_db_session() -> AsyncSession:
     return session_factory()
 
 
+def open_feed_cache() -> FeedCache:
+    """
+    Open the cache of raw Accord responses, evicting the expired responses.
+
+    :return: The cache of raw Accord responses.
+    """
+    cache = FeedCache(settings.accord_cache_dir)
+    evicted = cache.evict(
+        datetime.now(timezone.utc) - timedelta(days=settings.accord_cache_max_age_days),
+    )
+    if evicted:
+        logging.info(f"Evicted {evicted} expired Accord responses.")
+    return cache
+
+
+def create_redis() -> Redis:
+    """
+    Create redis client with its own connection pool.
+
+    Closing the client also disconnects its pool.
+
+    :return: redis client.
+    """
+    return Redis.from_url(str(settings.redis_url))
+
+
+@worker_process_shutdown.connect
+def close_http_client(**kwargs: Any) -> None:
+    """Close the HTTP client shared by the API clients when a worker exits.
+
+    :param kwargs: signal arguments.
+    """
+    asyncio.get_event_loop().run_until_complete(http_client_pool.close())
+
+
 @celery.task(name="dummy_task")
 def dummy_task() -> None:
     """Celery dummy task."""
@@ -72,10 +211,11 @@ def fetch_amc_data_task() -> None:
         else asyncio.new_event_loop()
     )
     asyncio.set_event_loop(loop)
+    feed_date = accord_date()
     data = loop.run_until_complete(
         client.fetch_amc_data(
             filename="Amc_mst",
-            date="30092022",
+            date=feed_date,
             section="MFMaster",
             sub="",
             token=accord_token,
@@ -96,26 +236,50 @@ def fetch_scheme_nav_data_task() -> None:
         else asyncio.new_event_loop()
     )
     asyncio.set_event_loop(loop)
+    feed_date = accord_date()
+    cache = open_feed_cache()
+    entries = loop.run_until_complete(
+        client.cache_amc_files(
+            [CURRENT_NAV_FILE],
+            date=feed_date,
+            token=accord_token,
+            concurrency=1,
+            timeout=settings.accord_fetch_timeout,
+            cache=cache,
+        ),
+    )
+    if all(cache.is_imported(entry) for entry in entries.values()):
+        logging.info("Scheme NAV file unchanged since the last import, skipping.")
+        return
     nav_master = loop.run_until_complete(
-        client.fetch_amc_data(
-            filename="Currentnav",
-            date="30092022",
-            section="MFNav",
-            sub="",
+        client.fetch_amc_files(
+            [CURRENT_NAV_FILE],
+            date=feed_date,
             token=accord_token,
+            concurrency=1,
+            timeout=settings.accord_fetch_timeout,
+            cache=cache,
         ),
     )
     data = {}
-    for items in nav_master["Table"]:
-        data[items["schemecode"]] = {
-            "nav_date": items["navdate"],
-            "nav_value": items["navrs"],
-            "scheme_id": int(items["schemecode"]),
+    for schemecode, items in nav_master["Currentnav"].items():
+        data[schemecode] = {
+            "nav_date": items["nav_date"],
+            "nav_value": items["nav_value"],
+            "scheme_id": int(schemecode),
         }
 
     dbsession = get_db_session()
-    loop.run_until_complete(parse_and_save_scheme_nav_data(data, dbsession))
+    redis = create_redis()
+    loop.run_until_complete(
+        parse_and_save_scheme_nav_data(data, dbsession, redis),
+    )
+    for entry in entries.values():
+        cache.mark_imported(entry)
     logging.info("Fetched and Saved Scheme NAV details to the database.")
+    loop.run_until_complete(refresh_scheme_metrics(dbsession))
+    loop.run_until_complete(refresh_portfolio_returns(dbsession, redis))
+    loop.run_until_complete(redis.close())
 
 
 @celery.task(name="fetch_amc_scheme_task")
@@ -128,189 +292,45 @@ def fetch_amc_scheme_data_task() -> None:
         else asyncio.new_event_loop()
     )
     asyncio.set_event_loop(loop)
-    data_scheme = loop.run_until_complete(
-        client.fetch_amc_data(
-            filename="Scheme_Details",
-            date="30092022",
-            section="MFMaster",
-            sub="",
+    feed_date = accord_date()
+    cache = open_feed_cache()
+    entries = loop.run_until_complete(
+        client.cache_amc_files(
+            SCHEME_MASTER_FILES,
+            date=feed_date,
             token=accord_token,
+            concurrency=settings.accord_fetch_concurrency,
+            timeout=settings.accord_fetch_timeout,
+            cache=cache,
         ),
     )
-
-    data_scheme_aum = loop.run_until_complete(
-        client.fetch_amc_data(
-            filename="Scheme_paum",
-            date="30092022",
-            section="MFPortfolio",
-            sub="",
-            token=accord_token,
-        ),
-    )
-
-    data_scheme_classcode = loop.run_until_complete(
-        client.fetch_amc_data(
-            filename="Sclass_mst",
-            date="30092022",
-            section="MFMaster",
-            sub="",
-            token=accord_token,
-        ),
-    )
-
-    data_scheme_plan = loop.run_until_complete(
-        client.fetch_amc_data(
-            filename="Plan_mst",
-            date="30092022",
-            section="MFMaster",
-            sub="",
-            token=accord_token,
-        ),
-    )
-
-    data_scheme_risk_level = loop.run_until_complete(
-        client.fetch_amc_data(
-            filename="Scheme_master",
-            date="30092022",
-            section="MFMaster",
-            sub="",
-            token=accord_token,
-        ),
-    )
-
-    data_scheme_nav_return = loop.run_until_complete(
-        client.fetch_amc_data(
-            filename="Mf_abs_return",
-            date="30092022",
-            section="MFNav",
-            sub="",
-            token=accord_token,
-        ),
-    )
-
-    data_scheme_exit_load = loop.run_until_complete(
-        client.fetch_amc_data(
-            filename="Schemeload",
-            date="30092022",
-            section="MFMaster",
-            sub="",
-            token=accord_token,
-        ),
-    )
-
-    data_scheme_ratio = loop.run_until_complete(
-        client.fetch_amc_data(
-            filename="MF_Ratios_DefaultBM",
-            date="30092022",
-            section="MFNav",
-            sub="",
-            token=accord_token,
-        ),
-    )
-
-    data_scheme_sip = loop.run_until_complete(
-        client.fetch_amc_data(
-            filename="Mf_sip",
-            date="30092022",
-            section="MFMaster",
-            sub="",
-            token=accord_token,
-        ),
-    )
-
-    data_scheme_expense_ratio = loop.run_until_complete(
-        client.fetch_amc_data(
-            filename="Expenceratio",
-            date="30092022",
-            section="MFOther",
-            sub="",
-            token=accord_token,
-        ),
-    )
-
-    data_scheme_isin_master = loop.run_until_complete(
-        client.fetch_amc_data(
-            filename="schemeisinmaster",
-            date="30092022",
-            section="MFMaster",
-            sub="",
+    if all(cache.is_imported(entry) for entry in entries.values()):
+        logging.info("Scheme master files unchanged since the last import, skipping.")
+        return
+    feeds = loop.run_until_complete(
+        client.fetch_amc_files(
+            SCHEME_MASTER_FILES,
+            date=feed_date,
             token=accord_token,
+            concurrency=settings.accord_fetch_concurrency,
+            timeout=settings.accord_fetch_timeout,
+            cache=cache,
         ),
     )
+    data_scheme = feeds["Scheme_Details"]
+    scheme_aum = feeds["Scheme_paum"]
+    classcode_mst = feeds["Sclass_mst"]
+    scheme_plan = feeds["Plan_mst"]
+    risk_mst = feeds["Scheme_master"]
+    nav_return = feeds["Mf_abs_return"]
+    exit_load = feeds["Schemeload"]
+    scheme_ratio = feeds["MF_Ratios_DefaultBM"]
+    scheme_sip = feeds["Mf_sip"]
+    expense_ratio = feeds["Expenceratio"]
+    scheme_isin = feeds["schemeisinmaster"]
 
     data_dict = {}
-    classcode_mst = {}
-    risk_mst = {}
-    scheme_aum = {}
-    nav_return = {}
-    exit_load = {}
-    scheme_ratio = {}
-    scheme_sip = {}
-    expense_ratio = {}
-    scheme_plan = {}
-    scheme_isin = {}
-
-    for items in data_scheme_classcode["Table"]:
-        classcode_mst[items["classcode"]] = {
-            "scheme_type": items["asset_type"],
-            "scheme_category": items["sub_category"],
-        }
-
-    for items in data_scheme_aum["Table"]:
-        scheme_aum[items["schemecode"]] = {
-            "aum": items["aum"],
-        }
-
-    for items in data_scheme_plan["Table"]:
-        scheme_plan[items["plan_code"]] = {
-            "scheme_plan": items["plan"],
-        }
-
-    for items in data_scheme_risk_level["Table"]:
-        risk_mst[items["schemecode"]] = {
-            "risk_level": items["color"],
-        }
-
-    for items in data_scheme_nav_return["Table"]:
-        nav_return[items["schemecode"]] = {
-            "nav": items["c_nav"],
-            "return_last_year": items["1yrret"],
-            "cagr": items["1yrret"],
-            "return_last3_year": items["3yearret"],
-            "return_last5_year": items["5yearret"],
-            "return_since_inception": items["incret"],
-        }
-
-    for items in data_scheme_exit_load["Table"]:
-        exit_load[items["SCHEMECODE"]] = {
-            "exit_load": items["EXITLOAD"],
-        }
-
-    for items in data_scheme_ratio["Table"]:
-        scheme_ratio[items["schemecode"]] = {
-            "standard_deviation": items["sd"],
-            "sharpe_ratio": items["sharpe"],
-            "sortino_ratio": items["sortino"],
-            "alpha": items["alpha"],
-            "beta": items["beta"],
-        }
-
-    for items in data_scheme_sip["Table"]:
-        scheme_sip[items["schemecode"]] = {
-            "min_investment_sip": items["sipmininvest"],
-        }
-
-    for items in data_scheme_expense_ratio["Table"]:
-        expense_ratio[items["schemecode"]] = {
-            "ter": items["expratio"],
-        }
-
-    for items in data_scheme_isin_master["Table"]:
-        scheme_isin[items["Schemecode"]] = {
-            "isin": items["ISIN"],
-        }
-
-    for items in data_scheme["Table"]:
+    for items in data_scheme.values():
         data_dict[items["schemecode"]] = {
             "name": items["s_name"] if items["s_name"] else "NA",
             "scheme_id": int(items["schemecode"]),
@@ -383,10 +403,90 @@ def fetch_amc_scheme_data_task() -> None:
         }
 
     dbsession = get_db_session()
-    loop.run_until_complete(parse_and_save_scheme_data(data_dict, dbsession))
+    redis = create_redis()
+    loop.run_until_complete(parse_and_save_scheme_data(data_dict, dbsession, redis))
+    loop.run_until_complete(redis.close())
+    for entry in entries.values():
+        cache.mark_imported(entry)
     logging.info("Fetched and saved AMC scheme data to the database.")
 
 
+@celery.task(name="refresh_scheme_metrics_task")
+def refresh_scheme_metrics_task() -> None:
+    """Celery task to recompute the return and risk metrics of all schemes."""
+    loop = (
+        asyncio.get_event_loop()
+        if asyncio.get_event_loop()
+        else asyncio.new_event_loop()
+    )
+    asyncio.set_event_loop(loop)
+    dbsession = get_db_session()
+    loop.run_until_complete(refresh_scheme_metrics(dbsession))
+
+
+@celery.task(name="refresh_portfolio_returns_task")
+def refresh_portfolio_returns_task() -> None:
+    """Celery task to recompute the returns of all portfolios."""
+    loop = (
+        asyncio.get_event_loop()
+        if asyncio.get_event_loop()
+        else asyncio.new_event_loop()
+    )
+    asyncio.set_event_loop(loop)
+    dbsession = get_db_session()
+    redis = create_redis()
+    loop.run_until_complete(refresh_portfolio_returns(dbsession, redis))
+    loop.run_until_complete(redis.close())
+
+
+@celery.task(name="rebuild_nav_summaries_task")
+def rebuild_nav_summaries_task() -> None:
+    """Celery task to recompute the NAV summaries of all schemes."""
+    loop = (
+        asyncio.get_event_loop()
+        if asyncio.get_event_loop()
+        else asyncio.new_event_loop()
+    )
+    asyncio.set_event_loop(loop)
+    dbsession = get_db_session()
+    loop.run_until_complete(rebuild_nav_summaries(dbsession))
+
+
+@celery.task(name="create_nav_partitions_task")
+def create_nav_partitions_task() -> None:
+    """Celery task to create the NAV history partitions of this and next year."""
+    loop = (
+        asyncio.get_event_loop()
+        if asyncio.get_event_loop()
+        else asyncio.new_event_loop()
+    )
+    asyncio.set_event_loop(loop)
+    dbsession = get_db_session()
+    this_year = date.today().year
+    loop.run_until_complete(
+        create_nav_partitions(dbsession, (this_year, this_year + 1)),
+    )
+
+
+@celery.task(name="migrate_user_records_task")
+def migrate_user_records_task() -> None:
+    """Celery task to rewrite the users stored as JSON text in Redis as hashes."""
+    loop = (
+        asyncio.get_event_loop()
+        if asyncio.get_event_loop()
+        else asyncio.new_event_loop()
+    )
+    asyncio.set_event_loop(loop)
+    redis = create_redis()
+    migrated = 0
+    for hash_key in (REDIS_HASH_USER, REDIS_HASH_NEW_USER):
+        migrated += loop.run_until_complete(
+            migrate_records(redis, hash_key, OTP_RECORD_SERIALIZER),
+        )
+    loop.run_until_complete(redis.close())
+    logging.info(f"Migrated {migrated} user records in Redis.")
+
+
 @celery.task(name="insert_dummy_data_to_db")
 def save_dummy_data_to_db() -> None:
     """Insert dummy data to the database."""
@@ -443,6 +543,13 @@ def setup_periodic_tasks(sender: Task, **kwargs: Any) -> None:
         fetch_amc_scheme_data_task.s(),
         name="Fetch AMC scheme data every day at 7 AM",
     )
+    # Calls create_nav_partitions_task() on the first day of every month at 5 AM,
+    # so next year's partition exists long before its first NAV.
+    sender.add_periodic_task(
+        crontab(hour=5, minute=0, day_of_month=1),
+        create_nav_partitions_task.s(),
+        name="Create NAV history partitions every month",
+    )
     # Calls fetch_scheme_nav_data_task() every day at 7:30 AM.
     sender.add_periodic_task(
         crontab(hour=7, minute=30),
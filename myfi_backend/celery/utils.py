@@ -1,14 +1,17 @@
 # flake8: noqa
+import logging
 import math
 import random
+import time
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional
 
+from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from myfi_backend.db.dao.adviser_dao import AdviserDAO
 from myfi_backend.db.dao.amc_dao import AmcDAO
-from myfi_backend.db.dao.mutual_fund_scheme_dao import MutualFundSchemeDAO
+from myfi_backend.db.dao.mutual_fund_scheme_dao import MutualFundSchemeDAO, SyncCounts
 from myfi_backend.db.dao.organization_dao import OrganizationDAO
 from myfi_backend.db.dao.portfolio_dao import PortfolioDAO, PortfolioMutualFundDAO
 from myfi_backend.db.dao.scheme_nav_dao import SchemeNavDAO
@@ -24,38 +27,96 @@ from myfi_backend.db.models.portfolio_model import (  # noqa: F401
     Portfolio,
     PortfolioMutualFund,
 )
-from myfi_backend.db.models.scheme_nav_model import SchemeNAV  # noqa: F401
+from myfi_backend.db.models.scheme_nav_model import SchemeNavHistory  # noqa: F401
+from myfi_backend.services.local_cache.cache import publish_invalidation
+from myfi_backend.services.scheme.nav_cache import bump_nav_version
+from myfi_backend.services.scheme.search import SCHEME_SEARCH_CACHE_NAMESPACE
 
 
 async def parse_and_save_scheme_nav_data(
     data: Dict[str, Any],
     dbsession: AsyncSession,
-) -> None:
+    redis: Optional[Redis] = None,
+) -> int:
     """
     Parse Scheme Nav data and save it to the database.
 
+    All scheme codes are resolved with one query, all NAVs are written with
+    one INSERT ... ON CONFLICT statement and the NAV summaries of the written
+    schemes are refreshed once, so the number of round trips doesn't grow with
+    the size of the feed.
+
     :param data: The data to parse and save. This should be a dictionary.
     :param dbsession: The database session to use.
+    :param redis: Redis client, when given the scheme NAVs cached in
+        Redis are invalidated after new NAVs were written.
+    :return: The number of NAV rows written.
     """
-    # Create a new session
-
+    started_at = time.perf_counter()
     async with dbsession.begin():
-        # Create a DAO object using the session
-        scheme_nav_dao = SchemeNavDAO(dbsession)
-        scheme_nav_data = {}
-        for item in data:
-            scheme = await MutualFundSchemeDAO(dbsession).get_by_code(
-                data[item]["scheme_id"],
+        scheme_ids = await MutualFundSchemeDAO(dbsession).get_ids_by_codes(
+            int(item["scheme_id"]) for item in data.values()
+        )
+        rows = [
+            (
+                scheme_ids[int(item["scheme_id"])],
+                item["nav_date"],
+                float(item["nav_value"]),
             )
-            if scheme is None:
-                continue
-            else:
-                scheme_nav_data = {
-                    "scheme_id": scheme.id,
-                    "nav_data": {data[item]["nav_date"]: data[item]["nav_value"]},
-                }
-            # Save the Scheme Nav data to the database
-            await scheme_nav_dao.upsert(scheme_nav_data)
+            for item in data.values()
+            if int(item["scheme_id"]) in scheme_ids and item["nav_value"]
+        ]
+        schemenav_dao = SchemeNavDAO(dbsession)
+        rows_written = await schemenav_dao.upsert_many(rows)
+        if rows_written:
+            await schemenav_dao.refresh_summaries({row[0] for row in rows})
+    if redis is not None and rows_written:
+        await bump_nav_version(redis)
+
+    elapsed = time.perf_counter() - started_at
+    logging.info(
+        f"Saved {rows_written} scheme NAVs of {len(data)} feed rows in "
+        f"{elapsed:.3f}s ({rows_written / elapsed:.0f} rows/s)",
+    )
+    return rows_written
+
+
+async def rebuild_nav_summaries(dbsession: AsyncSession) -> None:
+    """
+    Recompute the NAV summaries of all schemes from their NAV history.
+
+    NAV ingests keep the summaries of their schemes up to date, this is only
+    needed to fill the summaries of NAVs written before they existed.
+
+    :param dbsession: The database session to use.
+    """
+    started_at = time.perf_counter()
+    async with dbsession.begin():
+        await SchemeNavDAO(dbsession).refresh_summaries()
+    elapsed = time.perf_counter() - started_at
+    logging.info(f"Rebuilt the scheme NAV summaries in {elapsed:.3f}s")
+
+
+async def create_nav_partitions(
+    dbsession: AsyncSession,
+    years: Iterable[int],
+) -> List[int]:
+    """
+    Create the missing yearly partitions of the NAV history.
+
+    :param dbsession: The database session to use.
+    :param years: The years to create partitions for.
+    :return: The years whose partitions were created.
+    """
+    scheme_nav_dao = SchemeNavDAO(dbsession)
+    created = []
+    async with dbsession.begin():
+        for year in years:
+            if await scheme_nav_dao.create_year_partition(year):
+                created.append(year)
+    if created:
+        logging.info(f"Created the NAV history partitions of {created}")
+    return created
 
 
 async def parse_and_save_amc_data(
@@ -71,50 +132,53 @@ async def parse_and_save_amc_data(
     # Create a new session
 
     async with dbsession.begin():
-        # Create a DAO object using the session
-        amc_dao = AmcDAO(dbsession)
-
-        for item in data["Table"]:
-            # Create a dictionary containing the AMC data
-            amc_data = {
+        amcs_data = [
+            {
                 "name": item["amc"],
-                "code": item["amc_code"],
+                "code": str(item["amc_code"]),
                 "address": f"{item['add1']} {item['add2']} {item['add3']}",
                 "email": item["email"],
                 "phone": item["phone"],
                 "website": item["webiste"],
                 "fund_name": item["fund"],
             }
-            # Save the AMC data to the database
-            await amc_dao.upsert(amc_data)
+            for item in data["Table"]
+        ]
+        # Save all AMCs with a single statement
+        await AmcDAO(dbsession).upsert_many(amcs_data)
 
 
 async def parse_and_save_scheme_data(
     data: Dict[str, Any],
     dbsession: AsyncSession,
-) -> None:
+    redis: Optional[Redis] = None,
+) -> SyncCounts:
     """
     Parse AMC data and save it to the database.
 
     :param data: The data to parse and save. This should be a dictionary.
     :param dbsession: The database session to use.
+    :param redis: Redis client, when given the scheme search indexes of the web
+        workers are rebuilt after schemes were inserted or updated.
+    :return: The number of inserted, updated and unchanged schemes.
     """
     # Create a new session
 
     async with dbsession.begin():
-        # Create a DAO object using the session
-        scheme_dao = MutualFundSchemeDAO(dbsession)
+        # The few AMCs are looked up in memory instead of once per scheme
+        amc_ids = await AmcDAO(dbsession).get_code_to_id_map()
+        schemes_data = []
         isin_code = 0
         ZERO_FLOAT = 0.0
         for items in data:
-            amc = await AmcDAO(dbsession).get_by_code(data[items]["amc_code"])
-            if amc is None:
+            amc_id = amc_ids.get(str(data[items]["amc_code"]))
+            if amc_id is None:
                 continue
             else:
                 scheme_data = {
                     "name": data[items]["name"],
                     "scheme_id": data[items]["scheme_id"],
-                    "amc_id": amc.id,
+                    "amc_id": amc_id,
                     "scheme_plan": data[items]["scheme_plan"],
                     "scheme_type": data[items]["scheme_type"],
                     "scheme_category": data[items]["scheme_category"],
@@ -170,9 +234,17 @@ async def parse_and_save_scheme_data(
                     if data[items]["beta"]
                     else ZERO_FLOAT,
                 }
-                # Save the AMC data to the database
                 isin_code += 10
-                await scheme_dao.upsert(scheme_data)
+                schemes_data.append(scheme_data)
+        # Save all schemes with a handful of statements, skipping unchanged ones
+        counts = await MutualFundSchemeDAO(dbsession).sync_many(schemes_data)
+    logging.info(
+        f"Synced schemes: {counts.inserted} inserted, {counts.updated} updated, "
+        f"{counts.unchanged} unchanged",
+    )
+    if redis is not None and (counts.inserted or counts.updated):
+        await publish_invalidation(redis, SCHEME_SEARCH_CACHE_NAMESPACE)
+    return counts
 
 
 async def insert_dummy_data(  # noqa: WPS210
@@ -368,17 +440,16 @@ async def insert_dummy_schemes(
 async def insert_dummy_scheme_navs(
     dbsession: AsyncSession,
     schemes: List[MutualFundScheme],
-) -> List[SchemeNAV]:
+) -> int:
     """
-    Insert dummy SchemeNAV entries into the database.
+    Insert dummy NAV history into the database.
 
     :param dbsession: The database session to use.
-    :param schemes: The MutualFundScheme model instances to associate the SchemeNAV
-                    entries with.
-    :return: A list of SchemeNAV model instances if inserted, else an empty list.
+    :param schemes: The MutualFundScheme model instances to insert NAV history for.
+    :return: The number of NAV rows inserted.
     """
     scheme_nav_dao = SchemeNavDAO(dbsession)
-    scheme_nav_list: List[SchemeNAV] = []
+    rows_inserted = 0
     nav_data = {
         (datetime.now() - timedelta(days=index)).strftime("%Y-%m-%d"): 10.0
         + math.sin(index / 365.0) * 5
@@ -386,12 +457,12 @@ async def insert_dummy_scheme_navs(
     }
 
     for scheme in schemes:
-        scheme_nav = await scheme_nav_dao.create(
+        rows_inserted += await scheme_nav_dao.upsert(
             {"scheme_id": scheme.id, "nav_data": nav_data},
         )
-        scheme_nav_list.append(scheme_nav)
+    await scheme_nav_dao.refresh_summaries([scheme.id for scheme in schemes])
     await dbsession.commit()
-    return scheme_nav_list
+    return rows_inserted
 
 
 async def insert_dummy_organization(dbsession: AsyncSession) -> Organization:
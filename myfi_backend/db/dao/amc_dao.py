@@ -1,4 +1,4 @@
-from typing import Mapping, Optional, Union
+from typing import Any, Dict, Iterable, Mapping, Optional
 from uuid import UUID
 
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -31,26 +31,26 @@ class AmcDAO(BaseDAO[AMC]):
         instance = result.scalars().first()
         return instance if instance else None
 
-    async def upsert(self, amc_data: Mapping[str, Union[str, UUID, float]]) -> AMC:
+    async def get_code_to_id_map(self) -> Dict[str, UUID]:
         """
-        Perform an upsert operation on AMC.
+        Get the ids of all AMCs by their code.
 
-        If an AMC with the provided code exists, update it. Otherwise, create a new AMC.
+        There are only a few dozen AMCs, so loading the whole map once is cheaper
+        than looking up the AMC of every scheme.
 
-        :param amc_data: Dictionary containing AMC data.
-        :return: The updated or created AMC.
+        :return: A {code: id} map of all AMCs.
         """
-        result = await self.session.execute(
-            select(AMC).filter_by(code=amc_data["code"]),
-        )
-        amc = result.scalars().first()
-
-        if amc is None:
-            # AMC with this code does not exist, create a new one
-            amc = AMC(**amc_data)
-            self.session.add(amc)
-        else:
-            # AMC with this code exists, update it
-            for key, value in amc_data.items():
-                setattr(amc, key, value)
-        return amc
+        result = await self.session.execute(select(AMC.code, AMC.id))
+        return dict(result.tuples().all())
+
+    async def upsert_many(
+        self,
+        amcs_data: Iterable[Mapping[str, Any]],
+    ) -> Dict[str, UUID]:
+        """
+        Insert or update many AMCs by their code.
+
+        :param amcs_data: Dictionaries containing AMC data.
+        :return: A {code: id} map of the written AMCs.
+        """
+        return await self._upsert_many(amcs_data, "code")
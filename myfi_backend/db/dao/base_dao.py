@@ -1,6 +1,21 @@
-from typing import Generic, Mapping, Optional, Sequence, Type, TypeVar, Union
+from typing import (  # noqa: WPS235
+    Any,
+    AsyncIterator,
+    Dict,
+    Generic,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Type,
+    TypeVar,
+    Union,
+)
 from uuid import UUID
 
+from sqlalchemy import ColumnElement, Row
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
@@ -8,6 +23,13 @@ from myfi_backend.db.models.base_model import BaseModel
 
 T = TypeVar("T", bound=BaseModel)  # noqa: WPS111
 
+# Rows per INSERT of a bulk upsert, keeps the widest table well below the 32767
+# bind parameters a PostgreSQL statement can have.
+UPSERT_CHUNK_SIZE = 1000
+
+# Rows fetched from a server-side cursor at once.
+STREAM_BATCH_SIZE = 1000
+
 
 class BaseDAO(Generic[T]):
     """Base class for models."""
@@ -34,6 +56,72 @@ class BaseDAO(Generic[T]):
         result = await self.session.execute(stmt)
         return result.scalars().all()
 
+    async def get_all_columns(self, columns: Sequence[str]) -> Sequence[Row[Any]]:
+        """
+        Get only some columns of all instances of the model.
+
+        Rows are plain named tuples, no instances are built nor tracked by the
+        session, which makes this the cheap choice for read-only listings.
+
+        :param columns: The names of the columns to select.
+        :return: A row of the selected columns per instance, in no particular order.
+        """
+        result = await self.session.execute(select(*self._columns(columns)))
+        return result.all()
+
+    async def stream(self, batch_size: int = STREAM_BATCH_SIZE) -> AsyncIterator[T]:
+        """
+        Stream all instances of the model from a server-side cursor.
+
+        Rows are fetched batch_size at a time. The session only keeps weak
+        references to unmodified instances, so instances the caller is done with
+        are freed and memory stays bounded however large the table is.
+
+        :param batch_size: The number of rows fetched from the cursor at once.
+        :yields: The model instances, in no particular order.
+        """
+        stmt = select(self.model).execution_options(yield_per=batch_size)
+        result = await self.session.stream_scalars(stmt)
+        async for instance in result:
+            yield instance
+
+    async def iter_all(
+        self,
+        chunk_size: int = STREAM_BATCH_SIZE,
+    ) -> AsyncIterator[Sequence[T]]:
+        """
+        Iterate over all instances of the model in chunks.
+
+        Like stream, but instances are handed out a chunk at a time for batch
+        processing.
+
+        :param chunk_size: The number of instances per chunk.
+        :yields: Chunks of at most chunk_size instances, in no particular order.
+        """
+        stmt = select(self.model).execution_options(yield_per=chunk_size)
+        result = await self.session.stream_scalars(stmt)
+        async for chunk in result.partitions():
+            yield chunk
+
+    async def page(self, after_id: Optional[UUID], limit: int) -> Sequence[T]:
+        """
+        Get a page of instances ordered by id with keyset pagination.
+
+        A page starts right after the last id of the previous page, so it is a
+        range scan of the primary key however deep it is. Unlike a cursor, no
+        transaction is held open between pages.
+
+        :param after_id: The id of the last instance of the previous page, None
+            for the first page.
+        :param limit: The maximum number of instances to return.
+        :return: The instances of the page, ordered by id.
+        """
+        stmt = select(self.model).order_by(self.model.id).limit(limit)
+        if after_id is not None:
+            stmt = stmt.where(self.model.id > after_id)
+        result = await self.session.execute(stmt)
+        return result.scalars().all()
+
     async def get_by_id(self, instance_id: UUID) -> Optional[T]:
         """
         Get a model instance by id.
@@ -82,3 +170,48 @@ class BaseDAO(Generic[T]):
             await self.session.delete(instance)
             await self.session.commit()
         return instance
+
+    def _columns(self, columns: Sequence[str]) -> List[ColumnElement[Any]]:
+        """
+        Resolve column names to the columns of the model.
+
+        :param columns: The names of the columns.
+        :return: The columns, in the same order.
+        """
+        return [getattr(self.model, column) for column in columns]
+
+    async def _upsert_many(  # noqa: WPS210
+        self,
+        rows: Iterable[Mapping[str, Any]],
+        conflict_column: str,
+    ) -> Dict[Any, UUID]:
+        """
+        Insert or update many model instances with INSERT ... ON CONFLICT.
+
+        Rows are written in chunks of UPSERT_CHUNK_SIZE, existing rows get every
+        given column overwritten. Rows with the same key are collapsed, the last
+        one wins, as a single statement can't update a row twice.
+
+        :param rows: The attributes of the model instances, all with the same keys.
+        :param conflict_column: The unique column identifying existing rows.
+        :return: A {key: id} map of all written rows.
+        """
+        unique_rows = list({row[conflict_column]: row for row in rows}.values())
+        key_column = getattr(self.model, conflict_column)
+        ids: Dict[Any, UUID] = {}
+        for start in range(0, len(unique_rows), UPSERT_CHUNK_SIZE):
+            chunk = unique_rows[start : start + UPSERT_CHUNK_SIZE]
+            stmt = insert(self.model).values(chunk)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[key_column],
+                set_={
+                    column: stmt.excluded[column]
+                    for column in chunk[0]
+                    if column != conflict_column
+                },
+            )
+            result = await self.session.execute(
+                stmt.returning(key_column, self.model.id),
+            )
+            ids.update(result.tuples().all())
+        return ids
@@ -1,11 +1,66 @@
-from typing import Mapping, Optional, Union
+import hashlib
+import json
+from collections import Counter
+from typing import (  # noqa: WPS235
+    Any,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
 from uuid import UUID
 
+from fastapi import Depends
+from sqlalchemy import (  # noqa: WPS235
+    Boolean,
+    Integer,
+    String,
+    any_,
+    bindparam,
+    func,
+    literal,
+    literal_column,
+    or_,
+    true,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.engine import RowMapping
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
-from myfi_backend.db.dao.base_dao import BaseDAO
+from myfi_backend.db.dao.base_dao import UPSERT_CHUNK_SIZE, BaseDAO
+from myfi_backend.db.dependencies import get_db_session
 from myfi_backend.db.models.mutual_fund_scheme_model import MutualFundScheme
+from myfi_backend.db.models.scheme_nav_model import SchemeNavHistory
+
+# Columns of the scheme table left out of exports.
+EXPORT_EXCLUDED_COLUMNS = frozenset(("fingerprint",))
+
+
+class SyncCounts(NamedTuple):
+    """Number of rows of a sync by what happened to them."""
+
+    inserted: int
+    updated: int
+    unchanged: int
+
+
+def scheme_fingerprint(scheme_data: Mapping[str, Any]) -> str:
+    """
+    Hash scheme data independently of the order of its keys.
+
+    :param scheme_data: Dictionary containing scheme data.
+    :return: The hex SHA-256 of the data.
+    """
+    canonical = json.dumps(scheme_data, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
 
 
 class MutualFundSchemeDAO(BaseDAO[MutualFundScheme]):
@@ -15,7 +70,7 @@ class MutualFundSchemeDAO(BaseDAO[MutualFundScheme]):
     Provides interface for CRUD operations on MutualFundScheme model.
     """
 
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession = Depends(get_db_session)):
         super().__init__(MutualFundScheme, session)
 
     async def get_by_code(self, scheme_code: int) -> Optional[MutualFundScheme]:
@@ -31,30 +86,248 @@ class MutualFundSchemeDAO(BaseDAO[MutualFundScheme]):
         instance = result.scalars().first()
         return instance if instance else None
 
-    async def upsert(
-        self,
-        scheme_data: Mapping[str, Union[str, UUID, float, int]],
-    ) -> MutualFundScheme:
+    async def get_ids_by_codes(self, scheme_codes: Iterable[int]) -> Dict[int, UUID]:
         """
-        Perform an upsert operation on AMC.
+        Resolve scheme codes to scheme ids in a single query.
 
-        If an scheme with the provided code exists, update it. Otherwise,
-        create a new scheme.
+        :param scheme_codes: The codes of the schemes to resolve.
+        :return: A {scheme_code: id} map, unknown codes are left out.
+        """
+        codes = list(set(scheme_codes))
+        if not codes:
+            return {}
+        result = await self.session.execute(
+            select(MutualFundScheme.scheme_id, MutualFundScheme.id).where(
+                MutualFundScheme.scheme_id
+                == any_(bindparam("scheme_codes", codes, ARRAY(Integer))),
+            ),
+        )
+        return dict(result.tuples().all())
 
-        :param scheme_data: Dictionary containing AMC scheme data.
-        :return: The updated or created AMC scheme.
+    async def get_names(self) -> List[Tuple[UUID, str]]:
+        """
+        Get the id and name of every scheme.
+
+        :return: The (id, name) of every scheme.
         """
         result = await self.session.execute(
-            select(MutualFundScheme).filter_by(name=scheme_data["name"]),
+            select(MutualFundScheme.id, MutualFundScheme.name),
         )
-        scheme = result.scalars().first()
+        return list(result.tuples().all())
+
+    async def get_page(  # noqa: WPS211
+        self,
+        filters: Mapping[str, Any],
+        sort_by: str,
+        descending: bool,
+        limit: int,
+        after: Optional[Tuple[Any, UUID]] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> Sequence[Any]:
+        """
+        Get a page of schemes with keyset pagination.
+
+        Schemes are ordered by the sort column then by id, and a page starts
+        right after the (sort value, id) of the last scheme of the previous page.
+        Every page is a range scan of the (sort column, id) index, however deep
+        it is.
 
-        if scheme is None:
-            # AMC scheme with this code does not exist, create a new one
-            scheme = MutualFundScheme(**scheme_data)
-            self.session.add(scheme)
+        When columns are given only those are selected, and the page is made of
+        rows rather than MutualFundScheme instances. Rows support the same
+        attribute access but are neither built as instances nor tracked by the
+        session.
+
+        :param filters: Values the scheme columns must be equal to, by column.
+        :param sort_by: The column to sort by.
+        :param descending: Whether to sort in descending order.
+        :param limit: The maximum number of schemes to return.
+        :param after: The sort value and id of the last scheme of the previous
+            page, None for the first page.
+        :param columns: The names of the columns to select, None for instances.
+        :return: The schemes of the page.
+        """
+        sort_column = getattr(MutualFundScheme, sort_by)
+        if columns is None:
+            stmt = select(MutualFundScheme)
+        else:
+            stmt = select(*self._columns(columns)).select_from(MutualFundScheme)
+        stmt = stmt.filter_by(**filters)
+        if after is not None:
+            keyset = tuple_(sort_column, MutualFundScheme.id)
+            last_row = tuple_(
+                literal(after[0], sort_column.type),
+                literal(after[1], MutualFundScheme.id.type),
+            )
+            stmt = stmt.where(keyset < last_row if descending else keyset > last_row)
+        if descending:
+            stmt = stmt.order_by(sort_column.desc(), MutualFundScheme.id.desc())
         else:
-            # AMC scheme with this code exists, update it
-            for key, value in scheme_data.items():
-                setattr(scheme, key, value)
-        return scheme
+            stmt = stmt.order_by(sort_column, MutualFundScheme.id)
+        result = await self.session.execute(stmt.limit(limit))
+        if columns is None:
+            return result.scalars().all()
+        return result.all()
+
+    async def stream_export(self, batch_size: int) -> AsyncIterator[RowMapping]:
+        """
+        Stream every scheme with its latest NAV from the NAV history.
+
+        Rows are fetched from a server-side cursor batch_size at a time as plain
+        mappings, so memory stays flat however many schemes there are. The
+        latest NAV is a LATERAL lookup of the last (scheme_id, nav_date) key of
+        the NAV history of every scheme.
+
+        :param batch_size: The number of rows fetched from the cursor at once.
+        :yields: The columns of the scheme, with latest_nav_date and latest_nav.
+        """
+        latest_nav = (
+            select(SchemeNavHistory.nav_date, SchemeNavHistory.nav)
+            .where(SchemeNavHistory.scheme_id == MutualFundScheme.id)
+            .order_by(SchemeNavHistory.nav_date.desc())
+            .limit(1)
+            .lateral()
+        )
+        stmt = (
+            select(
+                *(
+                    column
+                    for column in MutualFundScheme.__table__.columns
+                    if column.name not in EXPORT_EXCLUDED_COLUMNS
+                ),
+                latest_nav.c.nav_date.label("latest_nav_date"),
+                latest_nav.c.nav.label("latest_nav"),
+            )
+            .outerjoin(latest_nav, true())
+            .execution_options(yield_per=batch_size)
+        )
+        result = await self.session.stream(stmt)
+        async for row in result.mappings():
+            yield row
+
+    async def upsert_many(
+        self,
+        schemes_data: Iterable[Mapping[str, Any]],
+    ) -> Dict[int, UUID]:
+        """
+        Insert or update many schemes by their scheme code.
+
+        Names are made unique first, see _resolve_name_conflicts.
+
+        :param schemes_data: Dictionaries containing scheme data.
+        :return: A {scheme_code: id} map of the written schemes.
+        """
+        rows = await self._resolve_name_conflicts(schemes_data)
+        return await self._upsert_many(rows, "scheme_id")
+
+    async def sync_many(  # noqa: WPS210
+        self,
+        schemes_data: Iterable[Mapping[str, Any]],
+    ) -> SyncCounts:
+        """
+        Insert new schemes and update only the schemes whose data changed.
+
+        Every row is stored with the SHA-256 of its data. Rows whose fingerprint
+        matches the stored one are skipped by the ON CONFLICT ... WHERE clause,
+        so an unchanged scheme master costs no row writes at all. Names are made
+        unique first, see _resolve_name_conflicts.
+
+        :param schemes_data: Dictionaries containing scheme data.
+        :return: The number of inserted, updated and unchanged schemes.
+        """
+        rows = [
+            {**row, "fingerprint": scheme_fingerprint(row)}
+            for row in await self._resolve_name_conflicts(schemes_data)
+        ]
+        inserted = 0
+        written = 0
+        for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+            chunk = rows[start : start + UPSERT_CHUNK_SIZE]
+            stmt = insert(MutualFundScheme).values(chunk)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[MutualFundScheme.scheme_id],
+                set_={
+                    column: stmt.excluded[column]
+                    for column in chunk[0]
+                    if column != "scheme_id"
+                },
+                where=MutualFundScheme.fingerprint.is_distinct_from(
+                    stmt.excluded.fingerprint,
+                ),
+            )
+            result = await self.session.execute(
+                # xmax is 0 for rows which were inserted rather than updated.
+                stmt.returning(literal_column("xmax = 0", Boolean)),
+            )
+            was_inserted = result.scalars().all()
+            inserted += sum(was_inserted)
+            written += len(was_inserted)
+        return SyncCounts(
+            inserted=inserted,
+            updated=written - inserted,
+            unchanged=len(rows) - written,
+        )
+
+    async def _resolve_name_conflicts(  # noqa: WPS210, WPS231
+        self,
+        schemes_data: Iterable[Mapping[str, Any]],
+    ) -> List[Dict[str, Any]]:
+        """
+        Make the names of scheme rows safe to upsert by scheme code.
+
+        Rows with the same scheme code are collapsed, the last one wins. A name
+        stored for a scheme code missing from the rows belongs to a scheme whose
+        code changed, that scheme gets the new code so the upsert updates it.
+        Names used by several rows, like the "NA" of schemes without a name in
+        the feed, or still stored for another scheme get the scheme code appended.
+
+        :param schemes_data: Dictionaries containing scheme data.
+        :return: The rows to upsert.
+        """
+        rows = list({row["scheme_id"]: dict(row) for row in schemes_data}.values())
+        if not rows:
+            return rows
+        codes = [row["scheme_id"] for row in rows]
+        names = Counter(row["name"] for row in rows)
+        result = await self.session.execute(
+            select(MutualFundScheme.name, MutualFundScheme.scheme_id).where(
+                or_(
+                    MutualFundScheme.name
+                    == any_(bindparam("scheme_names", list(names), ARRAY(String))),
+                    MutualFundScheme.scheme_id
+                    == any_(bindparam("scheme_codes", codes, ARRAY(Integer))),
+                ),
+            ),
+        )
+        stored = result.tuples().all()
+        name_codes = {name: code for name, code in stored if name in names}
+        stored_codes = {code for _, code in stored}
+        batch_codes = set(codes)
+        recoded: Dict[str, int] = {}
+        for row in rows:
+            name, code = row["name"], row["scheme_id"]
+            if names[name] == 1 and name_codes.get(name, code) == code:
+                continue
+            if (
+                names[name] == 1
+                and name_codes[name] not in batch_codes
+                and code not in stored_codes
+            ):
+                recoded[name] = code
+                continue
+            row["name"] = f"{name} ({code})"
+        if recoded:
+            # all schemes whose code changed are updated with a single statement
+            new_codes = (
+                func.unnest(
+                    bindparam("recoded_names", list(recoded), ARRAY(String)),
+                    bindparam("recoded_codes", list(recoded.values()), ARRAY(Integer)),
+                )
+                .table_valued("name", "scheme_id")
+                .render_derived()
+            )
+            await self.session.execute(
+                update(MutualFundScheme)
+                .where(MutualFundScheme.name == new_codes.c.name)
+                .values(scheme_id=new_codes.c.scheme_id),
+            )
+        return rows
@@ -1,7 +1,7 @@
-from typing import List, Optional, Tuple
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
 from uuid import UUID
 
-from sqlalchemy import delete
+from sqlalchemy import delete, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import joinedload
@@ -35,6 +35,24 @@ class PortfolioDAO(BaseDAO[Portfolio]):
         instance = result.scalars().first()
         return instance if instance else None
 
+    async def update_many(self, values: Mapping[UUID, Dict[str, Any]]) -> int:
+        """
+        Update columns of many portfolios in a single executemany statement.
+
+        :param values: The new column values of every portfolio by portfolio id.
+        :return: The number of portfolios updated.
+        """
+        if not values:
+            return 0
+        await self.session.execute(
+            update(Portfolio),
+            [
+                {"id": portfolio_id, **portfolio_values}
+                for portfolio_id, portfolio_values in values.items()
+            ],
+        )
+        return len(values)
+
 
 class PortfolioMutualFundDAO(BaseDAO[PortfolioMutualFund]):
     """Data Access Object for PortfolioMutualFund model. Extends BaseDAO."""
@@ -61,6 +79,21 @@ class PortfolioMutualFundDAO(BaseDAO[PortfolioMutualFund]):
         instance = result.scalars().first()
         return instance if instance else None
 
+    async def get_all_proportions(self) -> Sequence[Tuple[UUID, UUID, int]]:
+        """
+        Get the proportions of the schemes of all portfolios.
+
+        :return: The (portfolio_id, mutualfundscheme_id, proportion) rows.
+        """
+        result = await self.session.execute(
+            select(
+                PortfolioMutualFund.portfolio_id,
+                PortfolioMutualFund.mutualfundscheme_id,
+                PortfolioMutualFund.proportion,
+            ),
+        )
+        return result.tuples().all()
+
     async def update_schemes_in_portfolio(
         self,
         portfolio_id: UUID,
@@ -1,166 +1,556 @@
 import logging
-from typing import Dict, Mapping, Optional, Union
+from datetime import date
+from typing import (  # noqa: WPS235
+    Any,
+    Collection,
+    Dict,
+    Iterable,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+    cast,
+)
 from uuid import UUID
 
 from fastapi import Depends
+from sqlalchemy import (  # noqa: WPS235
+    ColumnElement,
+    Date,
+    Float,
+    FromClause,
+    TableClause,
+    any_,
+    bindparam,
+    column,
+    delete,
+    func,
+    table,
+    text,
+    true,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import UUID as UUID_TYPE  # noqa: N811
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm.attributes import flag_modified
 
-from myfi_backend.db.dao.base_dao import BaseDAO
+from myfi_backend.db.dao.base_dao import UPSERT_CHUNK_SIZE
 from myfi_backend.db.dependencies import get_db_session
-from myfi_backend.db.models.scheme_nav_model import SchemeNAV
+from myfi_backend.db.models.mutual_fund_scheme_model import MutualFundScheme
+from myfi_backend.db.models.scheme_nav_metrics_model import SchemeNavMetrics
+from myfi_backend.db.models.scheme_nav_model import (
+    NAV_HISTORY_DEFAULT_PARTITION,
+    NAV_HISTORY_PARTITION_PREFIX,
+    SchemeNavHistory,
+)
+from myfi_backend.db.models.scheme_nav_summary_model import SchemeNavSummary
 
+# (scheme_id, nav_date, nav) of a single NAV.
+NavRow = Tuple[UUID, Union[str, date], float]
 
-class SchemeNavDAO(BaseDAO[SchemeNAV]):
+# Days of the 52 week range of a NAV summary.
+WEEK52_DAYS = 52 * 7
+
+# Days looked back by the trailing returns of a NAV summary, by column. Like the
+# scheme metrics, a year is 365.25 days.
+SUMMARY_RETURN_DAYS = (
+    ("return_last_year", 365),
+    ("return_last3_years", 1096),
+    ("return_last5_years", 1826),
+)
+
+
+def parse_nav_date(nav_date: Union[str, date]) -> date:
+    """
+    Convert a NAV date to a date object.
+
+    Accepts dates and ISO formatted strings, with or without a time part
+    e.g. "2021-01-01" or "2021-01-01T00:00:00".
+
+    :param nav_date: The NAV date to convert.
+    :return: The NAV date as a date object.
     """
-    Data Access Object for SchemeNAV model.
+    if isinstance(nav_date, date):
+        return nav_date
+    return date.fromisoformat(nav_date[:10])
 
-    Provides interface for CRUD operations on SchemeNAV model.
+
+class SchemeNavDAO:
+    """
+    Data Access Object for SchemeNavHistory model.
+
+    NAV history is stored as one row per scheme and date, writes are plain
+    INSERT ... ON CONFLICT statements and never read the existing history.
     """
 
     def __init__(self, session: AsyncSession = Depends(get_db_session)):
-        super().__init__(SchemeNAV, session)
+        self.session = session
 
-    async def create(
+    async def get_by_scheme_id(
         self,
-        kwargs: Mapping[str, Union[str, UUID, float, Dict[str, float]]],
-    ) -> SchemeNAV:
+        scheme_id: UUID,
+        from_date: Optional[date] = None,
+        to_date: Optional[date] = None,
+        bucket: Optional[str] = None,
+    ) -> Dict[str, float]:
         """
-        Create a new model instance.
+        Get the NAV history of a scheme.
 
-        :param kwargs: The attributes of the model instance.
-        :return: The created model instance.
-        :raises ValueError: If 'nav_data' is not present in kwargs
-                            or it's not a dictionary.
+        :param scheme_id: The id of the scheme to get the NAV history of.
+        :param from_date: Only return NAVs on or after this date.
+        :param to_date: Only return NAVs on or before this date.
+        :param bucket: A date_trunc field e.g. "week" or "month". When set, only the
+            last NAV of every week or month is returned.
+        :return: The NAV history as {date: nav} sorted by date, empty if not found.
         """
-        mutable_kwargs = dict(kwargs)
-        if "nav_data" not in mutable_kwargs or not isinstance(
-            mutable_kwargs["nav_data"],
-            dict,
-        ):
-            raise ValueError("nav_data not present or nav_data must be a dictionary")
+        stmt = select(SchemeNavHistory.nav_date, SchemeNavHistory.nav).where(
+            SchemeNavHistory.scheme_id == scheme_id,
+        )
+        if from_date is not None:
+            stmt = stmt.where(SchemeNavHistory.nav_date >= from_date)
+        if to_date is not None:
+            stmt = stmt.where(SchemeNavHistory.nav_date <= to_date)
 
-        mutable_kwargs["nav_data"] = dict(sorted(mutable_kwargs["nav_data"].items()))
+        if bucket is None:
+            stmt = stmt.order_by(SchemeNavHistory.nav_date)
+        else:
+            ranked = stmt.add_columns(
+                func.row_number()
+                .over(
+                    partition_by=func.date_trunc(bucket, SchemeNavHistory.nav_date),
+                    order_by=SchemeNavHistory.nav_date.desc(),
+                )
+                .label("position"),
+            ).subquery()
+            stmt = (
+                select(ranked.c.nav_date, ranked.c.nav)
+                .where(ranked.c.position == 1)
+                .order_by(ranked.c.nav_date)
+            )
 
-        instance = self.model(**mutable_kwargs)
-        self.session.add(instance)
-        await self.session.commit()
-        await self.session.refresh(instance)
-        return instance
+        result = await self.session.execute(stmt)
+        return {nav_date.isoformat(): nav for nav_date, nav in result.all()}
 
-    async def update(self, instance: SchemeNAV) -> SchemeNAV:
+    async def get_all_navs(
+        self,
+        from_date: Optional[date] = None,
+        scheme_ids: Optional[Collection[UUID]] = None,
+    ) -> Sequence[Tuple[UUID, date, float]]:
         """
-        Update an existing model instance.
+        Get the NAV history of all schemes.
 
-        :param instance: The model instance to update.
-        :return: The updated model instance.
+        :param from_date: Only return NAVs on or after this date.
+        :param scheme_ids: Only return NAVs of these schemes.
+        :return: The (scheme_id, nav_date, nav) rows, in no particular order.
         """
-        if instance.nav_data and isinstance(instance.nav_data, dict):
-            sorted_nav_data = dict(sorted(instance.nav_data.items()))
-            instance.nav_data = sorted_nav_data
+        stmt = select(
+            SchemeNavHistory.scheme_id,
+            SchemeNavHistory.nav_date,
+            SchemeNavHistory.nav,
+        )
+        if from_date is not None:
+            stmt = stmt.where(SchemeNavHistory.nav_date >= from_date)
+        if scheme_ids is not None:
+            stmt = stmt.where(
+                SchemeNavHistory.scheme_id
+                == any_(bindparam("scheme_ids", list(scheme_ids), ARRAY(UUID_TYPE))),
+            )
+        result = await self.session.execute(stmt)
+        return result.tuples().all()
 
-        await self.session.commit()
-        await self.session.refresh(instance)
-        return instance
+    async def get_first_navs(  # noqa: WPS210
+        self,
+        scheme_ids: Optional[Collection[UUID]] = None,
+    ) -> Dict[UUID, Tuple[date, float]]:
+        """
+        Get the first NAV of every scheme.
+
+        Every NAV is a LATERAL subquery reading the start of the (scheme_id,
+        nav_date) primary key of a scheme, the history itself is not scanned.
+
+        :param scheme_ids: Only return the NAVs of these schemes.
+        :return: The (nav_date, nav) of the first NAV by scheme id.
+        """
+        first = (
+            select(SchemeNavHistory.nav_date, SchemeNavHistory.nav)
+            .where(SchemeNavHistory.scheme_id == MutualFundScheme.id)
+            .order_by(SchemeNavHistory.nav_date)
+            .limit(1)
+            .lateral("first")
+        )
+        stmt = select(MutualFundScheme.id, first.c.nav_date, first.c.nav).join(
+            first,
+            true(),
+        )
+        if scheme_ids is not None:
+            stmt = stmt.where(
+                MutualFundScheme.id
+                == any_(bindparam("scheme_ids", list(scheme_ids), ARRAY(UUID_TYPE))),
+            )
+        result = await self.session.execute(stmt)
+        return {scheme_id: (nav_date, nav) for scheme_id, nav_date, nav in result.all()}
 
-    async def get_by_scheme_id(self, scheme_id: UUID) -> Optional[SchemeNAV]:
+    async def get_last_navs(  # noqa: WPS210
+        self,
+        on_date: date,
+        scheme_ids: Optional[Collection[UUID]] = None,
+    ) -> Dict[UUID, Tuple[date, float]]:
         """
-        Get a model instance by scheme id.
+        Get the last NAV of every scheme on or before a date.
+
+        Every NAV is a LATERAL subquery reading the (scheme_id, nav_date) primary
+        key of a scheme backwards from the date, so a scheme which hasn't
+        published a NAV for a long time still gets its last one.
 
-        :param scheme_id: The id of the scheme instance to get.
-        :return: The SchemeNAV instance if found, else None.
+        :param on_date: The date to get the NAVs on.
+        :param scheme_ids: Only return the NAVs of these schemes.
+        :return: The (nav_date, nav) of the last NAV by scheme id, schemes without
+            NAV on or before the date are left out.
         """
-        result = await self.session.execute(
-            select(SchemeNAV).filter_by(scheme_id=scheme_id),
+        last = (
+            select(SchemeNavHistory.nav_date, SchemeNavHistory.nav)
+            .where(
+                SchemeNavHistory.scheme_id == MutualFundScheme.id,
+                SchemeNavHistory.nav_date <= on_date,
+            )
+            .order_by(SchemeNavHistory.nav_date.desc())
+            .limit(1)
+            .lateral("last")
+        )
+        stmt = select(MutualFundScheme.id, last.c.nav_date, last.c.nav).join(
+            last,
+            true(),
         )
-        instance = result.scalars().first()
-        return instance if instance else None
+        if scheme_ids is not None:
+            stmt = stmt.where(
+                MutualFundScheme.id
+                == any_(bindparam("scheme_ids", list(scheme_ids), ARRAY(UUID_TYPE))),
+            )
+        result = await self.session.execute(stmt)
+        return {scheme_id: (nav_date, nav) for scheme_id, nav_date, nav in result.all()}
 
     async def upsert(
         self,
         scheme_nav_data: Mapping[str, Union[UUID, Dict[str, float]]],
-    ) -> Optional[SchemeNAV]:
+    ) -> int:
         """
-        Perform an upsert operation on SchemeNAV.
+        Insert or update NAVs of a scheme.
 
-        If a SchemeNAV with the provided scheme_id exists, update its nav_data.
-        Otherwise, create a new SchemeNAV.
+        NAVs for dates that already exist are overwritten, all other dates of the
+        history are left untouched.
 
-        :param scheme_nav_data: Dictionary representing the SchemeNAV model.
-        :return: The updated or created SchemeNAV.
+        :param scheme_nav_data: Dictionary with the scheme_id and the nav_data in
+            the {date: nav} format.
+        :return: The number of NAV rows written.
         """
-        scheme_id = scheme_nav_data["scheme_id"]
+        scheme_id = cast(UUID, scheme_nav_data["scheme_id"])
         nav_data = scheme_nav_data["nav_data"]
 
-        result = await self.session.execute(
-            select(SchemeNAV).filter_by(scheme_id=scheme_id),
-        )
-        scheme_nav = result.scalars().first()
-
-        if isinstance(nav_data, dict):
-            sorted_nav_data = dict(sorted(nav_data.items()))
-        else:
+        if not isinstance(nav_data, dict):
             logging.error(
                 f"nav_data is not a dictionary for scheme_id: {scheme_id}, "
                 f"didn't upsert NAV data",
             )
-            return None
-
-        if scheme_nav is None:
-            # SchemeNAV with this scheme_id does not exist, create a new one
-            scheme_nav = SchemeNAV(scheme_id=scheme_id, nav_data=sorted_nav_data)
-            self.session.add(scheme_nav)
-        elif isinstance(scheme_nav.nav_data, dict):
-            # SchemeNAV with this scheme_id exists, update its nav_data
-            scheme_nav.nav_data.update(sorted_nav_data)
-            # Inform SQLAlchemy that nav_data has been updated
-            flag_modified(scheme_nav, "nav_data")
-        else:
-            logging.error(
-                f"nav_data is not a dictionary for scheme_id: {scheme_id}, "
-                f"didn't upsert NAV data",
-            )
-        return scheme_nav
+            return 0
+
+        return await self.upsert_many(
+            (scheme_id, nav_date, nav) for nav_date, nav in nav_data.items()
+        )
 
     async def add_latest_nav(
         self,
         scheme_id: UUID,
-        date: str,
+        nav_date: Union[str, date],
         nav: float,
-    ) -> Optional[SchemeNAV]:
+    ) -> None:
         """
-        Add the latest NAV to the nav_data of a SchemeNAV.
+        Add the latest NAV of a scheme.
 
-        If a SchemeNAV with the provided scheme_id exists, add the latest NAV to its
-        nav_data. Otherwise, create a new SchemeNAV.
+        This is a single row insert, the NAV is overwritten if the scheme already
+        has a NAV for the date.
 
         :param scheme_id: The id of the scheme.
-        :param date: The date of the latest NAV.
+        :param nav_date: The date of the latest NAV.
         :param nav: The latest NAV.
-        :return: The updated or created SchemeNAV.
         """
+        await self.upsert_many([(scheme_id, nav_date, nav)])
+        await self.session.commit()
+
+    async def upsert_many(self, rows: Iterable[NavRow]) -> int:  # noqa: WPS210
+        """
+        Insert or update NAVs of any number of schemes in a single statement.
+
+        The rows are sent as three arrays and expanded with unnest() by the
+        database, so the statement has three bind parameters no matter how many
+        rows are written. Rows for the same scheme and day are collapsed, the
+        last one wins. The NAV summaries aren't refreshed, callers refresh the
+        summaries of the written schemes once they are done writing.
+
+        :param rows: The (scheme_id, nav_date, nav) rows to write.
+        :return: The number of NAV rows written.
+        """
+        navs = {
+            (scheme_id, parse_nav_date(nav_date)): nav
+            for scheme_id, nav_date, nav in rows
+        }
+        if not navs:
+            return 0
+
+        new_navs = (
+            func.unnest(
+                bindparam("scheme_ids", [key[0] for key in navs], ARRAY(UUID_TYPE)),
+                bindparam("nav_dates", [key[1] for key in navs], ARRAY(Date)),
+                bindparam("navs", list(navs.values()), ARRAY(Float)),
+            )
+            .table_valued("scheme_id", "nav_date", "nav")
+            .render_derived()
+        )
+        stmt = insert(SchemeNavHistory).from_select(
+            ["scheme_id", "nav_date", "nav"],
+            select(new_navs.c.scheme_id, new_navs.c.nav_date, new_navs.c.nav),
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[SchemeNavHistory.scheme_id, SchemeNavHistory.nav_date],
+            set_={"nav": stmt.excluded.nav},
+        )
+        await self.session.execute(stmt)
+        return len(navs)
+
+    async def get_summary(self, scheme_id: UUID) -> Optional[SchemeNavSummary]:
+        """
+        Get the NAV summary of a scheme.
+
+        :param scheme_id: The id of the scheme.
+        :return: The NAV summary, None if the scheme has no NAVs.
+        """
+        return await self.session.get(SchemeNavSummary, scheme_id)
+
+    async def get_metrics(self, scheme_id: UUID) -> Optional[SchemeNavMetrics]:
+        """
+        Get the return and risk metrics computed from the NAVs of a scheme.
+
+        :param scheme_id: The id of the scheme.
+        :return: The metrics, None if they weren't computed yet.
+        """
+        return await self.session.get(SchemeNavMetrics, scheme_id)
+
+    async def upsert_metrics(self, rows: Sequence[Mapping[str, Any]]) -> int:
+        """
+        Insert or replace the computed metrics of many schemes.
+
+        :param rows: The columns of SchemeNavMetrics of every scheme, all with the
+            same keys.
+        :return: The number of schemes written.
+        """
+        for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+            chunk = rows[start : start + UPSERT_CHUNK_SIZE]
+            stmt = insert(SchemeNavMetrics).values(chunk)
+            await self.session.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[SchemeNavMetrics.scheme_id],
+                    set_={
+                        column: stmt.excluded[column]
+                        for column in chunk[0]
+                        if column != "scheme_id"
+                    },
+                ),
+            )
+        return len(rows)
+
+    async def get_summaries(
+        self,
+        scheme_ids: Collection[UUID],
+    ) -> Dict[UUID, SchemeNavSummary]:
+        """
+        Get the NAV summaries of many schemes in a single query.
+
+        :param scheme_ids: The ids of the schemes.
+        :return: A {scheme_id: summary} map, schemes without NAVs are left out.
+        """
+        if not scheme_ids:
+            return {}
         result = await self.session.execute(
-            select(SchemeNAV).filter_by(scheme_id=scheme_id),
-        )
-        scheme_nav = result.scalars().first()
-
-        if scheme_nav is None:
-            # SchemeNAV with this scheme_id does not exist, create a new one
-            scheme_nav = SchemeNAV(scheme_id=scheme_id, nav_data={date: nav})
-            self.session.add(scheme_nav)
-        elif isinstance(scheme_nav.nav_data, dict):
-            # SchemeNAV with this scheme_id exists, add the latest NAV to its nav_data
-            scheme_nav.nav_data[date] = nav
-            scheme_nav.nav_data = dict(sorted(scheme_nav.nav_data.items()))
-            flag_modified(scheme_nav, "nav_data")
+            select(SchemeNavSummary).where(
+                SchemeNavSummary.scheme_id
+                == any_(bindparam("scheme_ids", list(scheme_ids), ARRAY(UUID_TYPE))),
+            ),
+        )
+        return {summary.scheme_id: summary for summary in result.scalars()}
+
+    async def refresh_summaries(  # noqa: WPS210
+        self,
+        scheme_ids: Optional[Collection[UUID]] = None,
+    ) -> None:
+        """
+        Recompute the NAV summaries of schemes from their NAV history.
+
+        The summaries are rewritten with one INSERT ... SELECT ... ON CONFLICT
+        statement. Every figure is a LATERAL or scalar subquery walking the
+        (scheme_id, nav_date) primary key backwards from the latest NAV, so the
+        cost depends on the number of schemes, not on the length of their history.
+
+        :param scheme_ids: The ids of the schemes to refresh, None for all schemes.
+        """
+        schemes: FromClause
+        if scheme_ids is None:
+            schemes = select(MutualFundScheme.id.label("scheme_id")).subquery()
         else:
-            logging.error(
-                f"nav_data is not a dictionary for scheme_id: {scheme_id}, didn't add "
-                f"latest NAV",
+            schemes = (
+                func.unnest(
+                    bindparam("summary_ids", list(scheme_ids), ARRAY(UUID_TYPE)),
+                )
+                .table_valued("scheme_id")
+                .render_derived()
+            )
+        history = SchemeNavHistory
+        latest = (
+            select(history.nav_date, history.nav)
+            .where(history.scheme_id == schemes.c.scheme_id)
+            .order_by(history.nav_date.desc())
+            .limit(1)
+            .lateral("latest")
+        )
+        previous = (
+            select(history.nav_date, history.nav)
+            .where(
+                history.scheme_id == schemes.c.scheme_id,
+                history.nav_date < latest.c.nav_date,
+            )
+            .order_by(history.nav_date.desc())
+            .limit(1)
+            .lateral("previous")
+        )
+        week52 = (
+            select(
+                func.max(history.nav).label("high"),
+                func.min(history.nav).label("low"),
+            )
+            .where(
+                history.scheme_id == schemes.c.scheme_id,
+                history.nav_date > latest.c.nav_date - WEEK52_DAYS,
+                history.nav_date <= latest.c.nav_date,
             )
-            return None
+            .lateral("week52")
+        )
+        trailing_returns = [
+            _change(
+                latest.c.nav,
+                select(history.nav)
+                .where(
+                    history.scheme_id == schemes.c.scheme_id,
+                    history.nav_date <= latest.c.nav_date - days,
+                )
+                .order_by(history.nav_date.desc())
+                .limit(1)
+                .scalar_subquery(),
+            ).label(column)
+            for column, days in SUMMARY_RETURN_DAYS
+        ]
+        summaries = select(
+            schemes.c.scheme_id,
+            latest.c.nav_date,
+            latest.c.nav,
+            previous.c.nav_date.label("previous_nav_date"),
+            previous.c.nav.label("previous_nav"),
+            _change(latest.c.nav, previous.c.nav).label("day_change"),
+            week52.c.high.label("week52_high"),
+            week52.c.low.label("week52_low"),
+            *trailing_returns,
+        ).select_from(
+            schemes.join(latest, true())
+            .outerjoin(previous, true())
+            .join(week52, true()),
+        )
+        columns = [column.name for column in summaries.selected_columns]
+        stmt = insert(SchemeNavSummary).from_select(columns, summaries)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[SchemeNavSummary.scheme_id],
+            set_={column: stmt.excluded[column] for column in columns[1:]},
+        )
+        await self.session.execute(stmt)
 
-        await self.session.commit()
-        await self.session.refresh(scheme_nav)
-        return scheme_nav
+    async def create_year_partition(self, year: int) -> bool:  # noqa: WPS210
+        """
+        Create the partition of the NAV history of a year.
+
+        NAVs of the year already stored in the default partition are moved to the
+        new partition in date order, which keeps the BRIN ranges of nav_date
+        narrow. The partition is attached once filled so the default partition
+        never holds dates of a year partition.
+
+        :param year: The year of the partition.
+        :return: False if the partition already existed.
+        """
+        partition = partition_name(year)
+        exists = await self.session.scalar(
+            text("SELECT to_regclass(:partition) IS NOT NULL"),
+            {"partition": partition},
+        )
+        if exists:
+            return False
+        start, end = date(year, 1, 1), date(year + 1, 1, 1)
+        await self.session.execute(
+            text(
+                f"CREATE TABLE {partition} "
+                "(LIKE scheme_nav_history INCLUDING DEFAULTS INCLUDING CONSTRAINTS)",
+            ),
+        )
+        default_partition = _history_table(NAV_HISTORY_DEFAULT_PARTITION)
+        moved = (
+            delete(default_partition)
+            .where(
+                default_partition.c.nav_date >= start,
+                default_partition.c.nav_date < end,
+            )
+            .returning(*default_partition.c)
+            .cte("moved")
+        )
+        await self.session.execute(
+            insert(_history_table(partition)).from_select(
+                list(moved.c.keys()),
+                select(moved).order_by(moved.c.nav_date, moved.c.scheme_id),
+            ),
+        )
+        await self.session.execute(
+            text(
+                f"ALTER TABLE scheme_nav_history ATTACH PARTITION {partition} "
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')",
+            ),
+        )
+        return True
+
+
+def partition_name(year: int) -> str:
+    """
+    Get the name of the partition of the NAV history of a year.
+
+    :param year: The year of the partition.
+    :return: The name of the partition table.
+    """
+    return f"{NAV_HISTORY_PARTITION_PREFIX}y{year}"
+
+
+def _history_table(name: str) -> TableClause:
+    """
+    Build a lightweight table of the columns of the NAV history.
+
+    :param name: The name of the table, e.g. of a partition.
+    :return: The table.
+    """
+    return table(name, column("scheme_id"), column("nav_date"), column("nav"))
+
+
+def _change(
+    current: ColumnElement[float],
+    past: ColumnElement[float],
+) -> ColumnElement[float]:
+    """
+    Build the change from a past NAV to a current one in percent.
+
+    :param current: The current NAV.
+    :param past: The past NAV.
+    :return: The change, NULL if there is no past NAV.
+    """
+    return (current / func.nullif(past, 0) - 1) * 100
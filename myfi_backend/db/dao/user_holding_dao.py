@@ -0,0 +1,51 @@
+from typing import Dict
+from uuid import UUID
+
+from fastapi import Depends
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from myfi_backend.db.dependencies import get_db_session
+from myfi_backend.db.models.user_holding_model import UserHolding
+
+
+class UserHoldingDAO:
+    """Data Access Object for UserHolding model."""
+
+    def __init__(self, session: AsyncSession = Depends(get_db_session)):
+        self.session = session
+
+    async def get_units_by_user_id(self, user_id: UUID) -> Dict[UUID, float]:
+        """
+        Get the units of every scheme held by a user.
+
+        :param user_id: The id of the user.
+        :return: The units held as {mutualfundscheme_id: units}, empty if none.
+        """
+        result = await self.session.execute(
+            select(UserHolding.mutualfundscheme_id, UserHolding.units).where(
+                UserHolding.user_id == user_id,
+            ),
+        )
+        return dict(result.tuples().all())
+
+    async def upsert(self, user_id: UUID, scheme_id: UUID, units: float) -> None:
+        """
+        Set the units of a scheme held by a user.
+
+        :param user_id: The id of the user.
+        :param scheme_id: The id of the scheme.
+        :param units: The number of units held.
+        """
+        stmt = insert(UserHolding).values(
+            user_id=user_id,
+            mutualfundscheme_id=scheme_id,
+            units=units,
+        )
+        await self.session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[UserHolding.user_id, UserHolding.mutualfundscheme_id],
+                set_={"units": stmt.excluded.units},
+            ),
+        )
@@ -1,8 +1,10 @@
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Awaitable, Callable, TypeVar
 
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from starlette.requests import Request
 
+LoadResult = TypeVar("LoadResult")
+
 
 async def get_db_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
     """
@@ -18,3 +20,33 @@ async def get_db_session(request: Request) -> AsyncGenerator[AsyncSession, None]
     finally:
         await session.commit()
         await session.close()
+
+
+def get_db_session_factory(
+    request: Request,
+) -> async_sessionmaker[AsyncSession]:
+    """
+    Get the factory of database sessions.
+
+    :param request: current request.
+    :return: the session factory.
+    """
+    return request.app.state.db_session_factory
+
+
+async def run_in_session(
+    session_factory: async_sessionmaker[AsyncSession],
+    load: Callable[[AsyncSession], Awaitable[LoadResult]],
+) -> LoadResult:
+    """
+    Run a database load on a session of its own.
+
+    Loads shared by several requests, like the loads of the local cache, must
+    not use the session of the request that happens to start them.
+
+    :param session_factory: Factory of database sessions.
+    :param load: The load, given the session.
+    :return: The result of the load.
+    """
+    async with session_factory() as session:
+        return await load(session)
@@ -1,5 +1,6 @@
 import asyncio
 from logging.config import fileConfig
+from typing import Any, Optional
 
 from alembic import context
 from sqlalchemy.ext.asyncio.engine import create_async_engine
@@ -7,6 +8,7 @@ from sqlalchemy.future import Connection
 
 from myfi_backend.db.models import load_all_models
 from myfi_backend.db.models.base_model import BaseModel
+from myfi_backend.db.models.scheme_nav_model import NAV_HISTORY_PARTITION_PREFIX
 from myfi_backend.settings import settings
 
 # this is the Alembic Config object, which provides
@@ -33,6 +35,24 @@ if config.config_file_name is not None:
 # ... etc.
 
 
+def include_name(name: Optional[str], type_: str, parent_names: Any) -> bool:
+    """
+    Leave the partitions of the NAV history out of autogenerate.
+
+    Partitions are created by migrations and at runtime, not by the models.
+
+    :param name: The name of the object.
+    :param type_: The type of the object, e.g. "table".
+    :param parent_names: The names of the parents of the object.
+    :return: False for partitions of the NAV history.
+    """
+    return not (
+        type_ == "table"
+        and name is not None
+        and name.startswith(NAV_HISTORY_PARTITION_PREFIX)
+    )
+
+
 async def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
 
@@ -48,6 +68,7 @@ async def run_migrations_offline() -> None:
     context.configure(
         url=str(settings.get_db_url()),
         target_metadata=target_metadata,
+        include_name=include_name,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -62,7 +83,11 @@ def do_run_migrations(connection: Connection) -> None:
 
     :param connection: connection to the database.
     """
-    context.configure(connection=connection, target_metadata=target_metadata)
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_name=include_name,
+    )
 
     with context.begin_transaction():
         context.run_migrations()
@@ -0,0 +1,73 @@
+"""Replace scheme_nav JSON blob with scheme_nav_history rows
+
+Revision ID: 2b0ffce9dea2
+Revises: 1acdbbfb9966
+Create Date: 2026-10-17 09:12:41.318204
+
+"""
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "2b0ffce9dea2"
+down_revision = "1acdbbfb9966"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "scheme_nav_history",
+        sa.Column("scheme_id", sa.UUID(), nullable=False),
+        sa.Column("nav_date", sa.Date(), nullable=False),
+        sa.Column("nav", sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(["scheme_id"], ["mutual_fund_schemes.id"]),
+        sa.PrimaryKeyConstraint("scheme_id", "nav_date"),
+    )
+    # Backfill one row per {date: nav} entry of the JSON blobs. Keys may carry a
+    # time part, duplicates of the same day keep the first value seen.
+    op.execute(
+        """
+        INSERT INTO scheme_nav_history (scheme_id, nav_date, nav)
+        SELECT scheme_nav.scheme_id,
+               CAST(LEFT(nav_point.key, 10) AS DATE),
+               CAST(nav_point.value AS DOUBLE PRECISION)
+        FROM scheme_nav
+        CROSS JOIN LATERAL json_each_text(scheme_nav.nav_data) AS nav_point
+        WHERE nav_point.value IS NOT NULL
+        ON CONFLICT (scheme_id, nav_date) DO NOTHING
+        """,
+    )
+    op.drop_index("ix_scheme_nav_scheme_id", table_name="scheme_nav")
+    op.drop_index("ix_scheme_nav_id", table_name="scheme_nav")
+    op.drop_table("scheme_nav")
+
+
+def downgrade() -> None:
+    op.create_table(
+        "scheme_nav",
+        sa.Column("scheme_id", sa.UUID(), nullable=False),
+        sa.Column("nav_data", postgresql.JSON(astext_type=sa.Text()), nullable=False),
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.ForeignKeyConstraint(["scheme_id"], ["mutual_fund_schemes.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_scheme_nav_id", "scheme_nav", ["id"], unique=False)
+    op.create_index(
+        "ix_scheme_nav_scheme_id",
+        "scheme_nav",
+        ["scheme_id"],
+        unique=False,
+    )
+    op.execute(
+        """
+        INSERT INTO scheme_nav (id, scheme_id, nav_data)
+        SELECT gen_random_uuid(),
+               scheme_id,
+               json_object_agg(CAST(nav_date AS TEXT), nav ORDER BY nav_date)
+        FROM scheme_nav_history
+        GROUP BY scheme_id
+        """,
+    )
+    op.drop_table("scheme_nav_history")
@@ -0,0 +1,23 @@
+"""Make the AMC code unique
+
+Revision ID: f37e6276fc7a
+Revises: 2b0ffce9dea2
+Create Date: 2026-10-17 10:05:24.451016
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "f37e6276fc7a"
+down_revision = "2b0ffce9dea2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # AMCs are upserted with ON CONFLICT (code), which needs a unique index.
+    op.create_index(op.f("ix_amcs_code"), "amcs", ["code"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_amcs_code"), table_name="amcs")
@@ -0,0 +1,27 @@
+"""Add a fingerprint of the synced master data to mutual_fund_schemes
+
+Revision ID: f59363cc1c5a
+Revises: f37e6276fc7a
+Create Date: 2026-10-17 11:20:07.129734
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "f59363cc1c5a"
+down_revision = "f37e6276fc7a"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing rows have no fingerprint, so the next sync rewrites them once.
+    op.add_column(
+        "mutual_fund_schemes",
+        sa.Column("fingerprint", sa.String(length=64), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("mutual_fund_schemes", "fingerprint")
@@ -0,0 +1,30 @@
+"""Add user holdings
+
+Revision ID: e46cab2f0edf
+Revises: f59363cc1c5a
+Create Date: 2026-10-17 12:30:44.108314
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "e46cab2f0edf"
+down_revision = "f59363cc1c5a"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_holdings",
+        sa.Column("user_id", sa.UUID(), nullable=False),
+        sa.Column("mutualfundscheme_id", sa.UUID(), nullable=False),
+        sa.Column("units", sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(["mutualfundscheme_id"], ["mutual_fund_schemes.id"]),
+        sa.PrimaryKeyConstraint("user_id", "mutualfundscheme_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("user_holdings")
@@ -0,0 +1,56 @@
+"""Add scheme catalogue indexes
+
+Revision ID: 9b3e7d5a1c42
+Revises: e46cab2f0edf
+Create Date: 2026-10-17 13:40:12.518201
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "9b3e7d5a1c42"
+down_revision = "e46cab2f0edf"
+branch_labels = None
+depends_on = None
+
+# Keyset pagination indexes, by sort column.
+SORT_INDEXES = (
+    ("ix_mutual_fund_schemes_name_id", "name"),
+    ("ix_mutual_fund_schemes_return_last_year_id", "return_last_year"),
+    ("ix_mutual_fund_schemes_return_last3_years_id", "return_last3_years"),
+    ("ix_mutual_fund_schemes_return_last5_years_id", "return_last5_years"),
+    ("ix_mutual_fund_schemes_aum_id", "aum"),
+    ("ix_mutual_fund_schemes_ter_id", "ter"),
+)
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_mutual_fund_schemes_amc_id",
+        "mutual_fund_schemes",
+        ["amc_id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_mutual_fund_schemes_scheme_category",
+        "mutual_fund_schemes",
+        ["scheme_category"],
+        unique=False,
+    )
+    for index_name, column in SORT_INDEXES:
+        op.create_index(
+            index_name,
+            "mutual_fund_schemes",
+            [column, "id"],
+            unique=False,
+        )
+
+
+def downgrade() -> None:
+    for index_name, _ in SORT_INDEXES:
+        op.drop_index(index_name, table_name="mutual_fund_schemes")
+    op.drop_index(
+        "ix_mutual_fund_schemes_scheme_category",
+        table_name="mutual_fund_schemes",
+    )
+    op.drop_index("ix_mutual_fund_schemes_amc_id", table_name="mutual_fund_schemes")
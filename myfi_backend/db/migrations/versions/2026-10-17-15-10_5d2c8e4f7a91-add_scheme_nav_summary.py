@@ -0,0 +1,38 @@
+"""Add scheme NAV summary
+
+Revision ID: 5d2c8e4f7a91
+Revises: 9b3e7d5a1c42
+Create Date: 2026-10-17 15:10:27.640318
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5d2c8e4f7a91"
+down_revision = "9b3e7d5a1c42"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "scheme_nav_summary",
+        sa.Column("scheme_id", sa.UUID(), nullable=False),
+        sa.Column("nav_date", sa.Date(), nullable=False),
+        sa.Column("nav", sa.Float(), nullable=False),
+        sa.Column("previous_nav_date", sa.Date(), nullable=True),
+        sa.Column("previous_nav", sa.Float(), nullable=True),
+        sa.Column("day_change", sa.Float(), nullable=True),
+        sa.Column("week52_high", sa.Float(), nullable=False),
+        sa.Column("week52_low", sa.Float(), nullable=False),
+        sa.Column("return_last_year", sa.Float(), nullable=True),
+        sa.Column("return_last3_years", sa.Float(), nullable=True),
+        sa.Column("return_last5_years", sa.Float(), nullable=True),
+        sa.ForeignKeyConstraint(["scheme_id"], ["mutual_fund_schemes.id"]),
+        sa.PrimaryKeyConstraint("scheme_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("scheme_nav_summary")
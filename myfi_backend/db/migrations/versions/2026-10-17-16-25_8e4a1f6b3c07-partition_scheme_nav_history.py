@@ -0,0 +1,104 @@
+"""Partition scheme_nav_history by year
+
+Revision ID: 8e4a1f6b3c07
+Revises: 5d2c8e4f7a91
+Create Date: 2026-10-17 16:25:09.271845
+
+"""
+from datetime import date
+from typing import List
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "8e4a1f6b3c07"
+down_revision = "5d2c8e4f7a91"
+branch_labels = None
+depends_on = None
+
+
+def _history_columns() -> List[sa.schema.SchemaItem]:
+    return [
+        sa.Column("scheme_id", sa.UUID(), nullable=False),
+        sa.Column("nav_date", sa.Date(), nullable=False),
+        sa.Column("nav", sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(["scheme_id"], ["mutual_fund_schemes.id"]),
+    ]
+
+
+def upgrade() -> None:
+    op.rename_table("scheme_nav_history", "scheme_nav_history_unpartitioned")
+    op.execute(
+        "ALTER TABLE scheme_nav_history_unpartitioned "
+        "RENAME CONSTRAINT scheme_nav_history_pkey "
+        "TO scheme_nav_history_unpartitioned_pkey",
+    )
+    op.create_table(
+        "scheme_nav_history",
+        *_history_columns(),
+        sa.PrimaryKeyConstraint("scheme_id", "nav_date"),
+        postgresql_partition_by="RANGE (nav_date)",
+    )
+    op.create_index(
+        "ix_scheme_nav_history_nav_date_brin",
+        "scheme_nav_history",
+        ["nav_date"],
+        unique=False,
+        postgresql_using="brin",
+    )
+    op.execute(
+        "CREATE TABLE scheme_nav_history_default "
+        "PARTITION OF scheme_nav_history DEFAULT",
+    )
+    # One partition per year of the existing history, this year and the next.
+    first_year, last_year = (
+        op.get_bind()
+        .execute(
+            sa.text(
+                "SELECT CAST(EXTRACT(YEAR FROM MIN(nav_date)) AS INTEGER), "
+                "CAST(EXTRACT(YEAR FROM MAX(nav_date)) AS INTEGER) "
+                "FROM scheme_nav_history_unpartitioned",
+            ),
+        )
+        .one()
+    )
+    this_year = date.today().year
+    years = set(range(first_year or this_year, (last_year or this_year) + 1))
+    for year in sorted(years | {this_year, this_year + 1}):
+        op.execute(
+            f"CREATE TABLE scheme_nav_history_y{year} "
+            "PARTITION OF scheme_nav_history "
+            f"FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')",
+        )
+    # Rows are written in date order, so the BRIN ranges of nav_date stay narrow.
+    op.execute(
+        "INSERT INTO scheme_nav_history (scheme_id, nav_date, nav) "
+        "SELECT scheme_id, nav_date, nav FROM scheme_nav_history_unpartitioned "
+        "ORDER BY nav_date, scheme_id",
+    )
+    op.drop_table("scheme_nav_history_unpartitioned")
+
+
+def downgrade() -> None:
+    op.create_table(
+        "scheme_nav_history_unpartitioned",
+        *_history_columns(),
+        sa.PrimaryKeyConstraint(
+            "scheme_id",
+            "nav_date",
+            name="scheme_nav_history_unpartitioned_pkey",
+        ),
+    )
+    op.execute(
+        "INSERT INTO scheme_nav_history_unpartitioned (scheme_id, nav_date, nav) "
+        "SELECT scheme_id, nav_date, nav FROM scheme_nav_history",
+    )
+    # Dropping the partitioned table drops its partitions too.
+    op.drop_table("scheme_nav_history")
+    op.rename_table("scheme_nav_history_unpartitioned", "scheme_nav_history")
+    op.execute(
+        "ALTER TABLE scheme_nav_history "
+        "RENAME CONSTRAINT scheme_nav_history_unpartitioned_pkey "
+        "TO scheme_nav_history_pkey",
+    )
@@ -0,0 +1,40 @@
+"""Add scheme NAV metrics
+
+Revision ID: c4d9a7e2b610
+Revises: 8e4a1f6b3c07
+Create Date: 2026-10-17 18:05:11.482930
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c4d9a7e2b610"
+down_revision = "8e4a1f6b3c07"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "scheme_nav_metrics",
+        sa.Column("scheme_id", sa.UUID(), nullable=False),
+        sa.Column("nav_date", sa.Date(), nullable=False),
+        sa.Column("return_last_year", sa.Float(), nullable=True),
+        sa.Column("return_last3_years", sa.Float(), nullable=True),
+        sa.Column("return_last5_years", sa.Float(), nullable=True),
+        sa.Column("return_since_inception", sa.Float(), nullable=True),
+        sa.Column("cagr", sa.Float(), nullable=True),
+        sa.Column("standard_deviation", sa.Float(), nullable=True),
+        sa.Column("sharpe_ratio", sa.Float(), nullable=True),
+        sa.Column("sortino_ratio", sa.Float(), nullable=True),
+        sa.Column("max_drawdown", sa.Float(), nullable=True),
+        sa.Column("alpha", sa.Float(), nullable=True),
+        sa.Column("beta", sa.Float(), nullable=True),
+        sa.ForeignKeyConstraint(["scheme_id"], ["mutual_fund_schemes.id"]),
+        sa.PrimaryKeyConstraint("scheme_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("scheme_nav_metrics")
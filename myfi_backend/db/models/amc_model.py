@@ -22,6 +22,8 @@ class AMC(BaseModel):
     )
     code: Mapped[str] = mapped_column(
         String(length=200),
+        unique=True,
+        index=True,
         nullable=False,
     )
     fund_name: Mapped[str] = mapped_column(
@@ -4,7 +4,16 @@ from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import DeclarativeBase, mapped_column
 
 
-class BaseModel(DeclarativeBase):
+class Base(DeclarativeBase):
+    """
+    Declarative base for all database models.
+
+    Models that need a natural (e.g. composite) primary key inherit from this class
+    directly, everything else should use BaseModel.
+    """
+
+
+class BaseModel(Base):
     """Base model class for database models."""
 
     __abstract__ = True
@@ -1,6 +1,6 @@
 from typing import TYPE_CHECKING, List
 
-from sqlalchemy import Float, ForeignKey, Integer, String
+from sqlalchemy import Float, ForeignKey, Index, Integer, String
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -9,13 +9,31 @@ from myfi_backend.db.models.base_model import BaseModel
 if TYPE_CHECKING:
     from myfi_backend.db.models.amc_model import AMC
     from myfi_backend.db.models.portfolio_model import PortfolioMutualFund
-    from myfi_backend.db.models.scheme_nav_model import SchemeNAV
+    from myfi_backend.db.models.scheme_nav_model import SchemeNavHistory
 
 
 class MutualFundScheme(BaseModel):
     """Model for Mutual Fund Schemes."""
 
     __tablename__ = "mutual_fund_schemes"
+    # Keyset pagination of the catalogue, one index per sort column with the id
+    # as tie-breaker.
+    __table_args__ = (
+        Index("ix_mutual_fund_schemes_name_id", "name", "id"),
+        Index("ix_mutual_fund_schemes_return_last_year_id", "return_last_year", "id"),
+        Index(
+            "ix_mutual_fund_schemes_return_last3_years_id",
+            "return_last3_years",
+            "id",
+        ),
+        Index(
+            "ix_mutual_fund_schemes_return_last5_years_id",
+            "return_last5_years",
+            "id",
+        ),
+        Index("ix_mutual_fund_schemes_aum_id", "aum", "id"),
+        Index("ix_mutual_fund_schemes_ter_id", "ter", "id"),
+    )
 
     name: Mapped[str] = mapped_column(
         String(length=200),
@@ -33,6 +51,7 @@ class MutualFundScheme(BaseModel):
     amc_id = mapped_column(
         UUID(as_uuid=True),
         ForeignKey("amcs.id"),
+        index=True,
     )
     # scheme_plan: The plan of the scheme (e.g., direct, regular).
     scheme_plan: Mapped[str] = mapped_column(
@@ -48,6 +67,7 @@ class MutualFundScheme(BaseModel):
     scheme_category: Mapped[str] = mapped_column(
         String(length=200),
         nullable=False,
+        index=True,
     )
     # nav: The Net Asset Value of the scheme.
     nav: Mapped[float] = mapped_column(
@@ -155,6 +175,12 @@ class MutualFundScheme(BaseModel):
         Float,
         nullable=True,
     )
+    # fingerprint: SHA-256 of the master data last synced, see
+    # MutualFundSchemeDAO.sync_many.
+    fingerprint: Mapped[str] = mapped_column(
+        String(length=64),
+        nullable=True,
+    )
     # Relationship with AMC
     amc: Mapped["AMC"] = relationship(  # noqa: F821
         "AMC",
@@ -167,8 +193,8 @@ class MutualFundScheme(BaseModel):
         back_populates="mutualfundscheme",
     )
 
-    # Relationship with SchemeNAV
-    scheme_nav: Mapped[List["SchemeNAV"]] = relationship(
-        "SchemeNAV",
+    # Relationship with SchemeNavHistory
+    nav_history: Mapped[List["SchemeNavHistory"]] = relationship(
+        "SchemeNavHistory",
         back_populates="mutualfundscheme",
     )
@@ -0,0 +1,94 @@
+from datetime import date
+from typing import TYPE_CHECKING, Optional
+
+from sqlalchemy import Date, Float, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from myfi_backend.db.models.base_model import Base
+
+if TYPE_CHECKING:
+    from myfi_backend.db.models.mutual_fund_scheme_model import MutualFundScheme
+
+
+class SchemeNavMetrics(Base):
+    """
+    Model for the return and risk metrics of a scheme computed from its NAVs.
+
+    The figures of MutualFundScheme come from the Accord feed and are defined
+    differently, e.g. its cagr is a 1 year return, so the computed ones are kept
+    apart. There is one row per scheme with NAVs, rewritten after every NAV
+    ingest.
+    """
+
+    __tablename__ = "scheme_nav_metrics"
+
+    # scheme_id: The ID of the Mutual Fund Scheme.
+    scheme_id = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("mutual_fund_schemes.id"),
+        primary_key=True,
+    )
+    # nav_date: The date of the latest NAV the metrics were computed up to.
+    nav_date: Mapped[date] = mapped_column(
+        Date,
+        nullable=False,
+    )
+    # return_last_year: The return over the last year in percent.
+    return_last_year: Mapped[Optional[float]] = mapped_column(
+        Float,
+        nullable=True,
+    )
+    # return_last3_years: The return over the last 3 years in percent.
+    return_last3_years: Mapped[Optional[float]] = mapped_column(
+        Float,
+        nullable=True,
+    )
+    # return_last5_years: The return over the last 5 years in percent.
+    return_last5_years: Mapped[Optional[float]] = mapped_column(
+        Float,
+        nullable=True,
+    )
+    # return_since_inception: The return since the first NAV in percent.
+    return_since_inception: Mapped[Optional[float]] = mapped_column(
+        Float,
+        nullable=True,
+    )
+    # cagr: The compounded annual growth rate since the first NAV in percent.
+    cagr: Mapped[Optional[float]] = mapped_column(
+        Float,
+        nullable=True,
+    )
+    # standard_deviation: The annualized volatility over 3 years in percent.
+    standard_deviation: Mapped[Optional[float]] = mapped_column(
+        Float,
+        nullable=True,
+    )
+    # sharpe_ratio: The annualized Sharpe ratio over 3 years.
+    sharpe_ratio: Mapped[Optional[float]] = mapped_column(
+        Float,
+        nullable=True,
+    )
+    # sortino_ratio: The annualized Sortino ratio over 3 years.
+    sortino_ratio: Mapped[Optional[float]] = mapped_column(
+        Float,
+        nullable=True,
+    )
+    # max_drawdown: The largest fall from a peak over 5 years in percent.
+    max_drawdown: Mapped[Optional[float]] = mapped_column(
+        Float,
+        nullable=True,
+    )
+    # alpha: The annualized Jensen's alpha against the benchmark in percent.
+    alpha: Mapped[Optional[float]] = mapped_column(
+        Float,
+        nullable=True,
+    )
+    # beta: The beta against the benchmark.
+    beta: Mapped[Optional[float]] = mapped_column(
+        Float,
+        nullable=True,
+    )
+
+    # Relationship with MutualFundScheme
+    mutualfundscheme: Mapped["MutualFundScheme"] = relationship("MutualFundScheme")
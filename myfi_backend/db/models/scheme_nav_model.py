@@ -1,34 +1,77 @@
+from datetime import date
 from typing import TYPE_CHECKING
 
-from sqlalchemy import ForeignKey
-from sqlalchemy.dialects.postgresql import JSON, UUID
+from sqlalchemy import DDL, Date, Float, ForeignKey, Index, event
+from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from myfi_backend.db.models.base_model import BaseModel
+from myfi_backend.db.models.base_model import Base
 
 if TYPE_CHECKING:
     from myfi_backend.db.models.mutual_fund_scheme_model import MutualFundScheme
 
 
-class SchemeNAV(BaseModel):
-    """Model for Scheme NAV data."""
+# Partitions of scheme_nav_history are named with this prefix and "y<year>", or
+# "default" for the partition of the dates of no year partition.
+NAV_HISTORY_PARTITION_PREFIX = "scheme_nav_history_"
+NAV_HISTORY_DEFAULT_PARTITION = f"{NAV_HISTORY_PARTITION_PREFIX}default"
 
-    __tablename__ = "scheme_nav"
+
+class SchemeNavHistory(Base):
+    """
+    Model for the NAV history of a scheme.
+
+    Every row is a single (scheme, date) data point, so appending the NAV of a new day
+    is an insert of one row instead of a rewrite of the whole history.
+
+    The table is partitioned by year of nav_date, see
+    SchemeNavDAO.create_year_partition. Queries bounded by nav_date only scan the
+    partitions of their years. NAVs are appended roughly in date order, so a BRIN
+    index of nav_date covers date range scans at a tiny fraction of the size of a
+    B-tree.
+    """
+
+    __tablename__ = "scheme_nav_history"
+    __table_args__ = (
+        Index(
+            "ix_scheme_nav_history_nav_date_brin",
+            "nav_date",
+            postgresql_using="brin",
+        ),
+        {"postgresql_partition_by": "RANGE (nav_date)"},
+    )
 
     # scheme_id: The ID of the Mutual Fund Scheme.
     scheme_id = mapped_column(
         UUID(as_uuid=True),
         ForeignKey("mutual_fund_schemes.id"),
-        index=True,
+        primary_key=True,
+    )
+    # nav_date: The date the NAV was published for.
+    nav_date: Mapped[date] = mapped_column(
+        Date,
+        primary_key=True,
+    )
+    # nav: The Net Asset Value of the scheme on nav_date.
+    nav: Mapped[float] = mapped_column(
+        Float,
         nullable=False,
     )
-    # nav_data: The NAV data for the scheme.
-    # format: {date: nav} e.g. {"2021-01-01": 100.0, "2021-01-02": 101.0}
-    nav_data: Mapped[JSON] = mapped_column(JSON)
 
-    # Establish a relationship with the MutualFundScheme model
     # Relationship with MutualFundScheme
     mutualfundscheme: Mapped["MutualFundScheme"] = relationship(
         "MutualFundScheme",
-        back_populates="scheme_nav",
+        back_populates="nav_history",
     )
+
+
+# Without partitions a partitioned table takes no rows, tables created from the
+# models (e.g. by the tests) start with a default partition only.
+event.listen(
+    SchemeNavHistory.__table__,
+    "after_create",
+    DDL(
+        f"CREATE TABLE {NAV_HISTORY_DEFAULT_PARTITION} "
+        "PARTITION OF scheme_nav_history DEFAULT",
+    ),
+)
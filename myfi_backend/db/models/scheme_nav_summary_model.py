@@ -0,0 +1,83 @@
+from datetime import date
+from typing import TYPE_CHECKING, Optional
+
+from sqlalchemy import Date, Float, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from myfi_backend.db.models.base_model import Base
+
+if TYPE_CHECKING:
+    from myfi_backend.db.models.mutual_fund_scheme_model import MutualFundScheme
+
+
+class SchemeNavSummary(Base):
+    """
+    Model for the figures of a scheme derived from its NAV history.
+
+    There is one row per scheme with NAVs, rewritten by SchemeNavDAO whenever NAVs
+    of the scheme are written, so scheme cards read a single narrow row instead of
+    the history.
+    """
+
+    __tablename__ = "scheme_nav_summary"
+
+    # scheme_id: The ID of the Mutual Fund Scheme.
+    scheme_id = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("mutual_fund_schemes.id"),
+        primary_key=True,
+    )
+    # nav_date: The date of the latest NAV.
+    nav_date: Mapped[date] = mapped_column(
+        Date,
+        nullable=False,
+    )
+    # nav: The latest NAV.
+    nav: Mapped[float] = mapped_column(
+        Float,
+        nullable=False,
+    )
+    # previous_nav_date: The date of the NAV before the latest one.
+    previous_nav_date: Mapped[Optional[date]] = mapped_column(
+        Date,
+        nullable=True,
+    )
+    # previous_nav: The NAV before the latest one.
+    previous_nav: Mapped[Optional[float]] = mapped_column(
+        Float,
+        nullable=True,
+    )
+    # day_change: The change from the previous NAV to the latest one in percent.
+    day_change: Mapped[Optional[float]] = mapped_column(
+        Float,
+        nullable=True,
+    )
+    # week52_high: The highest NAV of the 52 weeks up to the latest NAV.
+    week52_high: Mapped[float] = mapped_column(
+        Float,
+        nullable=False,
+    )
+    # week52_low: The lowest NAV of the 52 weeks up to the latest NAV.
+    week52_low: Mapped[float] = mapped_column(
+        Float,
+        nullable=False,
+    )
+    # return_last_year: The return over the last year in percent.
+    return_last_year: Mapped[Optional[float]] = mapped_column(
+        Float,
+        nullable=True,
+    )
+    # return_last3_years: The return over the last 3 years in percent.
+    return_last3_years: Mapped[Optional[float]] = mapped_column(
+        Float,
+        nullable=True,
+    )
+    # return_last5_years: The return over the last 5 years in percent.
+    return_last5_years: Mapped[Optional[float]] = mapped_column(
+        Float,
+        nullable=True,
+    )
+
+    # Relationship with MutualFundScheme
+    mutualfundscheme: Mapped["MutualFundScheme"] = relationship("MutualFundScheme")
@@ -0,0 +1,41 @@
+from typing import TYPE_CHECKING
+
+from sqlalchemy import Float, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from myfi_backend.db.models.base_model import Base
+
+if TYPE_CHECKING:
+    from myfi_backend.db.models.mutual_fund_scheme_model import MutualFundScheme
+
+
+class UserHolding(Base):
+    """
+    Model for the units of a scheme held by a user.
+
+    Users are kept in Redis, so user_id isn't a foreign key. A user has at most one
+    row per scheme.
+    """
+
+    __tablename__ = "user_holdings"
+
+    # user_id: The ID of the user holding the units.
+    user_id = mapped_column(
+        UUID(as_uuid=True),
+        primary_key=True,
+    )
+    # mutualfundscheme_id: The ID of the Mutual Fund Scheme held.
+    mutualfundscheme_id = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("mutual_fund_schemes.id"),
+        primary_key=True,
+    )
+    # units: The number of units held.
+    units: Mapped[float] = mapped_column(
+        Float,
+        nullable=False,
+    )
+
+    # Relationship with MutualFundScheme
+    mutualfundscheme: Mapped["MutualFundScheme"] = relationship("MutualFundScheme")
@@ -1,6 +1,64 @@
-from typing import Any, Dict
+import asyncio
+import datetime
+import logging
+import time
+from typing import (  # noqa: WPS235
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Mapping,
+    NamedTuple,
+    Optional,
+    TypeVar,
+)
 
+from prometheus_client import Histogram
+
+from myfi_backend.services.api.feed_cache import FeedCache, FeedEntry
 from myfi_backend.services.api.http_client import HttpClient
+from myfi_backend.settings import settings
+
+FileData = TypeVar("FileData")
+
+# Format of the date parameter of the Accord API, e.g. "30092022".
+ACCORD_DATE_FORMAT = "%d%m%Y"  # noqa: WPS323
+
+# {key: {column: value}} rows of an Accord file, see AccordFile.
+AccordLookup = Dict[Any, Dict[str, Any]]
+
+ACCORD_FILE_FETCH_SECONDS = Histogram(
+    "accord_file_fetch_seconds",
+    "Time taken to fetch an Accord data file, by file, section and source.",
+    ["file", "section", "source"],
+    buckets=(0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600),
+)
+
+
+def accord_date(day: Optional[datetime.date] = None) -> str:
+    """
+    Format a day as the date parameter of the Accord API.
+
+    :param day: The day, today if not given.
+    :return: The day in the DDMMYYYY format.
+    """
+    return (day or datetime.date.today()).strftime(ACCORD_DATE_FORMAT)
+
+
+class AccordFile(NamedTuple):
+    """
+    A raw data file of the Accord API and the part of it that is kept.
+
+    Rows are keyed by their key column and only the given columns are kept,
+    renamed from the name in the file to the name they are used with.
+    """
+
+    filename: str
+    section: str
+    key: str
+    columns: Mapping[str, str]
 
 
 class AmcClient(HttpClient):
@@ -32,3 +90,273 @@ class AmcClient(HttpClient):
             "token": token,
         }
         return await self.fetch_data("GetRawDataJSON", params)
+
+    def stream_amc_data(  # noqa: WPS211
+        self,
+        filename: str,
+        date: str,
+        section: str,
+        sub: str,
+        token: str,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream the Table rows of AMC data from the API.
+
+        :param filename: Filename parameter for the API request.
+        :param date: Date parameter for the API request.
+        :param section: Section parameter for the API request.
+        :param sub: Sub parameter for the API request.
+        :param token: Token parameter for the API request.
+        :return: The rows of the Table of the response, parsed as they arrive.
+        """
+        params = {
+            "filename": filename,
+            "date": date,
+            "section": section,
+            "sub": sub,
+            "token": token,
+        }
+        return self.stream_rows("GetRawDataJSON", params, "Table")
+
+    async def fetch_amc_files(  # noqa: WPS211
+        self,
+        files: Iterable[AccordFile],
+        date: str,
+        token: str,
+        concurrency: int,
+        timeout: float,
+        cache: Optional[FeedCache] = None,
+    ) -> Dict[str, AccordLookup]:
+        """
+        Fetch several AMC data files concurrently.
+
+        At most concurrency files are downloaded at the same time, so fetching
+        all files takes about as long as the slowest ones instead of the sum of
+        all of them. Files are streamed and only the columns of AccordFile are
+        kept, the full documents are never held in memory.
+
+        With a cache, files are read from the cache and only downloaded into it
+        when they aren't cached yet.
+
+        :param files: The files to fetch.
+        :param date: Date parameter for the API requests.
+        :param token: Token parameter for the API requests.
+        :param concurrency: The maximum number of files downloaded at once.
+        :param timeout: Seconds after which the download of a file is given up.
+        :param cache: The cache of raw responses to use.
+        :return: The rows of every file by filename.
+        """
+        return await self._gather_files(
+            files,
+            lambda accord_file: self._read_amc_file(accord_file, date, token, cache),
+            concurrency,
+            timeout,
+        )
+
+    async def cache_amc_files(  # noqa: WPS211
+        self,
+        files: Iterable[AccordFile],
+        date: str,
+        token: str,
+        concurrency: int,
+        timeout: float,
+        cache: FeedCache,
+    ) -> Dict[str, FeedEntry]:
+        """
+        Download several AMC data files into a cache concurrently.
+
+        Files which are already cached for the date aren't downloaded again,
+        so a re-run after a crash only downloads the files it didn't get to.
+        Files of today are downloaded again once their cached response expired.
+
+        :param files: The files to download.
+        :param date: Date parameter for the API requests.
+        :param token: Token parameter for the API requests.
+        :param concurrency: The maximum number of files downloaded at once.
+        :param timeout: Seconds after which the download of a file is given up.
+        :param cache: The cache of raw responses to download into.
+        :return: The cached responses by filename.
+        """
+        return await self._gather_files(
+            files,
+            lambda accord_file: self._cache_amc_file(accord_file, date, token, cache),
+            concurrency,
+            timeout,
+        )
+
+    async def _gather_files(  # noqa: WPS210
+        self,
+        files: Iterable[AccordFile],
+        read_file: Callable[[AccordFile], Awaitable[FileData]],
+        concurrency: int,
+        timeout: float,
+    ) -> Dict[str, FileData]:
+        """
+        Read several AMC data files concurrently.
+
+        :param files: The files to read.
+        :param read_file: Reads a single file.
+        :param concurrency: The maximum number of files read at once.
+        :param timeout: Seconds after which reading a file is given up.
+        :return: The result of read_file for every file by filename.
+        """
+        files = list(files)
+        semaphore = asyncio.Semaphore(concurrency)
+        started_at = time.perf_counter()
+        files_data = await asyncio.gather(
+            *(
+                self._time_file(
+                    accord_file,
+                    read_file(accord_file),
+                    semaphore,
+                    timeout,
+                )
+                for accord_file in files
+            ),
+        )
+        elapsed = time.perf_counter() - started_at
+        logging.info(f"Fetched all files in {elapsed:.3f}s")
+        return {
+            accord_file.filename: file_data
+            for accord_file, file_data in zip(files, files_data)
+        }
+
+    async def _time_file(
+        self,
+        accord_file: AccordFile,
+        read_file: Awaitable[FileData],
+        semaphore: asyncio.Semaphore,
+        timeout: float,
+    ) -> FileData:
+        """
+        Read a single AMC data file and log the time it took.
+
+        :param accord_file: The file.
+        :param read_file: Reads the file.
+        :param semaphore: Semaphore limiting the concurrent downloads.
+        :param timeout: Seconds after which reading the file is given up.
+        :return: The result of read_file.
+        :raises asyncio.TimeoutError: if the file isn't read within the timeout.
+        """
+        async with semaphore:
+            started_at = time.perf_counter()
+            try:
+                file_data = await asyncio.wait_for(read_file, timeout)
+            except asyncio.TimeoutError:
+                logging.error(
+                    f"Fetching {accord_file.filename} timed out after {timeout}s",
+                )
+                raise
+        elapsed = time.perf_counter() - started_at
+        logging.info(f"Fetched {accord_file.filename} in {elapsed:.3f}s")
+        return file_data
+
+    async def _cache_amc_file(
+        self,
+        accord_file: AccordFile,
+        date: str,
+        token: str,
+        cache: FeedCache,
+    ) -> FeedEntry:
+        """
+        Get an AMC data file from the cache, downloading it if it isn't cached.
+
+        A file of today is downloaded again once its cached response is older
+        than the accord_cache_ttl setting, as the feed may still change.
+
+        :param accord_file: The file to get.
+        :param date: Date parameter for the API request.
+        :param token: Token parameter for the API request.
+        :param cache: The cache of raw responses.
+        :return: The cached response.
+        """
+        entry = cache.get(accord_file.filename, accord_file.section, date)
+        if entry is not None and not self._is_expired(entry):
+            return entry
+        params = {
+            "filename": accord_file.filename,
+            "date": date,
+            "section": accord_file.section,
+            "sub": "",
+            "token": token,
+        }
+        started_at = time.perf_counter()
+        entry = await self.download(
+            "GetRawDataJSON",
+            params,
+            lambda chunks: cache.store(
+                accord_file.filename,
+                accord_file.section,
+                date,
+                chunks,
+                "Table",
+            ),
+        )
+        _observe_fetch(accord_file, "network", started_at)
+        return entry
+
+    def _is_expired(self, entry: FeedEntry) -> bool:
+        """
+        Check whether a cached response of today is due to be downloaded again.
+
+        :param entry: The cached response.
+        :return: True if the response is of today and older than the TTL.
+        """
+        expires_at = entry.fetched_at + datetime.timedelta(
+            seconds=settings.accord_cache_ttl,
+        )
+        return entry.date == accord_date() and expires_at <= datetime.datetime.now(
+            datetime.timezone.utc,
+        )
+
+    async def _read_amc_file(  # noqa: WPS210
+        self,
+        accord_file: AccordFile,
+        date: str,
+        token: str,
+        cache: Optional[FeedCache],
+    ) -> AccordLookup:
+        """
+        Collect the kept columns of an AMC data file while it is streamed.
+
+        The time it took is observed in ACCORD_FILE_FETCH_SECONDS, with the
+        source "network" when the file is streamed from the API and "cache" when
+        it is read from the cache. Downloads into the cache are observed as
+        "network" on their own.
+
+        :param accord_file: The file to read.
+        :param date: Date parameter for the API request.
+        :param token: Token parameter for the API request.
+        :param cache: The cache of raw responses to read the file from.
+        :return: The rows of the file.
+        """
+        if cache is None:
+            source = "network"
+            rows = self.stream_amc_data(
+                filename=accord_file.filename,
+                date=date,
+                section=accord_file.section,
+                sub="",
+                token=token,
+            )
+        else:
+            source = "cache"
+            entry = await self._cache_amc_file(accord_file, date, token, cache)
+            rows = cache.stream_rows(entry, "Table")
+        started_at = time.perf_counter()
+        lookup = {
+            row[accord_file.key]: {
+                column: row[name] for column, name in accord_file.columns.items()
+            }
+            async for row in rows
+        }
+        _observe_fetch(accord_file, source, started_at)
+        return lookup
+
+
+def _observe_fetch(accord_file: AccordFile, source: str, started_at: float) -> None:
+    ACCORD_FILE_FETCH_SECONDS.labels(
+        file=accord_file.filename,
+        section=accord_file.section,
+        source=source,
+    ).observe(time.perf_counter() - started_at)
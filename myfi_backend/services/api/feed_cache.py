@@ -0,0 +1,239 @@
+import codecs
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, AsyncIterable, AsyncIterator, Dict, NamedTuple, Optional, Set
+from uuid import uuid4
+
+import aiofiles
+
+from myfi_backend.services.api.json_stream import JsonArrayParser, iter_json_array
+
+# Bytes read at once when a cached body is parsed.
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class FeedEntry(NamedTuple):
+    """A feed response stored in the FeedCache."""
+
+    filename: str
+    section: str
+    date: str
+    sha256: str
+    size: int
+    fetched_at: datetime
+    path: Path
+
+
+class FeedCache:
+    """
+    Content addressed on-disk cache of raw feed responses.
+
+    Bodies are stored once per SHA-256 of their content in blobs/. The index/
+    directory maps every (filename, section, date) to the hash of its body and
+    the time it was fetched, and imports/ remembers the hash of the body last
+    imported for every (filename, section). Files are replaced atomically, so a
+    crash never leaves a partial entry behind, only complete JSON responses are
+    stored, and responses fetched before a given time are removed with evict.
+
+    :param directory: The directory the cache is kept in.
+    :type directory: Path
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+
+    def get(self, filename: str, section: str, date: str) -> Optional[FeedEntry]:
+        """
+        Get the cached response of a feed.
+
+        :param filename: The filename of the feed.
+        :param section: The section of the feed.
+        :param date: The date of the feed.
+        :return: The cached response if there is one, else None.
+        """
+        metadata = self._read_json(self._index_path(filename, section, date))
+        if metadata is None:
+            return None
+        return FeedEntry(
+            filename=filename,
+            section=section,
+            date=date,
+            sha256=metadata["sha256"],
+            size=metadata["size"],
+            fetched_at=datetime.fromisoformat(metadata["fetched_at"]),
+            path=self._blob_path(metadata["sha256"]),
+        )
+
+    async def store(  # noqa: WPS210, WPS211
+        self,
+        filename: str,
+        section: str,
+        date: str,
+        chunks: AsyncIterable[bytes],
+        key: str,
+    ) -> FeedEntry:
+        """
+        Store the response of a feed while it is downloaded.
+
+        The body is parsed while it is written, an empty or truncated body
+        isn't stored, so the feed is downloaded again the next time.
+
+        :param filename: The filename of the feed.
+        :param section: The section of the feed.
+        :param date: The date of the feed.
+        :param chunks: The pieces of the body of the response.
+        :param key: The key of the array of rows in the top level JSON object.
+        :return: The stored response.
+        """
+        digest = hashlib.sha256()
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        parser = JsonArrayParser(key)
+        size = 0
+        partial_path = self._partial_path()
+        try:  # noqa: WPS501
+            async with aiofiles.open(partial_path, "wb") as partial_file:
+                async for chunk in chunks:
+                    digest.update(chunk)
+                    parser.feed(decoder.decode(chunk))
+                    size += len(chunk)
+                    await partial_file.write(chunk)
+            parser.feed(decoder.decode(b"", final=True))
+            parser.close()
+            sha256 = digest.hexdigest()
+            os.replace(partial_path, self._blob_path(sha256))
+        finally:
+            # Only left behind if the download failed or was cancelled.
+            partial_path.unlink(missing_ok=True)
+
+        entry = FeedEntry(
+            filename=filename,
+            section=section,
+            date=date,
+            sha256=sha256,
+            size=size,
+            fetched_at=datetime.now(timezone.utc),
+            path=self._blob_path(sha256),
+        )
+        self._write_json(
+            self._index_path(filename, section, date),
+            {
+                "sha256": entry.sha256,
+                "size": entry.size,
+                "fetched_at": entry.fetched_at.isoformat(),
+            },
+        )
+        return entry
+
+    async def stream_rows(
+        self,
+        entry: FeedEntry,
+        key: str,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream the rows of an array in a cached JSON response.
+
+        :param entry: The cached response.
+        :param key: The key of the array in the top level JSON object.
+        :yields: The rows of the array.
+        """
+        async for row in iter_json_array(self._read_text(entry.path), key):
+            yield row
+
+    def is_imported(self, entry: FeedEntry) -> bool:
+        """
+        Check whether the last import of a feed was of the same content.
+
+        :param entry: The cached response.
+        :return: True if the last imported response had the same hash.
+        """
+        imported = self._read_json(self._import_path(entry.filename, entry.section))
+        return imported is not None and imported["sha256"] == entry.sha256
+
+    def mark_imported(self, entry: FeedEntry) -> None:
+        """
+        Remember a response as the last successfully imported one of its feed.
+
+        :param entry: The imported response.
+        """
+        self._write_json(
+            self._import_path(entry.filename, entry.section),
+            {
+                "sha256": entry.sha256,
+                "date": entry.date,
+                "imported_at": datetime.now(timezone.utc).isoformat(),
+            },
+        )
+
+    def evict(self, fetched_before: datetime) -> int:
+        """
+        Remove the responses fetched before a time.
+
+        Index entries fetched before the time are removed, then every blob no
+        longer referenced by an index entry or by the last import of a feed.
+
+        :param fetched_before: Entries fetched before this time are removed.
+        :return: The number of removed blobs.
+        """
+        for index_path in self.directory.glob("index/*/*/*.json"):
+            metadata = self._read_json(index_path)
+            if metadata is None:
+                continue
+            if datetime.fromisoformat(metadata["fetched_at"]) < fetched_before:
+                index_path.unlink(missing_ok=True)
+        kept = self._referenced_blobs()
+        removed = 0
+        for blob_path in self.directory.glob("blobs/*.json"):
+            if blob_path.stem not in kept:
+                blob_path.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+    def _referenced_blobs(self) -> Set[str]:
+        referenced = set()
+        for metadata_path in (
+            *self.directory.glob("index/*/*/*.json"),
+            *self.directory.glob("imports/*/*.json"),
+        ):
+            metadata = self._read_json(metadata_path)
+            if metadata is not None:
+                referenced.add(metadata["sha256"])
+        return referenced
+
+    async def _read_text(self, path: Path) -> AsyncIterator[str]:
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        async with aiofiles.open(path, "rb") as cached_file:
+            while True:
+                chunk = await cached_file.read(READ_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield decoder.decode(chunk)
+        yield decoder.decode(b"", final=True)
+
+    def _blob_path(self, sha256: str) -> Path:
+        return self.directory / "blobs" / f"{sha256}.json"
+
+    def _index_path(self, filename: str, section: str, date: str) -> Path:
+        return self.directory / "index" / section / filename / f"{date}.json"
+
+    def _import_path(self, filename: str, section: str) -> Path:
+        return self.directory / "imports" / section / f"{filename}.json"
+
+    def _partial_path(self) -> Path:
+        path = self.directory / "blobs" / f"{uuid4().hex}.partial"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def _read_json(self, path: Path) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads(path.read_text())
+        except FileNotFoundError:
+            return None
+
+    def _write_json(self, path: Path, content: Dict[str, Any]) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial_path = path.with_suffix(".partial")
+        partial_path.write_text(json.dumps(content))
+        os.replace(partial_path, path)
@@ -1,18 +1,100 @@
-from typing import Any, Dict
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, TypeVar
 
 import httpx
 
+from myfi_backend.services.api.json_stream import iter_json_array
+from myfi_backend.settings import settings
+
+Downloaded = TypeVar("Downloaded")
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """
+    Create a pooled HTTP client configured from the settings.
+
+    Connections are kept alive and reused between requests, so only the first
+    request to a host pays for the TCP and TLS handshakes. HTTP/2 needs the
+    h2 package, installed with httpx[http2].
+
+    :return: A new HTTP client.
+    """
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry,
+        ),
+        timeout=settings.http_timeout,
+        http2=settings.http_http2,
+    )
+
+
+class HttpClientPool:
+    """
+    Holder of the HTTP client shared by all API clients of the process.
+
+    The client is created on first use and again after it was closed.
+    Connections are bound to the event loop they were opened on, so the client
+    must only be used from one event loop.
+    """
+
+    def __init__(self) -> None:
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def get(self) -> httpx.AsyncClient:
+        """
+        Get the shared HTTP client.
+
+        :return: The shared HTTP client.
+        """
+        if self._client is None or self._client.is_closed:
+            self._client = create_http_client()
+        return self._client
+
+    async def close(self) -> None:
+        """Close the shared HTTP client and its connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+http_client_pool = HttpClientPool()
+
 
 class HttpClient:
     """
     Generic HTTP client to handle requests to APIs.
 
+    Requests go through a pooled httpx client, the one shared by the process
+    unless a client is given. Server errors and timeouts are retried with
+    exponential backoff.
+
     :param base_url: The base URL for the API.
     :type base_url: str
+    :param client: The httpx client to send requests with.
+    :type client: Optional[httpx.AsyncClient]
     """
 
-    def __init__(self, base_url: str):
+    def __init__(
+        self,
+        base_url: str,
+        client: Optional[httpx.AsyncClient] = None,
+    ):
         self.base_url = base_url
+        self._client = client
+        self.max_retries = settings.http_max_retries
+        self.retry_backoff = settings.http_retry_backoff
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """
+        The httpx client requests are sent with.
+
+        :return: The given client, else the one shared by the process.
+        """
+        return self._client or http_client_pool.get()
 
     async def fetch_data(self, endpoint: str, params: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -22,8 +104,108 @@ class HttpClient:
         :param params: Query parameters to include in the request.
         :return: Parsed JSON response from the API.
         """
-        async with httpx.AsyncClient() as client:
-            url = f"{self.base_url}/{endpoint}"
-            response = await client.get(url, params=params)
-            response.raise_for_status()  # Raise an exception for HTTP errors
-            return response.json()  # Parse the JSON response and return it
+        url = f"{self.base_url}/{endpoint}"
+        # max_retries is the total number of requests, the last one is made below
+        for attempt in range(self.max_retries - 1):
+            try:
+                response = await self.client.get(url, params=params)
+            except httpx.TimeoutException:
+                logging.warning(f"Request to {url} timed out, retrying")
+            else:
+                if response.status_code < 500:
+                    break
+                logging.warning(
+                    f"Request to {url} failed with {response.status_code}, retrying",
+                )
+            await asyncio.sleep(self.retry_backoff * 2**attempt)
+        else:
+            # Last attempt, its errors are raised
+            response = await self.client.get(url, params=params)
+        response.raise_for_status()  # Raise an exception for HTTP errors
+        return response.json()  # Parse the JSON response and return it
+
+    async def stream_rows(
+        self,
+        endpoint: str,
+        params: Dict[str, Any],
+        key: str,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream the rows of an array in the JSON response of the API.
+
+        Rows are parsed and yielded while the body is downloaded, so the whole
+        document is never held in memory. Streamed requests aren't retried as
+        rows may already have been consumed.
+
+        :param endpoint: API endpoint to fetch data from.
+        :param params: Query parameters to include in the request.
+        :param key: The key of the array in the top level JSON object.
+        :yields: The rows of the array.
+        """
+        url = f"{self.base_url}/{endpoint}"
+        async with self.client.stream("GET", url, params=params) as response:
+            response.raise_for_status()
+            async for row in iter_json_array(response.aiter_text(), key):
+                yield row
+
+    async def stream_bytes(
+        self,
+        endpoint: str,
+        params: Dict[str, Any],
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream the raw body of the response of the API.
+
+        :param endpoint: API endpoint to fetch data from.
+        :param params: Query parameters to include in the request.
+        :yields: The pieces of the body as they are downloaded.
+        """
+        url = f"{self.base_url}/{endpoint}"
+        async with self.client.stream("GET", url, params=params) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes():
+                yield chunk
+
+    async def download(
+        self,
+        endpoint: str,
+        params: Dict[str, Any],
+        consume: Callable[[AsyncIterator[bytes]], Awaitable[Downloaded]],
+    ) -> Downloaded:
+        """
+        Download the raw body of the response of the API, retrying failures.
+
+        Server errors and timeouts are retried with the backoff of fetch_data.
+        Every attempt streams the body into consume again from the start, so
+        consume must discard what it got from a failed attempt.
+
+        :param endpoint: API endpoint to fetch data from.
+        :param params: Query parameters to include in the request.
+        :param consume: Consumes the pieces of the body.
+        :return: The result of consume.
+        :raises httpx.HTTPStatusError: if the API answered with a client error.
+        """
+        url = f"{self.base_url}/{endpoint}"
+        # max_retries is the total number of requests, the last one is made below
+        for attempt in range(self.max_retries - 1):
+            try:
+                return await consume(self.stream_bytes(endpoint, params))
+            except httpx.TimeoutException:
+                logging.warning(f"Download from {url} timed out, retrying")
+            except httpx.HTTPStatusError as error:
+                status_code = error.response.status_code
+                if status_code < 500:
+                    raise
+                logging.warning(
+                    f"Download from {url} failed with {status_code}, retrying",
+                )
+            await asyncio.sleep(self.retry_backoff * 2**attempt)
+        # Last attempt, its errors are raised
+        return await consume(self.stream_bytes(endpoint, params))
+
+    async def close(self) -> None:
+        """Close the underlying HTTP client and its connections."""
+        if self._client is None:
+            await http_client_pool.close()
+        else:
+            await self._client.aclose()
@@ -0,0 +1,85 @@
+import json
+import re
+from typing import Any, AsyncIterable, AsyncIterator, List
+
+# Whitespace and commas between the elements of an array.
+_SEPARATORS = frozenset(" \t\r\n,")
+
+
+class JsonArrayParser:
+    """
+    Incremental parser for the elements of an array in a JSON document.
+
+    Text is fed as it arrives and every complete element of the array stored
+    under key is returned as soon as its closing bracket was read, so only one
+    element at a time is held as text. Everything after the array is ignored.
+
+    :param key: The key of the array in the top level object.
+    :type key: str
+    """
+
+    def __init__(self, key: str):
+        quoted_key = re.escape(json.dumps(key))
+        self._array_start = re.compile(rf"{quoted_key}\s*:\s*\[")
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._in_array = False
+        self._done = False
+
+    def feed(self, text: str) -> List[Any]:
+        """
+        Parse the next piece of the document.
+
+        :param text: The next piece of the document.
+        :return: The elements completed by this piece.
+        """
+        if self._done:
+            return []
+        self._buffer += text
+        if not self._in_array:
+            match = self._array_start.search(self._buffer)
+            if match is None:
+                return []
+            self._buffer = self._buffer[match.end() :]
+            self._in_array = True
+
+        elements = []
+        position = 0
+        while True:
+            while self._buffer[position : position + 1] in _SEPARATORS:
+                position += 1
+            if self._buffer.startswith("]", position):
+                self._done = True
+                break
+            try:
+                element, position = self._decoder.raw_decode(self._buffer, position)
+            except json.JSONDecodeError:
+                # The element is incomplete, wait for the rest of it.
+                break
+            elements.append(element)
+        self._buffer = "" if self._done else self._buffer[position:]
+        return elements
+
+    def close(self) -> None:
+        """
+        Check that the whole array was read.
+
+        :raises ValueError: if the document ended before the end of the array.
+        """
+        if not self._done:
+            raise ValueError("JSON document ended before the end of the array")
+
+
+async def iter_json_array(texts: AsyncIterable[str], key: str) -> AsyncIterator[Any]:
+    """
+    Yield the elements of an array in a JSON document read in pieces.
+
+    :param texts: The pieces of the document.
+    :param key: The key of the array in the top level object.
+    :yields: The elements of the array, as soon as they are complete.
+    """
+    parser = JsonArrayParser(key)
+    async for text in texts:
+        for element in parser.feed(text):
+            yield element
+    parser.close()
@@ -1,34 +1,193 @@
-from datetime import datetime, timedelta
-from random import choice
-from typing import List
+import hashlib
+import json
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
 from uuid import UUID
 
+import numpy as np
+from redis.asyncio import Redis
+
+from myfi_backend.db.dao.scheme_nav_dao import SchemeNavDAO
+from myfi_backend.db.dao.user_holding_dao import UserHoldingDAO
+from myfi_backend.services.scheme.metrics import FloatArray, build_nav_matrix, navs_on
+from myfi_backend.services.scheme.nav_cache import get_nav_version
+from myfi_backend.utils.redis import (
+    REDIS_HASH_INVESTMENT_VALUE,
+    REDIS_INVESTMENT_VALUE_EXPIRY_TIME,
+    get_from_redis,
+    set_to_redis,
+)
 from myfi_backend.web.api.investment.schema import InvestmentValueDTO
 
+# Days of investment values returned for a user.
+INVESTMENT_VALUE_DAYS = 90
+
+
+def holdings_fingerprint(holdings: Mapping[UUID, float]) -> str:
+    """
+    Compute a hash of the holdings of a user.
+
+    :param holdings: The units held as {scheme_id: units}.
+    :return: Hex digest that changes whenever the holdings change.
+    """
+    content = json.dumps(sorted((str(key), units) for key, units in holdings.items()))
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def compute_daily_values(
+    holdings: Mapping[UUID, float],
+    nav_rows: Sequence[Tuple[UUID, date, float]],
+    days: List[date],
+) -> FloatArray:
+    """
+    Compute the value of holdings on every day.
+
+    NAVs of all schemes are aligned on the days at once, a day without NAV like a
+    holiday takes the last NAV before it. Schemes without NAV yet are worth 0.
+
+    :param holdings: The units held as {scheme_id: units}.
+    :param nav_rows: (scheme_id, nav_date, nav) rows of the held schemes.
+    :param days: The days to compute the value on, in ascending order.
+    :return: The value of the holdings on every day.
+    """
+    matrix = build_nav_matrix(nav_rows)
+    if not matrix.scheme_ids:
+        return np.zeros(len(days))
+    navs = navs_on(matrix, np.array(days, dtype="datetime64[D]"))
+    units = np.array([holdings[scheme_id] for scheme_id in matrix.scheme_ids])
+    return np.nansum(navs * units, axis=1)
+
+
+def last_complete_day(
+    holdings: Mapping[UUID, float],
+    nav_rows: Sequence[Tuple[UUID, date, float]],
+) -> Optional[date]:
+    """
+    Get the last day every held scheme has published its NAV for.
+
+    Values up to this day are final, later ones change when the missing NAVs arrive.
+
+    :param holdings: The units held as {scheme_id: units}.
+    :param nav_rows: (scheme_id, nav_date, nav) rows of the held schemes.
+    :return: The day, None if a held scheme has no NAV.
+    """
+    last_nav_days: Dict[UUID, date] = {}
+    for scheme_id, nav_date, _ in nav_rows:
+        last_nav_days[scheme_id] = max(nav_date, last_nav_days.get(scheme_id, nav_date))
+    if last_nav_days.keys() < holdings.keys():
+        return None
+    return min(last_nav_days.values(), default=None)
+
 
-def get_investment_values(user_id: UUID) -> List[InvestmentValueDTO]:
+async def get_investment_values(  # noqa: WPS210
+    user_id: UUID,
+    holding_dao: UserHoldingDAO,
+    schemenav_dao: SchemeNavDAO,
+    redis: Redis,
+    today: Optional[date] = None,
+) -> List[InvestmentValueDTO]:
     """
-    Generates random investment values for a user over the last 3 months.
+    Get the daily value of the investments of a user over the last 3 months.
+
+    Final values are cached in Redis along with a fingerprint of the holdings, so
+    a request only computes the days after the last cached one. The cache is
+    keyed by the version of the NAV history and dropped when the holdings change,
+    so values are computed again once NAVs were ingested.
 
     :param user_id: The UUID of the user.
+    :param holding_dao: DAO for user holdings.
+    :param schemenav_dao: DAO for scheme NAV history.
+    :param redis: Redis client.
+    :param today: The last day to get the value of, defaults to today.
     :return: A list of InvestmentValueDTO instances representing the user's investment \
-    values over the last 3 months.
-
+    values over the last 3 months, latest first.
     """
-    # Start with a value of 100
-    value = 100.0
+    today = today or date.today()
+    first_day = today - timedelta(days=INVESTMENT_VALUE_DAYS - 1)
+    holdings = await holding_dao.get_units_by_user_id(user_id)
+    fingerprint = holdings_fingerprint(holdings)
+    nav_version = await get_nav_version(redis)
+    cache_key = f"{user_id}:{nav_version}"
+    values = {
+        day: value
+        for day, value in (await _get_cached_values(redis, cache_key, fingerprint))
+        if day >= first_day
+    }
+
+    cached_days = len(values)
+    start = max(values, default=first_day - timedelta(days=1)) + timedelta(days=1)
+    days = [start + timedelta(days=index) for index in range((today - start).days + 1)]
+    if days:
+        nav_rows: Sequence[Tuple[UUID, date, float]] = []
+        if holdings:
+            nav_rows = await _get_navs_from(schemenav_dao, list(holdings), start)
+        values.update(zip(days, compute_daily_values(holdings, nav_rows, days)))
+        complete_day = last_complete_day(holdings, nav_rows) if holdings else today
+        final_values = {
+            day: value
+            for day, value in values.items()
+            if complete_day is not None and day <= complete_day
+        }
+        if len(final_values) > cached_days:
+            await _set_cached_values(redis, cache_key, fingerprint, final_values)
+
+    return [
+        InvestmentValueDTO(value=value, date=datetime.combine(day, time()))
+        for day, value in sorted(values.items(), reverse=True)
+    ]
+
 
-    # Generate investment values for the last 3 months
-    investment_value_dtos = []
-    for index in range(90):
-        date = datetime.now() - timedelta(days=index)
+async def _get_navs_from(
+    schemenav_dao: SchemeNavDAO,
+    scheme_ids: List[UUID],
+    start: date,
+) -> List[Tuple[UUID, date, float]]:
+    # the last NAV on or before start is forward filled over the first days
+    last_navs = await schemenav_dao.get_last_navs(start, scheme_ids=scheme_ids)
+    nav_rows = [
+        (scheme_id, nav_date, nav) for scheme_id, (nav_date, nav) in last_navs.items()
+    ]
+    nav_rows.extend(
+        await schemenav_dao.get_all_navs(
+            from_date=start + timedelta(days=1),
+            scheme_ids=scheme_ids,
+        ),
+    )
+    return nav_rows
 
-        # Increase or decrease the value by 5
-        value += choice([-5, 5])  # noqa: S311
 
-        # Ensure the value stays between 100 and 1000
-        value = max(100, min(value, 1000))
+async def _get_cached_values(
+    redis: Redis,
+    cache_key: str,
+    fingerprint: str,
+) -> List[Tuple[date, float]]:
+    cached = await get_from_redis(
+        redis=redis,
+        key=cache_key,
+        hash_key=REDIS_HASH_INVESTMENT_VALUE,
+    )
+    if cached is None:
+        return []
+    content = json.loads(cached)
+    if content["holdings"] != fingerprint:
+        return []
+    return [(date.fromisoformat(day), value) for day, value in content["values"]]
 
-        investment_value_dtos.append(InvestmentValueDTO(value=value, date=date))
 
-    return investment_value_dtos
+async def _set_cached_values(
+    redis: Redis,
+    cache_key: str,
+    fingerprint: str,
+    values: Mapping[date, float],
+) -> None:
+    content = {
+        "holdings": fingerprint,
+        "values": [(day.isoformat(), float(value)) for day, value in values.items()],
+    }
+    await set_to_redis(
+        redis=redis,
+        key=cache_key,
+        value=json.dumps(content),
+        hash_key=REDIS_HASH_INVESTMENT_VALUE,
+        expire=REDIS_INVESTMENT_VALUE_EXPIRY_TIME,
+    )
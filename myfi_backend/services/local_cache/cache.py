@@ -0,0 +1,182 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+from redis.asyncio import Redis, RedisError
+
+# Redis channel invalidations are published on.
+LOCAL_CACHE_CHANNEL = "LOCAL_CACHE_INVALIDATION"
+# Seconds to wait before subscribing again after the connection was lost.
+RESUBSCRIBE_DELAY = 1
+
+CachedValue = TypeVar("CachedValue")
+
+_MISSING = object()
+
+
+def cache_key(namespace: str, *parts: Any) -> str:
+    """
+    Build a local cache key.
+
+    :param namespace: The namespace the key is invalidated with.
+    :param parts: The values identifying the entry in the namespace.
+    :return: The key.
+    """
+    return ":".join([namespace, *map(str, parts)])
+
+
+class LocalCache:
+    """
+    Bounded in-process LRU cache with a time to live.
+
+    Concurrent misses of the same key share a single load (single-flight), so an
+    expired hot key is loaded once per worker instead of once per request. Keys
+    are namespaced like "<namespace>:<rest>" and can be invalidated by prefix.
+
+    :param max_size: The maximum number of entries, least recently used are
+        dropped first.
+    :type max_size: int
+    :param ttl: Seconds an entry is served for.
+    :type ttl: float
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._loads: Dict[str, "asyncio.Task[Any]"] = {}
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        Get an entry that hasn't expired.
+
+        :param key: The key of the entry.
+        :param default: Returned when the entry is missing or expired.
+        :return: The cached value.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        expires_at, cached_value = entry
+        if expires_at <= time.monotonic():
+            self._entries.pop(key, None)
+            return default
+        self._entries.move_to_end(key)
+        return cached_value
+
+    def set(self, key: str, cached_value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store an entry, dropping the least recently used one when full.
+
+        :param key: The key of the entry.
+        :param cached_value: The value to cache.
+        :param ttl: Seconds the entry is served for, defaults to the cache TTL.
+        """
+        if ttl is None:
+            ttl = self.ttl
+        self._entries[key] = (time.monotonic() + ttl, cached_value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def get_or_load(
+        self,
+        key: str,
+        load: Callable[[], Awaitable[CachedValue]],
+        ttl: Optional[float] = None,
+    ) -> CachedValue:
+        """
+        Get an entry, loading and caching it on a miss.
+
+        :param key: The key of the entry.
+        :param load: Coroutine function loading the value on a miss.
+        :param ttl: Seconds the entry is served for, defaults to the cache TTL.
+        :return: The cached or loaded value.
+        """
+        cached_value = self.get(key, _MISSING)
+        if cached_value is not _MISSING:
+            return cached_value
+        task = self._loads.get(key)
+        if task is None:
+            task = asyncio.ensure_future(load())
+            self._loads[key] = task
+            task.add_done_callback(
+                lambda done: self._finish_load(key, done, ttl),
+            )
+        # A cancelled request must not cancel the load the others wait for.
+        return await asyncio.shield(task)
+
+    def discard(self, prefix: str) -> int:
+        """
+        Drop the entries whose key starts with prefix, in this process only.
+
+        :param prefix: The key prefix, e.g. a namespace.
+        :return: The number of entries dropped.
+        """
+        stale_keys = [key for key in self._entries if key.startswith(prefix)]
+        for stale_key in stale_keys:
+            self._entries.pop(stale_key)
+        # Loads already running may return stale data, don't cache them.
+        stale_loads = [key for key in self._loads if key.startswith(prefix)]
+        for stale_load in stale_loads:
+            self._loads.pop(stale_load)
+        return len(stale_keys)
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        self._entries.clear()
+        self._loads.clear()
+
+    def _finish_load(
+        self,
+        key: str,
+        task: "asyncio.Task[Any]",
+        ttl: Optional[float],
+    ) -> None:
+        if self._loads.get(key) is not task:
+            return
+        self._loads.pop(key)
+        if not task.cancelled() and task.exception() is None:
+            self.set(key, task.result(), ttl)
+
+
+async def publish_invalidation(redis: Redis, prefix: str) -> None:
+    """
+    Invalidate entries in the local caches of all processes.
+
+    :param redis: Redis client.
+    :param prefix: The key prefix of the entries to drop.
+    """
+    await redis.publish(LOCAL_CACHE_CHANNEL, prefix)
+
+
+async def listen_for_invalidations(
+    cache: LocalCache,
+    redis: Redis,
+) -> None:
+    """
+    Apply the invalidations published by any process to a local cache.
+
+    Runs until cancelled. Invalidations published while the connection was lost
+    are missed, so the whole cache is dropped when subscribing again.
+
+    :param cache: The local cache of this process.
+    :param redis: Redis client.
+    """
+    while True:
+        try:
+            await _apply_invalidations(cache, redis)
+        except (RedisError, OSError):
+            logging.warning("Lost the local cache invalidation channel, retrying")
+            await asyncio.sleep(RESUBSCRIBE_DELAY)
+
+
+async def _apply_invalidations(cache: LocalCache, redis: Redis) -> None:
+    async with redis.pubsub() as pubsub:
+        await pubsub.subscribe(LOCAL_CACHE_CHANNEL)
+        cache.clear()
+        async for message in pubsub.listen():
+            if message["type"] == "message":
+                cache.discard(message["data"].decode("utf-8"))
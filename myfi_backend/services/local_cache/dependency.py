@@ -0,0 +1,13 @@
+from starlette.requests import Request
+
+from myfi_backend.services.local_cache.cache import LocalCache
+
+
+def get_local_cache(request: Request) -> LocalCache:  # pragma: no cover
+    """
+    Returns the in-process cache of this worker.
+
+    :param request: current request.
+    :returns: the local cache.
+    """
+    return request.app.state.local_cache
@@ -0,0 +1,35 @@
+import asyncio
+from contextlib import suppress
+
+from fastapi import FastAPI
+
+from myfi_backend.services.local_cache.cache import LocalCache, listen_for_invalidations
+from myfi_backend.settings import settings
+
+
+def init_local_cache(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Creates the in-process cache and subscribes it to invalidations.
+
+    Must run after init_redis.
+
+    :param app: current fastapi application.
+    """
+    app.state.local_cache = LocalCache(
+        max_size=settings.local_cache_max_size,
+        ttl=settings.local_cache_ttl,
+    )
+    app.state.local_cache_listener = asyncio.create_task(
+        listen_for_invalidations(app.state.local_cache, app.state.redis),
+    )
+
+
+async def shutdown_local_cache(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Stops listening for invalidations.
+
+    :param app: current FastAPI app.
+    """
+    app.state.local_cache_listener.cancel()
+    with suppress(asyncio.CancelledError):
+        await app.state.local_cache_listener
@@ -5,6 +5,22 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from myfi_backend.db.dao.portfolio_dao import PortfolioDAO
 from myfi_backend.web.api.portfolio.schema import PortfolioDTO
 
+# Portfolio columns of a PortfolioDTO, the only ones the listing selects.
+PORTFOLIO_LIST_COLUMNS = (
+    "id",
+    "name",
+    "logo",
+    "three_month_return",
+    "six_month_return",
+    "one_year_return",
+    "equity_proportion",
+    "debt_proportion",
+    "hybrid_proportion",
+    "gold_proportion",
+    "index_fund_proportion",
+    "other_proportion",
+)
+
 
 async def get_portfolios(session: AsyncSession) -> List[PortfolioDTO]:
     """Retrieve portfolios for a specific user.
@@ -13,7 +29,7 @@ async def get_portfolios(session: AsyncSession) -> List[PortfolioDTO]:
     :return: A list of PortfolioDTO objects for the user.
     """
     portfoliodao = PortfolioDAO(session)
-    portfolios = await portfoliodao.get_all()
+    portfolios = await portfoliodao.get_all_columns(PORTFOLIO_LIST_COLUMNS)
 
     def get_value_or_default(value: Any, default: Any) -> Any:
         return value if value is not None else default
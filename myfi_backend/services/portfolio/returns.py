@@ -0,0 +1,140 @@
+import logging
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+import numpy as np
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from myfi_backend.db.dao.portfolio_dao import PortfolioDAO, PortfolioMutualFundDAO
+from myfi_backend.db.dao.scheme_nav_dao import SchemeNavDAO
+from myfi_backend.services.local_cache.cache import publish_invalidation
+from myfi_backend.services.scheme.metrics import (
+    FloatArray,
+    NavMatrix,
+    build_nav_matrix,
+    daily_returns,
+    history_start,
+    trailing_returns,
+)
+
+# Namespace of the portfolio responses in the local caches.
+PORTFOLIO_CACHE_NAMESPACE = "portfolios"
+# Portfolio return columns and the number of years they are computed over.
+PORTFOLIO_RETURN_PERIODS = {
+    "three_month_return": 0.25,
+    "six_month_return": 0.5,
+    "one_year_return": 1,
+    "three_year_return": 3,
+    "five_year_return": 5,
+}
+
+
+def compute_portfolio_navs(  # noqa: WPS210
+    matrix: NavMatrix,
+    proportions: Sequence[Tuple[UUID, UUID, int]],
+) -> NavMatrix:
+    """
+    Compute the value of a unit invested in every portfolio on every date.
+
+    Portfolios are rebalanced to their proportions every day, so the daily return
+    of a portfolio is the weighted mean of the daily returns of its schemes. The
+    returns of all portfolios are a single matrix product. Schemes without NAV yet
+    are left out and the weights of the others are scaled up.
+
+    :param matrix: The NAV matrix of the schemes of the portfolios.
+    :param proportions: The (portfolio_id, scheme_id, proportion) rows.
+    :return: NAV matrix with a column per portfolio, starting at 1.
+    """
+    portfolio_ids, weights = _portfolio_weights(matrix, proportions)
+    returns = daily_returns(matrix.navs)
+    has_return = ~np.isnan(returns)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        portfolio_returns = (np.where(has_return, returns, 0) @ weights) / (
+            has_return @ weights
+        )
+    navs = np.vstack(
+        [
+            np.ones((1, len(portfolio_ids))),
+            np.cumprod(1 + np.nan_to_num(portfolio_returns), axis=0),
+        ],
+    )
+    navs[(~np.isnan(matrix.navs) @ weights) == 0] = np.nan
+    return NavMatrix(matrix.dates, portfolio_ids, navs)
+
+
+def compute_portfolio_returns(  # noqa: WPS210
+    matrix: NavMatrix,
+    proportions: Sequence[Tuple[UUID, UUID, int]],
+) -> Dict[UUID, Dict[str, Optional[float]]]:
+    """
+    Compute the trailing returns of every portfolio.
+
+    :param matrix: The NAV matrix of the schemes of the portfolios.
+    :param proportions: The (portfolio_id, scheme_id, proportion) rows.
+    :return: The returns in percent by portfolio id and return column, None when
+        the history is too short.
+    """
+    if not proportions or not matrix.scheme_ids:
+        return {}
+    portfolio_navs = compute_portfolio_navs(matrix, proportions)
+    returns = {
+        column: trailing_returns(portfolio_navs, years) * 100
+        for column, years in PORTFOLIO_RETURN_PERIODS.items()
+    }
+    return {
+        portfolio_id: {
+            column: None if math.isnan(values[index]) else float(values[index])
+            for column, values in returns.items()
+        }
+        for index, portfolio_id in enumerate(portfolio_navs.scheme_ids)
+    }
+
+
+async def refresh_portfolio_returns(
+    session: AsyncSession,
+    redis: Optional[Redis] = None,
+) -> int:
+    """
+    Recompute and store the trailing returns of all portfolios.
+
+    Runs after every NAV ingest, so that listing portfolios only reads stored
+    returns. Only the NAVs the longest return period needs are loaded.
+
+    :param session: Database session.
+    :param redis: Redis client, when given the portfolios cached by
+        the workers are invalidated.
+    :return: The number of portfolios updated.
+    """
+    proportions = await PortfolioMutualFundDAO(session).get_all_proportions()
+    nav_rows = await SchemeNavDAO(session).get_all_navs(
+        from_date=history_start(max(PORTFOLIO_RETURN_PERIODS.values())),
+        scheme_ids={row[1] for row in proportions},
+    )
+    returns = compute_portfolio_returns(build_nav_matrix(nav_rows), proportions)
+    updated = await PortfolioDAO(session).update_many(returns)
+    await session.commit()
+    if redis is not None:
+        await publish_invalidation(redis, PORTFOLIO_CACHE_NAMESPACE)
+    logging.info(f"Updated the returns of {updated} portfolios.")
+    return updated
+
+
+def _portfolio_weights(  # noqa: WPS210
+    matrix: NavMatrix,
+    proportions: Sequence[Tuple[UUID, UUID, int]],
+) -> Tuple[List[UUID], FloatArray]:
+    portfolio_ids = list(dict.fromkeys(row[0] for row in proportions))
+    portfolio_columns = {
+        portfolio_id: index for index, portfolio_id in enumerate(portfolio_ids)
+    }
+    scheme_rows = {
+        scheme_id: index for index, scheme_id in enumerate(matrix.scheme_ids)
+    }
+    weights = np.zeros((len(matrix.scheme_ids), len(portfolio_ids)))
+    for portfolio_id, scheme_id, proportion in proportions:
+        scheme_row = scheme_rows.get(scheme_id)
+        if scheme_row is not None:
+            weights[scheme_row, portfolio_columns[portfolio_id]] = proportion
+    return portfolio_ids, weights
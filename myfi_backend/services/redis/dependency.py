@@ -1,26 +1,22 @@
-from typing import AsyncGenerator
-
 from redis.asyncio import Redis
 from starlette.requests import Request
 
 
-async def get_redis_pool(
-    request: Request,
-) -> AsyncGenerator[Redis, None]:  # pragma: no cover
+def get_redis(request: Request) -> Redis:  # pragma: no cover
     """
-    Returns connection pool.
+    Returns the redis client of the application.
 
     You can use it like this:
 
-    >>> from redis.asyncio import ConnectionPool, Redis
+    >>> from redis.asyncio import Redis
     >>>
-    >>> async def handler(redis_pool: ConnectionPool = Depends(get_redis_pool)):
-    >>>     async with Redis(connection_pool=redis_pool) as redis:
-    >>>         await redis.get('key')
+    >>> async def handler(redis: Redis = Depends(get_redis)):
+    >>>     await redis.get('key')
 
-    I use pools, so you don't acquire connection till the end of the handler.
+    The client is created once in init_redis, connections are taken from its
+    pool only while a command runs.
 
     :param request: current request.
-    :returns:  redis connection pool.
+    :returns: redis client.
     """
-    return request.app.state.redis_pool
+    return request.app.state.redis
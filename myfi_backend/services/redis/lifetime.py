@@ -1,24 +1,29 @@
 from fastapi import FastAPI
-from redis.asyncio import ConnectionPool
+from redis.asyncio import ConnectionPool, Redis
 
 from myfi_backend.settings import settings
 
 
 def init_redis(app: FastAPI) -> None:  # pragma: no cover
     """
-    Creates connection pool for redis.
+    Creates connection pool and client for redis.
+
+    The client is shared by all requests, every command takes a connection
+    from the pool for its duration only.
 
     :param app: current fastapi application.
     """
     app.state.redis_pool = ConnectionPool.from_url(
         str(settings.redis_url),
     )
+    app.state.redis = Redis(connection_pool=app.state.redis_pool)
 
 
 async def shutdown_redis(app: FastAPI) -> None:  # pragma: no cover
     """
-    Closes redis connection pool.
+    Closes redis client and connection pool.
 
     :param app: current FastAPI app.
     """
+    await app.state.redis.close()
     await app.state.redis_pool.disconnect()
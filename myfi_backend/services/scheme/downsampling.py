@@ -0,0 +1,110 @@
+from datetime import date
+from statistics import fmean
+from typing import Dict, List, Sequence
+
+# LTTB always keeps the first and the last point, so it needs room for one more.
+MIN_LTTB_POINTS = 3
+
+
+def _triangle_area(  # noqa: WPS211
+    left_x: float,
+    left_y: float,
+    middle_x: float,
+    middle_y: float,
+    right_x: float,
+    right_y: float,
+) -> float:
+    """
+    Twice the area of the triangle formed by three points.
+
+    :param left_x: x of the point selected in the previous bucket.
+    :param left_y: y of the point selected in the previous bucket.
+    :param middle_x: x of the candidate point.
+    :param middle_y: y of the candidate point.
+    :param right_x: x of the average point of the next bucket.
+    :param right_y: y of the average point of the next bucket.
+    :return: The doubled area, good enough for comparing triangles.
+    """
+    return abs(
+        (left_x - right_x) * (middle_y - left_y)
+        - (left_x - middle_x) * (right_y - left_y),
+    )
+
+
+def _select_in_bucket(
+    xs: Sequence[float],
+    ys: Sequence[float],
+    bucket: range,
+    next_bucket: range,
+    previous: int,
+) -> int:
+    """
+    Select the point of a bucket forming the largest triangle.
+
+    :param xs: x values of all points.
+    :param ys: y values of all points.
+    :param bucket: Indexes of the bucket to select a point from.
+    :param next_bucket: Indexes of the following bucket.
+    :param previous: Index of the point selected in the previous bucket.
+    :return: Index of the selected point.
+    """
+    next_x = fmean(xs[next_bucket.start : next_bucket.stop])
+    next_y = fmean(ys[next_bucket.start : next_bucket.stop])
+    return max(
+        bucket,
+        key=lambda index: _triangle_area(
+            xs[previous],
+            ys[previous],
+            xs[index],
+            ys[index],
+            next_x,
+            next_y,
+        ),
+    )
+
+
+def _buckets(num_points: int, max_points: int) -> List[range]:
+    """
+    Split the points between the first and the last point into buckets.
+
+    The last point gets a bucket of its own so every bucket has a successor.
+
+    :param num_points: The number of points of the series.
+    :param max_points: The number of points to downsample to.
+    :return: Index ranges of the buckets.
+    """
+    bucket_size = (num_points - 2) / (max_points - 2)
+    bounds = [int(bucket * bucket_size) + 1 for bucket in range(max_points - 1)]
+    bounds[-1] = num_points - 1
+    buckets = [range(start, stop) for start, stop in zip(bounds, bounds[1:])]
+    buckets.append(range(num_points - 1, num_points))
+    return buckets
+
+
+def downsample_nav_data(  # noqa: WPS210
+    nav_data: Dict[str, float],
+    max_points: int,
+) -> Dict[str, float]:
+    """
+    Downsample NAV data with Largest-Triangle-Three-Buckets.
+
+    LTTB keeps the visual shape of a series, peaks and dips survive the
+    downsampling which would be lost by simply taking every n-th point.
+
+    :param nav_data: NAV data in the {date: nav} format sorted by date.
+    :param max_points: The maximum number of points to return.
+    :return: At most max_points points of the NAV data in the same format.
+    """
+    if max_points < MIN_LTTB_POINTS or len(nav_data) <= max_points:
+        return nav_data
+
+    dates = list(nav_data)
+    xs = [float(date.fromisoformat(nav_date).toordinal()) for nav_date in dates]
+    ys = list(nav_data.values())
+    buckets = _buckets(len(dates), max_points)
+
+    selected: List[int] = [0]
+    for bucket, next_bucket in zip(buckets, buckets[1:]):
+        selected.append(_select_in_bucket(xs, ys, bucket, next_bucket, selected[-1]))
+    selected.append(len(dates) - 1)
+    return {dates[index]: ys[index] for index in selected}
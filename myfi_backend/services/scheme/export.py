@@ -0,0 +1,85 @@
+import csv
+import io
+import json
+from typing import Any, AsyncIterable, AsyncIterator, Mapping
+
+from myfi_backend.db.dao.mutual_fund_scheme_dao import MutualFundSchemeDAO
+from myfi_backend.web.api.scheme.schema import ExportFormat
+
+# Rows fetched from the database cursor and written to the response at once.
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+
+async def iter_ndjson(
+    rows: AsyncIterable[Mapping[Any, Any]],
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> AsyncIterator[str]:
+    """
+    Encode rows as newline delimited JSON.
+
+    :param rows: The rows to encode.
+    :param batch_size: The number of rows per yielded piece.
+    :yields: Pieces of the document, batch_size lines each.
+    """
+    buffer = io.StringIO()
+    written = 0
+    async for row in rows:
+        json.dump(dict(row), buffer, default=str)
+        buffer.write("\n")
+        written += 1
+        if written % batch_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+async def iter_csv(
+    rows: AsyncIterable[Mapping[Any, Any]],
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> AsyncIterator[str]:
+    """
+    Encode rows as CSV, with the keys of the first row as header.
+
+    :param rows: The rows to encode.
+    :param batch_size: The number of rows per yielded piece.
+    :yields: Pieces of the document, batch_size rows each.
+    """
+    buffer = io.StringIO()
+    writer = None
+    written = 0
+    async for row in rows:
+        if writer is None:
+            writer = csv.DictWriter(buffer, fieldnames=list(row.keys()))
+            writer.writeheader()
+        writer.writerow(row)
+        written += 1
+        if written % batch_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def export_schemes(
+    scheme_dao: MutualFundSchemeDAO,
+    export_format: ExportFormat,
+) -> AsyncIterator[str]:
+    """
+    Stream every scheme with its latest NAV in an export format.
+
+    :param scheme_dao: DAO for mutual fund schemes.
+    :param export_format: The format to encode the schemes in.
+    :return: The pieces of the export, produced while rows are fetched.
+    """
+    rows = scheme_dao.stream_export(EXPORT_BATCH_SIZE)
+    if export_format == ExportFormat.CSV:
+        return iter_csv(rows)
+    return iter_ndjson(rows)
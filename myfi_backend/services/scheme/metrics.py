@@ -0,0 +1,564 @@
+import logging
+import math
+from datetime import date, timedelta
+from typing import (  # noqa: WPS235
+    Any,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+from uuid import UUID
+
+import numpy as np
+from numpy.typing import NDArray
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from myfi_backend.db.dao.mutual_fund_scheme_dao import MutualFundSchemeDAO
+from myfi_backend.db.dao.scheme_nav_dao import SchemeNavDAO
+from myfi_backend.settings import settings
+
+# NAVs, returns and metrics with a row per date and a column per scheme.
+FloatArray = NDArray[np.float64]
+
+# Trading days in a year, the default number of returns a year to annualize with.
+TRADING_DAYS = 252
+# Days in a year, used to look back a number of years.
+DAYS_PER_YEAR = 365.25
+# Years of history the risk metrics are computed over.
+RISK_WINDOW_YEARS = 3
+# Years of history the longest trailing return looks back.
+MAX_RETURN_YEARS = 5
+# Days loaded before the longest trailing return, to find a NAV over holidays.
+HISTORY_SLACK_DAYS = 10
+# Schemes whose NAVs are loaded and computed at once.
+METRICS_CHUNK_SIZE = 1000
+# Ordinal of the epoch of datetime64 dates.
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+class NavMatrix(NamedTuple):
+    """
+    NAV history of many schemes aligned on the union of their NAV dates.
+
+    navs has a row per date and a column per scheme. NAVs are forward filled
+    over the dates a scheme has no NAV for and NaN before its first NAV.
+    observed tells the NAVs a scheme published apart from the filled ones, None
+    when every NAV that isn't NaN was published.
+    """
+
+    dates: NDArray[Any]
+    scheme_ids: List[UUID]
+    navs: FloatArray
+    observed: Optional[NDArray[Any]] = None
+
+
+class SchemeMetrics(NamedTuple):
+    """
+    Return and risk metrics of a scheme.
+
+    Returns, volatility and drawdown are in percent like the figures of the
+    Accord feed, None when the history is too short to compute them.
+    """
+
+    return_last_year: Optional[float]
+    return_last3_years: Optional[float]
+    return_last5_years: Optional[float]
+    return_since_inception: Optional[float]
+    cagr: Optional[float]
+    standard_deviation: Optional[float]
+    sharpe_ratio: Optional[float]
+    sortino_ratio: Optional[float]
+    max_drawdown: Optional[float]
+    alpha: Optional[float]
+    beta: Optional[float]
+
+
+def forward_fill(values: FloatArray) -> FloatArray:
+    """
+    Fill every NaN with the last value above it in the same column.
+
+    :param values: 2D array to fill.
+    :return: The filled array, leading NaNs are kept.
+    """
+    rows = np.where(np.isnan(values), 0, np.arange(values.shape[0])[:, None])
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    return values[rows, np.arange(values.shape[1])]
+
+
+def _ordinal_rows(
+    rows: Iterable[Tuple[UUID, date, float]],
+) -> Iterator[Tuple[UUID, int, float]]:
+    return ((scheme_id, nav_date.toordinal(), nav) for scheme_id, nav_date, nav in rows)
+
+
+def build_nav_matrix(  # noqa: WPS210
+    rows: Iterable[Tuple[UUID, date, float]],
+) -> NavMatrix:
+    """
+    Align the NAV history of many schemes in a single matrix.
+
+    Rows are read in a single pass straight into NumPy arrays, building the
+    matrix of a few million NAVs takes around a second.
+
+    :param rows: (scheme_id, nav_date, nav) rows in any order.
+    :return: The NAV matrix of the schemes.
+    """
+    columns_by_id: Dict[UUID, int] = {}
+    parsed = np.fromiter(
+        (
+            (columns_by_id.setdefault(scheme_id, len(columns_by_id)), day, nav)
+            for scheme_id, day, nav in _ordinal_rows(rows)
+        ),
+        dtype=[("column", np.int64), ("day", np.int64), ("nav", np.float64)],
+    )
+    days, date_rows = np.unique(parsed["day"], return_inverse=True)
+    dates = (days - EPOCH_ORDINAL).astype("datetime64[D]")
+    navs = np.full((len(dates), len(columns_by_id)), np.nan)
+    navs[date_rows, parsed["column"]] = parsed["nav"]
+    return NavMatrix(dates, list(columns_by_id), forward_fill(navs), ~np.isnan(navs))
+
+
+def history_start(years: float) -> date:
+    """
+    Get the first date of the NAV history needed for returns over some years.
+
+    :param years: The length of the longest period in years.
+    :return: The date, HISTORY_SLACK_DAYS before the period starts.
+    """
+    return date.today() - timedelta(
+        days=round(years * DAYS_PER_YEAR) + HISTORY_SLACK_DAYS,
+    )
+
+
+def observed_navs(matrix: NavMatrix) -> NDArray[Any]:
+    """
+    Get whether every scheme published a NAV on every date.
+
+    :param matrix: The NAV matrix.
+    :return: Array shaped like matrix.navs, False for forward filled NAVs.
+    """
+    if matrix.observed is None:
+        return ~np.isnan(matrix.navs)
+    return matrix.observed
+
+
+def navs_on(matrix: NavMatrix, dates: NDArray[Any]) -> FloatArray:
+    """
+    Get the NAV of every scheme on any dates.
+
+    A date without NAVs, like a holiday, gets the last NAV before it.
+
+    :param matrix: The NAV matrix.
+    :param dates: The dates to get the NAVs on.
+    :return: Array with a row per date, NaN before the first NAV of a scheme.
+    """
+    rows = np.searchsorted(matrix.dates, dates, side="right") - 1
+    navs = matrix.navs[np.maximum(rows, 0)]
+    navs[rows < 0] = np.nan
+    return navs
+
+
+def lagged_navs(matrix: NavMatrix, years: float) -> FloatArray:
+    """
+    Get the NAV of every scheme a number of years before every date.
+
+    :param matrix: The NAV matrix.
+    :param years: The number of years to look back.
+    :return: Array shaped like matrix.navs, NaN where there is no history.
+    """
+    targets = matrix.dates - np.timedelta64(round(years * DAYS_PER_YEAR), "D")
+    return navs_on(matrix, targets)
+
+
+def last_nav_dates(matrix: NavMatrix) -> NDArray[Any]:
+    """
+    Get the date of the latest NAV every scheme published.
+
+    :param matrix: The NAV matrix.
+    :return: A date per scheme.
+    """
+    observed = observed_navs(matrix)
+    return matrix.dates[len(matrix.dates) - 1 - np.argmax(observed[::-1], axis=0)]
+
+
+def trailing_returns(matrix: NavMatrix, years: float) -> FloatArray:
+    """
+    Get the absolute return of every scheme over the last years.
+
+    The period ends on the latest NAV of every scheme, not on the last date of
+    the matrix.
+
+    :param matrix: The NAV matrix.
+    :param years: The length of the period in years.
+    :return: The return of every scheme as a fraction.
+    """
+    targets = last_nav_dates(matrix) - np.timedelta64(
+        round(years * DAYS_PER_YEAR),
+        "D",
+    )
+    rows = np.searchsorted(matrix.dates, targets, side="right") - 1
+    start_navs = matrix.navs[np.maximum(rows, 0), np.arange(len(matrix.scheme_ids))]
+    return np.where(rows < 0, np.nan, matrix.navs[-1] / start_navs - 1)
+
+
+def rolling_cagr(matrix: NavMatrix, years: float) -> FloatArray:
+    """
+    Get the CAGR over a rolling window ending on every date.
+
+    :param matrix: The NAV matrix.
+    :param years: The length of the window in years.
+    :return: Array shaped like matrix.navs with the CAGR as a fraction.
+    """
+    return (matrix.navs / lagged_navs(matrix, years)) ** (1 / years) - 1
+
+
+def inception_cagr(
+    matrix: NavMatrix,
+    first_navs: Optional[Mapping[UUID, Tuple[date, float]]] = None,
+) -> Tuple[FloatArray, FloatArray]:
+    """
+    Get the return and the CAGR of every scheme since its first NAV.
+
+    :param matrix: The NAV matrix.
+    :param first_navs: The (nav_date, nav) of the first NAV of schemes whose
+        history starts before the matrix, by scheme id.
+    :return: The absolute returns and the CAGRs as fractions.
+    """
+    first_dates, first_values = _first_navs(matrix, first_navs or {})
+    returns = matrix.navs[-1] / first_values - 1
+    days = (last_nav_dates(matrix) - first_dates).astype(float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cagrs = (1 + returns) ** (DAYS_PER_YEAR / days) - 1
+    return returns, np.where(days > 0, cagrs, np.nan)
+
+
+def _first_navs(  # noqa: WPS210
+    matrix: NavMatrix,
+    first_navs: Mapping[UUID, Tuple[date, float]],
+) -> Tuple[NDArray[Any], FloatArray]:
+    first_rows = np.argmax(~np.isnan(matrix.navs), axis=0)
+    first_dates = matrix.dates[first_rows]
+    first_values = matrix.navs[first_rows, np.arange(matrix.navs.shape[1])]
+    for column, scheme_id in enumerate(matrix.scheme_ids):
+        first_nav = first_navs.get(scheme_id)
+        if first_nav is not None:
+            first_dates[column] = first_nav[0]
+            first_values[column] = first_nav[1]
+    return first_dates, first_values
+
+
+def daily_returns(navs: FloatArray) -> FloatArray:
+    """
+    Get the return of every scheme from one NAV date to the next.
+
+    :param navs: NAVs with a row per date.
+    :return: Array with one row less than navs.
+    """
+    return navs[1:] / navs[:-1] - 1
+
+
+def observed_returns(navs: FloatArray, observed: NDArray[Any]) -> FloatArray:
+    """
+    Get the return of every scheme from one of its own NAVs to the next.
+
+    A return is kept on the dates the scheme published a NAV and runs from the
+    previous NAV it published, other dates are NaN. Filled NAVs don't count as
+    flat days, so the returns of a scheme don't depend on the NAV dates of the
+    other schemes of the matrix.
+
+    :param navs: Forward filled NAVs with a row per date.
+    :param observed: Whether every NAV was published, shaped like navs.
+    :return: Array with one row less than navs.
+    """
+    return np.where(observed[1:], daily_returns(navs), np.nan)
+
+
+def interval_returns(benchmark_navs: FloatArray, observed: NDArray[Any]) -> FloatArray:
+    """
+    Get the return of a benchmark over the same periods as observed_returns.
+
+    :param benchmark_navs: NAVs of the benchmark with a row per date.
+    :param observed: Whether every NAV of the schemes was published.
+    :return: Array with one row less than observed and a column per scheme.
+    """
+    rows = np.where(observed, np.arange(observed.shape[0])[:, None], 0)
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    return benchmark_navs[1:, None] / benchmark_navs[rows[:-1]] - 1
+
+
+def periods_per_year(dates: NDArray[Any], observed: NDArray[Any]) -> FloatArray:
+    """
+    Get the number of NAVs every scheme publishes in a year.
+
+    :param dates: The dates of the rows of observed.
+    :param observed: Whether every scheme published a NAV on every date.
+    :return: The NAVs a year, NaN for schemes with less than two NAVs.
+    """
+    first_rows = np.argmax(observed, axis=0)
+    last_rows = len(dates) - 1 - np.argmax(observed[::-1], axis=0)
+    days = (dates[last_rows] - dates[first_rows]).astype(float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        periods = (observed.sum(axis=0) - 1) / days * DAYS_PER_YEAR
+    return np.where(days > 0, periods, np.nan)
+
+
+def nan_mean(values: FloatArray) -> FloatArray:
+    """
+    Get the mean of every column ignoring NaNs.
+
+    :param values: 2D array.
+    :return: The means, NaN for columns without values.
+    """
+    counts = np.sum(~np.isnan(values), axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.nansum(values, axis=0) / counts
+
+
+def nan_std(values: FloatArray) -> FloatArray:
+    """
+    Get the sample standard deviation of every column ignoring NaNs.
+
+    :param values: 2D array.
+    :return: The standard deviations, NaN for columns with less than two values.
+    """
+    counts = np.sum(~np.isnan(values), axis=0)
+    deviations = values - nan_mean(values)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.sqrt(np.nansum(deviations**2, axis=0) / (counts - 1))
+
+
+def annualized_volatility(
+    returns: FloatArray,
+    periods: Union[float, FloatArray] = TRADING_DAYS,
+) -> FloatArray:
+    """
+    Get the annualized volatility of daily returns.
+
+    :param returns: Daily returns with a row per date.
+    :param periods: The number of returns a year, per column or for all.
+    :return: The volatility of every column as a fraction.
+    """
+    return nan_std(returns) * np.sqrt(periods)
+
+
+def sharpe_ratio(
+    returns: FloatArray,
+    risk_free_rate: float,
+    periods: Union[float, FloatArray] = TRADING_DAYS,
+) -> FloatArray:
+    """
+    Get the annualized Sharpe ratio of daily returns.
+
+    :param returns: Daily returns with a row per date.
+    :param risk_free_rate: The annual risk free rate as a fraction.
+    :param periods: The number of returns a year, per column or for all.
+    :return: The Sharpe ratio of every column.
+    """
+    excess = returns - risk_free_rate / periods
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return nan_mean(excess) / nan_std(excess) * np.sqrt(periods)
+
+
+def sortino_ratio(
+    returns: FloatArray,
+    risk_free_rate: float,
+    periods: Union[float, FloatArray] = TRADING_DAYS,
+) -> FloatArray:
+    """
+    Get the annualized Sortino ratio of daily returns.
+
+    :param returns: Daily returns with a row per date.
+    :param risk_free_rate: The annual risk free rate as a fraction.
+    :param periods: The number of returns a year, per column or for all.
+    :return: The Sortino ratio of every column.
+    """
+    excess = returns - risk_free_rate / periods
+    downside = np.sqrt(nan_mean(np.minimum(excess, 0) ** 2))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return nan_mean(excess) / downside * np.sqrt(periods)
+
+
+def max_drawdown(navs: FloatArray) -> FloatArray:
+    """
+    Get the largest fall from a peak of every scheme.
+
+    :param navs: NAVs with a row per date.
+    :return: The maximum drawdown of every column as a negative fraction.
+    """
+    peaks = np.fmax.accumulate(navs, axis=0)
+    drawdowns = np.where(np.isnan(navs), np.inf, navs / peaks - 1)
+    deepest = drawdowns.min(axis=0, initial=np.inf)
+    return np.where(np.isinf(deepest), np.nan, deepest)
+
+
+def alpha_beta(  # noqa: WPS210
+    returns: FloatArray,
+    benchmark_returns: FloatArray,
+    risk_free_rate: float,
+    periods: Union[float, FloatArray] = TRADING_DAYS,
+) -> Tuple[FloatArray, FloatArray]:
+    """
+    Get the annualized Jensen's alpha and the beta against a benchmark.
+
+    :param returns: Daily returns with a row per date.
+    :param benchmark_returns: Returns of the benchmark over the same periods,
+        a single column for all schemes or one per scheme.
+    :param risk_free_rate: The annual risk free rate as a fraction.
+    :param periods: The number of returns a year, per column or for all.
+    :return: The alphas as fractions and the betas of every column.
+    """
+    if benchmark_returns.ndim == 1:
+        benchmark_returns = benchmark_returns[:, None]
+    daily_risk_free_rate = risk_free_rate / periods
+    excess = returns - daily_risk_free_rate
+    benchmark_excess = np.where(
+        np.isnan(excess),
+        np.nan,
+        benchmark_returns - daily_risk_free_rate,
+    )
+    excess = np.where(np.isnan(benchmark_excess), np.nan, excess)
+    covariance = nan_mean(
+        (excess - nan_mean(excess)) * (benchmark_excess - nan_mean(benchmark_excess)),
+    )
+    variance = nan_mean((benchmark_excess - nan_mean(benchmark_excess)) ** 2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        betas = covariance / variance
+    alphas = (nan_mean(excess) - betas * nan_mean(benchmark_excess)) * periods
+    return alphas, betas
+
+
+def compute_scheme_metrics(  # noqa: WPS210
+    matrix: NavMatrix,
+    risk_free_rate: float,
+    benchmark_navs: Optional[FloatArray] = None,
+    first_navs: Optional[Mapping[UUID, Tuple[date, float]]] = None,
+) -> Dict[UUID, SchemeMetrics]:
+    """
+    Compute the return and risk metrics of all schemes at once.
+
+    Risk metrics use the returns between the NAVs every scheme published in the
+    last RISK_WINDOW_YEARS years, annualized with the number of NAVs a year it
+    published over the matrix. Alpha and beta need the NAVs of a benchmark on the
+    dates of the matrix.
+
+    :param matrix: The NAV matrix of the schemes.
+    :param risk_free_rate: The annual risk free rate as a fraction.
+    :param benchmark_navs: NAVs of the benchmark, one per date of the matrix.
+    :param first_navs: The first NAV of schemes whose history starts before the
+        matrix, used for the returns since inception.
+    :return: The metrics of every scheme of the matrix.
+    """
+    if not matrix.scheme_ids:
+        return {}
+    window_start = matrix.dates[-1] - np.timedelta64(
+        round(RISK_WINDOW_YEARS * DAYS_PER_YEAR),
+        "D",
+    )
+    window = max(np.searchsorted(matrix.dates, window_start, side="right") - 1, 0)
+    observed = observed_navs(matrix)
+    returns = observed_returns(matrix.navs, observed)[window:]
+    periods = periods_per_year(matrix.dates, observed)
+    since_inception, cagrs = inception_cagr(matrix, first_navs)
+    no_metric = np.full(len(matrix.scheme_ids), np.nan)
+    alphas, betas = no_metric, no_metric
+    if benchmark_navs is not None:
+        alphas, betas = alpha_beta(
+            returns,
+            interval_returns(benchmark_navs, observed)[window:],
+            risk_free_rate,
+            periods,
+        )
+
+    columns = zip(
+        trailing_returns(matrix, 1) * 100,
+        trailing_returns(matrix, 3) * 100,
+        trailing_returns(matrix, MAX_RETURN_YEARS) * 100,
+        since_inception * 100,
+        cagrs * 100,
+        annualized_volatility(returns, periods) * 100,
+        sharpe_ratio(returns, risk_free_rate, periods),
+        sortino_ratio(returns, risk_free_rate, periods),
+        max_drawdown(matrix.navs) * 100,
+        alphas * 100,
+        betas,
+    )
+    return {
+        scheme_id: SchemeMetrics(
+            *(None if math.isnan(metric) else float(metric) for metric in metrics),
+        )
+        for scheme_id, metrics in zip(matrix.scheme_ids, columns)
+    }
+
+
+async def compute_all_scheme_metrics(  # noqa: WPS210
+    schemenav_dao: SchemeNavDAO,
+    scheme_ids: Sequence[UUID],
+    chunk_size: int = METRICS_CHUNK_SIZE,
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Compute the return and risk metrics of schemes, chunk_size schemes at a time.
+
+    The metrics of a scheme only depend on its own NAVs, so schemes are loaded
+    and computed in chunks and memory doesn't grow with the number of schemes.
+    Only the NAVs of the last MAX_RETURN_YEARS years are loaded, the returns
+    since inception start from the first NAV of every scheme.
+
+    :param schemenav_dao: DAO for scheme NAV history.
+    :param scheme_ids: The ids of the schemes.
+    :param chunk_size: The number of schemes computed at once.
+    :yields: SchemeNavMetrics rows of the schemes of a chunk with NAVs.
+    """
+    from_date = history_start(MAX_RETURN_YEARS)
+    for start in range(0, len(scheme_ids), chunk_size):
+        chunk = scheme_ids[start : start + chunk_size]
+        matrix = build_nav_matrix(
+            await schemenav_dao.get_all_navs(from_date=from_date, scheme_ids=chunk),
+        )
+        metrics = compute_scheme_metrics(
+            matrix,
+            settings.risk_free_rate,
+            first_navs=await schemenav_dao.get_first_navs(chunk),
+        )
+        if metrics:
+            nav_dates = last_nav_dates(matrix)
+            yield [
+                {
+                    "scheme_id": scheme_id,
+                    "nav_date": nav_date.item(),
+                    **metrics[scheme_id]._asdict(),  # noqa: WPS437
+                }
+                for scheme_id, nav_date in zip(matrix.scheme_ids, nav_dates)
+            ]
+
+
+async def refresh_scheme_metrics(session: AsyncSession) -> int:
+    """
+    Recompute and store the return and risk metrics of all schemes.
+
+    Runs after every NAV ingest. The metrics are stored in SchemeNavMetrics, the
+    figures of MutualFundScheme from the Accord feed are left alone.
+
+    :param session: Database session.
+    :return: The number of schemes written.
+    """
+    schemenav_dao = SchemeNavDAO(session)
+    scheme_ids = [
+        row.id for row in await MutualFundSchemeDAO(session).get_all_columns(["id"])
+    ]
+    written = sum(
+        [
+            await schemenav_dao.upsert_metrics(rows)
+            async for rows in compute_all_scheme_metrics(schemenav_dao, scheme_ids)
+        ],
+    )
+    await session.commit()
+    logging.info(f"Computed the metrics of {written} schemes.")
+    return written
@@ -0,0 +1,114 @@
+import json
+from datetime import date
+from typing import Dict, Optional
+from uuid import UUID
+
+from prometheus_client import Counter
+from redis.asyncio import Redis
+
+from myfi_backend.db.dao.scheme_nav_dao import SchemeNavDAO
+from myfi_backend.services.local_cache.cache import publish_invalidation
+from myfi_backend.utils.redis import (
+    REDIS_HASH_SCHEME_NAV,
+    REDIS_HASH_SCHEME_NAV_VERSION,
+    REDIS_SCHEME_NAV_EXPIRY_TIME,
+    get_from_redis,
+    increment_in_redis,
+    set_to_redis,
+)
+
+# Namespace of the NAV responses in the local caches.
+SCHEME_NAV_CACHE_NAMESPACE = "scheme_nav"
+# Key of the NAV version in the REDIS_HASH_SCHEME_NAV_VERSION hash.
+NAV_VERSION_KEY = "current"
+
+SCHEME_NAV_CACHE_REQUESTS = Counter(
+    "scheme_nav_cache_requests",
+    "Lookups of scheme NAV history in the Redis cache, by result (hit or miss).",
+    ["result"],
+)
+
+
+async def get_nav_version(redis: Redis) -> str:
+    """
+    Get the current version of the NAV history.
+
+    :param redis: Redis client.
+    :return: The version, "0" until NAVs were first ingested.
+    """
+    version = await get_from_redis(
+        redis=redis,
+        key=NAV_VERSION_KEY,
+        hash_key=REDIS_HASH_SCHEME_NAV_VERSION,
+    )
+    return version or "0"
+
+
+async def bump_nav_version(redis: Redis) -> int:
+    """
+    Start a new version of the NAV history.
+
+    Cached responses are keyed by version, so this invalidates all of them at
+    once. Entries of older versions are left to expire. NAV responses in the
+    local caches of all workers are dropped as well.
+
+    :param redis: Redis client.
+    :return: The new version.
+    """
+    version = await increment_in_redis(
+        redis=redis,
+        key=NAV_VERSION_KEY,
+        hash_key=REDIS_HASH_SCHEME_NAV_VERSION,
+    )
+    await publish_invalidation(redis, SCHEME_NAV_CACHE_NAMESPACE)
+    return version
+
+
+async def get_cached_nav_data(  # noqa: WPS211
+    schemenav_dao: SchemeNavDAO,
+    redis: Redis,
+    scheme_id: UUID,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    bucket: Optional[str] = None,
+) -> Dict[str, float]:
+    """
+    Get the NAV history of a scheme through the Redis cache.
+
+    On a miss the history is read with SchemeNavDAO.get_by_scheme_id and stored
+    as JSON under the current NAV version.
+
+    :param schemenav_dao: DAO for scheme NAV history.
+    :param redis: Redis client.
+    :param scheme_id: The id of the scheme to get the NAV history of.
+    :param from_date: Only return NAVs on or after this date.
+    :param to_date: Only return NAVs on or before this date.
+    :param bucket: A date_trunc field e.g. "week" or "month".
+    :return: The NAV history as {date: nav} sorted by date, empty if not found.
+    """
+    version = await get_nav_version(redis)
+    key = f"{version}:{scheme_id}:{from_date}:{to_date}:{bucket}"
+    cached = await get_from_redis(
+        redis=redis,
+        key=key,
+        hash_key=REDIS_HASH_SCHEME_NAV,
+    )
+    if cached is not None:
+        SCHEME_NAV_CACHE_REQUESTS.labels(result="hit").inc()
+        return json.loads(cached)
+
+    SCHEME_NAV_CACHE_REQUESTS.labels(result="miss").inc()
+    nav_data = await schemenav_dao.get_by_scheme_id(
+        scheme_id,
+        from_date=from_date,
+        to_date=to_date,
+        bucket=bucket,
+    )
+    await set_to_redis(
+        redis=redis,
+        key=key,
+        value=json.dumps(nav_data),
+        hash_key=REDIS_HASH_SCHEME_NAV,
+        expire=REDIS_SCHEME_NAV_EXPIRY_TIME,
+    )
+    return nav_data
@@ -1,51 +1,282 @@
-from typing import Dict, List, Optional, cast
-from uuid import UUID, uuid4
+import base64
+import json
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
 
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from myfi_backend.db.dao.mutual_fund_scheme_dao import MutualFundSchemeDAO
 from myfi_backend.db.dao.scheme_nav_dao import SchemeNavDAO
-from myfi_backend.web.api.scheme.schema import SchemeDTO, SchemeNavDTO
+from myfi_backend.db.dependencies import run_in_session
+from myfi_backend.db.models.scheme_nav_summary_model import SchemeNavSummary
+from myfi_backend.services.local_cache.cache import LocalCache, cache_key
+from myfi_backend.services.scheme.downsampling import downsample_nav_data
+from myfi_backend.services.scheme.nav_cache import get_cached_nav_data
+from myfi_backend.services.scheme.search import (
+    SCHEME_SEARCH_CACHE_NAMESPACE,
+    build_search_index,
+)
+from myfi_backend.settings import settings
+from myfi_backend.web.api.scheme.schema import (  # noqa: WPS235
+    NavInterval,
+    SchemeDTO,
+    SchemeFiltersDTO,
+    SchemeNavDTO,
+    SchemeNavSummaryDTO,
+    SchemePageDTO,
+    SchemeSearchResultDTO,
+    SchemeSort,
+    SortOrder,
+)
+
+# date_trunc fields for the NAV intervals which are bucketed in the database.
+NAV_INTERVAL_BUCKETS = {
+    NavInterval.WEEKLY: "week",
+    NavInterval.MONTHLY: "month",
+}
+
+# MutualFundScheme columns of the scheme catalogue sorts.
+SCHEME_SORT_COLUMNS = {
+    SchemeSort.NAME: "name",
+    SchemeSort.ONE_YEAR_RETURN: "return_last_year",
+    SchemeSort.THREE_YEAR_RETURN: "return_last3_years",
+    SchemeSort.FIVE_YEAR_RETURN: "return_last5_years",
+    SchemeSort.AUM: "aum",
+    SchemeSort.TER: "ter",
+}
+
+# MutualFundScheme columns of a SchemeDTO, the only ones the catalogue selects.
+SCHEME_LIST_COLUMNS = (
+    "id",
+    "name",
+    "return_last_year",
+    "return_last3_years",
+    "return_last5_years",
+    "amc_id",
+    "scheme_plan",
+    "scheme_type",
+    "scheme_category",
+    "risk_level",
+    "aum",
+    "ter",
+)
+
+# Schemes per page of the catalogue, by default and at most.
+SCHEME_PAGE_SIZE = 50
+MAX_SCHEME_PAGE_SIZE = 200
 
+# Results of a scheme search, by default and at most.
+SCHEME_SEARCH_SIZE = 10
+MAX_SCHEME_SEARCH_SIZE = 50
 
-def get_schemes_from_db() -> List[SchemeDTO]:
+
+def encode_scheme_cursor(sort: SchemeSort, scheme: Any) -> str:
     """
-    Retrieve schemes from the database.
+    Encode the position after a scheme in the catalogue as an opaque cursor.
 
-    :return: A list of schemes.
+    :param sort: The sort of the catalogue.
+    :param scheme: The last scheme of a page, an instance or a row with the id
+        and sort column.
+    :return: The cursor of the next page.
     """
-    # Here you can handle the get_schemes_from_db data.
-    # For example, you can save it to a database.
-    # For now, let's just return it as is.
-    return [
-        SchemeDTO(
-            scheme_id=uuid4(),
-            scheme_name="Scheme 1",
-            one_year_return=10.5,
-            three_year_return=30.0,
-            five_year_return=50.0,
-        ),
-        SchemeDTO(
-            scheme_id=uuid4(),
-            scheme_name="Scheme 2",
-            one_year_return=15.0,
-            three_year_return=35.0,
-            five_year_return=55.0,
+    sort_value = getattr(scheme, SCHEME_SORT_COLUMNS[sort])
+    position = json.dumps([sort.value, sort_value, str(scheme.id)])
+    return base64.urlsafe_b64encode(position.encode()).decode()
+
+
+def decode_scheme_cursor(sort: SchemeSort, cursor: str) -> Tuple[Any, UUID]:
+    """
+    Decode a cursor of the scheme catalogue.
+
+    :param sort: The sort of the catalogue.
+    :param cursor: The cursor of a page.
+    :return: The sort value and id of the last scheme of the previous page.
+    :raises ValueError: If the cursor is invalid or of another sort.
+    """
+    try:
+        cursor_sort, sort_value, scheme_id = json.loads(
+            base64.urlsafe_b64decode(cursor.encode()),
+        )
+        last_id = UUID(scheme_id)
+    except (TypeError, AttributeError):
+        raise ValueError("Invalid cursor")
+    if cursor_sort != sort.value:
+        raise ValueError("Cursor of another sort")
+    if not _is_sort_value(sort, sort_value):
+        raise ValueError("Invalid cursor")
+    if sort == SchemeSort.NAME:
+        return sort_value, last_id
+    return float(sort_value), last_id
+
+
+async def get_schemes_from_db(  # noqa: WPS211
+    scheme_dao: MutualFundSchemeDAO,
+    schemenav_dao: SchemeNavDAO,
+    filters: SchemeFiltersDTO,
+    sort: SchemeSort = SchemeSort.NAME,
+    order: SortOrder = SortOrder.ASC,
+    cursor: Optional[str] = None,
+    limit: int = SCHEME_PAGE_SIZE,
+) -> SchemePageDTO:
+    """
+    Retrieve a page of the scheme catalogue from the database.
+
+    :param scheme_dao: DAO for mutual fund schemes.
+    :param schemenav_dao: DAO for the NAVs of the schemes.
+    :param filters: Filters the schemes must match.
+    :param sort: The column to sort by.
+    :param order: The direction of the sort.
+    :param cursor: The cursor of the page, None for the first page.
+    :param limit: The maximum number of schemes of the page.
+    :return: The page of schemes.
+    """
+    after = None if cursor is None else decode_scheme_cursor(sort, cursor)
+    # one more scheme than needed tells whether there is a next page
+    schemes = await scheme_dao.get_page(
+        filters.dict(exclude_none=True),
+        SCHEME_SORT_COLUMNS[sort],
+        descending=order == SortOrder.DESC,
+        limit=limit + 1,
+        after=after,
+        columns=SCHEME_LIST_COLUMNS,
+    )
+    page = schemes[:limit]
+    next_cursor = None
+    if len(schemes) > limit:
+        next_cursor = encode_scheme_cursor(sort, page[-1])
+    summaries = await schemenav_dao.get_summaries([scheme.id for scheme in page])
+    return SchemePageDTO(
+        schemes=[
+            SchemeDTO(
+                scheme_id=scheme.id,
+                scheme_name=scheme.name,
+                one_year_return=scheme.return_last_year,
+                three_year_return=scheme.return_last3_years,
+                five_year_return=scheme.return_last5_years,
+                amc_id=scheme.amc_id,
+                scheme_plan=scheme.scheme_plan,
+                scheme_type=scheme.scheme_type,
+                scheme_category=scheme.scheme_category,
+                risk_level=scheme.risk_level,
+                aum=scheme.aum,
+                ter=scheme.ter,
+                **_nav_fields(summaries.get(scheme.id)),
+            )
+            for scheme in page
+        ],
+        next_cursor=next_cursor,
+    )
+
+
+def _nav_fields(summary: Optional[SchemeNavSummary]) -> Dict[str, Any]:
+    if summary is None:
+        return {}
+    return {
+        "nav": summary.nav,
+        "nav_date": summary.nav_date,
+        "day_change": summary.day_change,
+    }
+
+
+async def get_scheme_nav_summary_from_db(
+    schemenav_dao: SchemeNavDAO,
+    scheme_id: UUID,
+) -> Optional[SchemeNavSummaryDTO]:
+    """
+    Retrieve the NAV summary of a scheme from the database.
+
+    :param schemenav_dao: DAO for the NAVs of the schemes.
+    :param scheme_id: The ID of the scheme.
+    :return: The NAV summary, None if the scheme has no NAVs.
+    """
+    summary = await schemenav_dao.get_summary(scheme_id)
+    if summary is None:
+        return None
+    return SchemeNavSummaryDTO.from_orm(summary)
+
+
+async def search_schemes(
+    session_factory: async_sessionmaker[AsyncSession],
+    local_cache: LocalCache,
+    query: str,
+    limit: int = SCHEME_SEARCH_SIZE,
+) -> List[SchemeSearchResultDTO]:
+    """
+    Search schemes by name.
+
+    Every worker keeps its own search index of all schemes, built on the first
+    search and again after a scheme sync dropped it.
+
+    :param session_factory: Factory of the database session the index is built
+        with, shared by the searches waiting for it.
+    :param local_cache: In-process cache of the worker.
+    :param query: The text to search for, e.g. a part of the name.
+    :param limit: The maximum number of results.
+    :return: The best matching schemes, best first.
+    """
+    index = await local_cache.get_or_load(
+        cache_key(SCHEME_SEARCH_CACHE_NAMESPACE),
+        lambda: run_in_session(
+            session_factory,
+            lambda session: build_search_index(MutualFundSchemeDAO(session)),
         ),
+        ttl=settings.scheme_search_index_ttl,
+    )
+    return [
+        SchemeSearchResultDTO(
+            scheme_id=match.scheme_id,
+            scheme_name=match.name,
+            score=match.score,
+        )
+        for match in index.search(query, limit)
     ]
 
 
-async def get_scheme_nav_from_db(
+async def get_scheme_nav_from_db(  # noqa: WPS211
     schemenav_dao: SchemeNavDAO,
+    redis: Redis,
     scheme_id: UUID,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    interval: NavInterval = NavInterval.DAILY,
+    max_points: Optional[int] = None,
 ) -> Optional[SchemeNavDTO]:
     """
     Retrieve scheme NAV from the database.
 
+    The date range and the weekly/monthly bucketing are applied by the database,
+    max_points downsampling is applied on whatever the database returned. Database
+    results are cached in Redis until the next NAV ingest.
+
     :param schemenav_dao: Database session.
+    :param redis: Redis client.
     :param scheme_id: The ID of the scheme for which to retrieve the NAV.
+    :param from_date: Only return NAVs on or after this date.
+    :param to_date: Only return NAVs on or before this date.
+    :param interval: Return the daily NAVs or the last NAV of every week/month.
+    :param max_points: Downsample the NAVs to at most this many points.
     :return: The NAV of the scheme.
     """
-    scheme_nav = await schemenav_dao.get_by_scheme_id(scheme_id)
-    if scheme_nav and scheme_nav.nav_data is not None:
-        nav_data = cast(Dict[str, float], scheme_nav.nav_data)
+    nav_data = await get_cached_nav_data(
+        schemenav_dao,
+        redis,
+        scheme_id,
+        from_date=from_date,
+        to_date=to_date,
+        bucket=NAV_INTERVAL_BUCKETS.get(interval),
+    )
+    if max_points is not None:
+        nav_data = downsample_nav_data(nav_data, max_points)
+    if nav_data:
         return SchemeNavDTO(scheme_id=scheme_id, nav_data=nav_data)
 
     return None
+
+
+def _is_sort_value(sort: SchemeSort, sort_value: Any) -> bool:
+    if sort == SchemeSort.NAME:
+        return isinstance(sort_value, str) and "\x00" not in sort_value
+    # The other sort columns are numbers, a bool is an int to isinstance
+    return isinstance(sort_value, (int, float)) and not isinstance(sort_value, bool)
@@ -0,0 +1,121 @@
+import re
+from typing import Dict, List, NamedTuple, Sequence, Set, Tuple
+from uuid import UUID
+
+import numpy as np
+
+from myfi_backend.db.dao.mutual_fund_scheme_dao import MutualFundSchemeDAO
+
+# Namespace of the search index in the local caches.
+SCHEME_SEARCH_CACHE_NAMESPACE = "scheme_search"
+
+# Matches shorter than this share of the trigrams of the query are left out.
+MIN_QUERY_COVERAGE = 0.3
+
+_NON_ALPHANUMERIC = re.compile("[^0-9a-z]+")
+
+
+class SchemeMatch(NamedTuple):
+    """A scheme matching a search query."""
+
+    scheme_id: UUID
+    name: str
+    score: float
+
+
+def trigrams(text: str) -> Set[str]:
+    """
+    Split a text into the trigrams of its words.
+
+    Like pg_trgm, the text is lowercased, split into words on anything but
+    letters and digits, and every word is padded with two spaces in front and
+    one behind, so its start and end make trigrams of their own.
+
+    :param text: The text to split.
+    :return: The trigrams of the words of the text.
+    """
+    text_trigrams: Set[str] = set()
+    for word in _NON_ALPHANUMERIC.split(text.lower()):
+        if word:
+            padded = f"  {word} "
+            text_trigrams.update(
+                padded[start : start + 3] for start in range(len(padded) - 2)
+            )
+    return text_trigrams
+
+
+class SchemeSearchIndex:
+    """
+    In-memory trigram index of the scheme names.
+
+    Every trigram maps to the array of the positions of the names containing it.
+    A query counts the trigrams every name shares with it in one np.bincount
+    over the arrays of its trigrams. Names are ranked by the share of the
+    trigrams of the query they contain, so partial queries like "hdfc flexi
+    direct" match full names, then by their trigram similarity to the query,
+    which favours the shorter names.
+
+    :param schemes: The id and name of every scheme.
+    :type schemes: Sequence[Tuple[UUID, str]]
+    """
+
+    def __init__(self, schemes: Sequence[Tuple[UUID, str]]):  # noqa: WPS210
+        self.scheme_ids = [scheme_id for scheme_id, _ in schemes]
+        self.names = [name for _, name in schemes]
+        postings: Dict[str, List[int]] = {}
+        trigram_counts = []
+        for position, name in enumerate(self.names):
+            name_trigrams = trigrams(name)
+            trigram_counts.append(len(name_trigrams))
+            for trigram in name_trigrams:
+                postings.setdefault(trigram, []).append(position)
+        self._postings = {
+            gram: np.array(positions, dtype=np.int32)
+            for gram, positions in postings.items()
+        }
+        self._trigram_counts = np.array(trigram_counts, dtype=np.float64)
+
+    def search(self, query: str, limit: int) -> List[SchemeMatch]:  # noqa: WPS210
+        """
+        Find the schemes best matching a query.
+
+        :param query: The text to search for.
+        :param limit: The maximum number of matches.
+        :return: The matches, best first.
+        """
+        query_trigrams = trigrams(query)
+        matching = [
+            self._postings[trigram]
+            for trigram in query_trigrams
+            if trigram in self._postings
+        ]
+        if not matching:
+            return []
+        shared = np.bincount(
+            np.concatenate(matching),
+            minlength=len(self.names),
+        ).astype(np.float64)
+        coverage = shared / len(query_trigrams)
+        similarity = shared / (len(query_trigrams) + self._trigram_counts - shared)
+        candidates = np.flatnonzero(coverage >= MIN_QUERY_COVERAGE)
+        ranked = candidates[
+            np.lexsort((-similarity[candidates], -coverage[candidates]))
+        ][:limit]
+        return [
+            SchemeMatch(
+                scheme_id=self.scheme_ids[position],
+                name=self.names[position],
+                score=float(similarity[position]),
+            )
+            for position in ranked
+        ]
+
+
+async def build_search_index(scheme_dao: MutualFundSchemeDAO) -> SchemeSearchIndex:
+    """
+    Build the search index of all schemes.
+
+    :param scheme_dao: DAO for mutual fund schemes.
+    :return: The search index.
+    """
+    return SchemeSearchIndex(await scheme_dao.get_names())
@@ -0,0 +1,28 @@
+from uuid import UUID
+
+from fastapi import Depends, HTTPException
+from redis.asyncio import Redis
+
+from myfi_backend.services.local_cache.cache import LocalCache
+from myfi_backend.services.local_cache.dependency import get_local_cache
+from myfi_backend.services.redis.dependency import get_redis
+from myfi_backend.services.user.session import is_valid_user
+
+
+async def get_valid_user_id(
+    user_id: UUID,
+    redis: Redis = Depends(get_redis),
+    local_cache: LocalCache = Depends(get_local_cache),
+) -> UUID:
+    """
+    Returns the user_id of the request if it belongs to a verified user.
+
+    :param user_id: The user_id query parameter.
+    :param redis: Redis client.
+    :param local_cache: In-process cache of the worker.
+    :returns: The user_id.
+    :raises HTTPException: If the user is unknown.
+    """
+    if not await is_valid_user(redis, local_cache, user_id):
+        raise HTTPException(status_code=400, detail="Invalid request.")
+    return user_id
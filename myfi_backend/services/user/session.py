@@ -0,0 +1,65 @@
+from uuid import UUID
+
+from redis.asyncio import Redis
+
+from myfi_backend.services.local_cache.cache import LocalCache, cache_key
+from myfi_backend.settings import settings
+from myfi_backend.utils.redis import (
+    REDIS_HASH_USER,
+    REDIS_SET_USER_IDS,
+    add_to_redis_set,
+    exists_in_redis,
+    is_member_of_redis_set,
+)
+
+# Namespace of the validated user ids in the local caches.
+USER_SESSION_CACHE_NAMESPACE = "user_session"
+
+
+async def add_user_session(redis: Redis, user_id: str) -> None:
+    """
+    Remember a user as verified.
+
+    :param redis: Redis client.
+    :param user_id: The id of the verified user, as used in its Redis key.
+    """
+    await add_to_redis_set(redis, REDIS_SET_USER_IDS, user_id)
+
+
+async def is_valid_user(
+    redis: Redis,
+    local_cache: LocalCache,
+    user_id: UUID,
+) -> bool:
+    """
+    Check whether a user id belongs to a verified user.
+
+    Valid ids are cached in the worker for a few seconds, so most checks don't
+    reach Redis. Otherwise the id is looked up in the set of verified users, the
+    user record itself is never read.
+
+    :param redis: Redis client.
+    :param local_cache: In-process cache of the worker.
+    :param user_id: The user id to check.
+    :return: True if the user is verified.
+    """
+    key = cache_key(USER_SESSION_CACHE_NAMESPACE, user_id)
+    if local_cache.get(key):
+        return True
+
+    is_valid = await is_member_of_redis_set(
+        redis,
+        REDIS_SET_USER_IDS,
+        str(user_id),
+    )
+    if not is_valid and await exists_in_redis(
+        redis,
+        str(user_id),
+        REDIS_HASH_USER,
+    ):
+        # The user was verified before the set existed, add it now.
+        await add_user_session(redis, str(user_id))
+        is_valid = True
+    if is_valid:
+        local_cache.set(key, is_valid, ttl=settings.session_cache_ttl)
+    return is_valid
@@ -50,6 +50,45 @@ class Settings(BaseSettings):
         "ACCORD_BASE_URL",
         default="https://contentapi.accordwebservices.com/RawData",
     )
+    # Maximum number of Accord files downloaded at the same time
+    accord_fetch_concurrency: int = int(
+        os.getenv("ACCORD_FETCH_CONCURRENCY", default="4"),
+    )
+    # Seconds after which the download of a single Accord file is given up
+    accord_fetch_timeout: float = float(
+        os.getenv("ACCORD_FETCH_TIMEOUT", default="120"),
+    )
+    # Directory raw Accord responses are cached in
+    accord_cache_dir: Path = Path(
+        os.getenv("ACCORD_CACHE_DIR", default=str(TEMP_DIR / "accord")),
+    )
+    # Days raw Accord responses are kept in the cache
+    accord_cache_max_age_days: int = int(
+        os.getenv("ACCORD_CACHE_MAX_AGE_DAYS", default="7"),
+    )
+    # Seconds after which a cached Accord response of today is downloaded again
+    accord_cache_ttl: int = int(os.getenv("ACCORD_CACHE_TTL", default="3600"))
+
+    # Variables for the HTTP client shared by the API clients
+    http_max_connections: int = 20
+    http_max_keepalive_connections: int = 10
+    http_keepalive_expiry: float = 30
+    http_timeout: float = 60
+    # Needs httpx[http2]
+    http_http2: bool = False
+    http_max_retries: int = 3
+    http_retry_backoff: float = 0.5
+
+    # Variables for the in-process cache of every worker
+    local_cache_max_size: int = 10000
+    local_cache_ttl: float = 60
+    # Seconds a validated user id is trusted without asking Redis again
+    session_cache_ttl: float = 30
+    # Seconds a worker keeps its scheme search index if no scheme sync drops it
+    scheme_search_index_ttl: float = 3600 * 24
+
+    # Annual risk free rate used for Sharpe and Sortino ratios and alpha
+    risk_free_rate: float = 0.065
 
     # Variables for the database
     db_host: str = os.getenv("MYFI_BACKEND_DB_HOST", default="myfi_backend-db")
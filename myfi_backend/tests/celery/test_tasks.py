@@ -45,6 +45,9 @@ def test_fetch_amc_data_task() -> None:
         "myfi_backend.celery.tasks.accord_token",
         new="test_token",
     ) as mock_accord_token, patch(
+        "myfi_backend.celery.tasks.accord_date",
+        return_value="30092022",
+    ), patch(
         "myfi_backend.celery.tasks.parse_and_save_amc_data",
         new_callable=MagicMock,
     ) as mock_parse_and_save, patch(
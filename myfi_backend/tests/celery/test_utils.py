@@ -1,11 +1,15 @@
+from datetime import date
 from typing import Any, Callable, Coroutine, List
 from unittest.mock import AsyncMock, patch
 
 import pytest
+from redis.asyncio import Redis
+from sqlalchemy import delete, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
-from myfi_backend.celery.utils import (
+from myfi_backend.celery.utils import (  # noqa: WPS235
+    create_nav_partitions,
     insert_dummy_adviser,
     insert_dummy_amc,
     insert_dummy_organization,
@@ -14,13 +18,18 @@ from myfi_backend.celery.utils import (
     insert_dummy_scheme_navs,
     insert_dummy_schemes,
     parse_and_save_amc_data,
+    parse_and_save_scheme_data,
+    parse_and_save_scheme_nav_data,
+    rebuild_nav_summaries,
 )
 from myfi_backend.db.models.adviser_model import Adviser
 from myfi_backend.db.models.amc_model import AMC
 from myfi_backend.db.models.mutual_fund_scheme_model import MutualFundScheme
 from myfi_backend.db.models.organization_model import Organization
 from myfi_backend.db.models.portfolio_model import Portfolio, PortfolioMutualFund
-from myfi_backend.db.models.scheme_nav_model import SchemeNAV
+from myfi_backend.db.models.scheme_nav_model import SchemeNavHistory
+from myfi_backend.db.models.scheme_nav_summary_model import SchemeNavSummary
+from myfi_backend.services.scheme.nav_cache import get_nav_version
 
 
 @pytest.mark.anyio
@@ -61,6 +70,119 @@ async def test_parse_and_save_amc_data(dbsession: AsyncSession) -> None:
     assert amc_from_db.fund_name == "Test Fund"
 
 
+@pytest.mark.anyio
+async def test_parse_and_save_scheme_nav_data(
+    dbsession: AsyncSession,
+    fake_redis: Redis,
+    mutualfundscheme: MutualFundScheme,
+) -> None:
+    """Test saving scheme NAVs, unknown schemes and empty NAVs are skipped."""
+    mutualfundscheme.scheme_id = 101
+    await dbsession.commit()
+    data = {
+        "101": {
+            "nav_date": "2022-09-30T00:00:00",
+            "nav_value": "12.5",
+            "scheme_id": 101,
+        },
+        "202": {
+            "nav_date": "2022-09-30T00:00:00",
+            "nav_value": "1.5",
+            "scheme_id": 202,
+        },
+        "303": {"nav_date": "2022-09-30T00:00:00", "nav_value": "", "scheme_id": 101},
+    }
+
+    rows_written = await parse_and_save_scheme_nav_data(
+        data,
+        dbsession,
+        fake_redis,
+    )
+
+    assert rows_written == 1
+    assert await get_nav_version(fake_redis) == "1"
+    result = await dbsession.execute(
+        select(SchemeNavHistory.nav_date, SchemeNavHistory.nav).where(
+            SchemeNavHistory.scheme_id == mutualfundscheme.id,
+        ),
+    )
+    assert tuple(result.one()) == (date(2022, 9, 30), 12.5)
+    summary = await dbsession.get(SchemeNavSummary, mutualfundscheme.id)
+    assert summary is not None
+    assert summary.nav == pytest.approx(12.5)
+
+
+@pytest.mark.anyio
+async def test_create_nav_partitions(dbsession: AsyncSession) -> None:
+    """Test that only the missing NAV history partitions are created."""
+    assert await create_nav_partitions(dbsession, [2030, 2031]) == [2030, 2031]
+    assert await create_nav_partitions(dbsession, [2031, 2032]) == [2032]
+
+
+@pytest.mark.anyio
+async def test_rebuild_nav_summaries(
+    dbsession: AsyncSession,
+    scheme_with_navs: MutualFundScheme,
+) -> None:
+    """Test that the NAV summaries of all schemes are rebuilt from the history."""
+    await dbsession.execute(delete(SchemeNavSummary))
+    await dbsession.commit()
+
+    await rebuild_nav_summaries(dbsession)
+
+    result = await dbsession.execute(
+        select(SchemeNavSummary.scheme_id, SchemeNavSummary.nav),
+    )
+    assert [tuple(row) for row in result] == [(scheme_with_navs.id, 7.89)]
+
+
+@pytest.mark.anyio
+async def test_parse_and_save_scheme_data(dbsession: AsyncSession, amc: AMC) -> None:
+    """Test saving schemes, schemes of unknown AMCs are skipped."""
+    scheme_data = {
+        "scheme_plan": "Growth",
+        "scheme_type": "Equity",
+        "scheme_category": "Large Cap",
+        "nav": "12.5",
+        "cagr": "",
+        "risk_level": "High",
+        "aum": "1000",
+        "ter": "1.5",
+        "min_investment_sip": "500",
+        "exit_load": "1%",
+        "fund_manager": "Fund Manager",
+        "return_since_inception": "10",
+        "return_last_year": "5",
+        "return_last3_year": "15",
+        "return_last5_year": "25",
+        "standard_deviation": "0.05",
+        "sharpe_ratio": "1",
+        "sortino_ratio": "1",
+        "alpha": "0.1",
+        "beta": "1",
+    }
+    data = {
+        "101": {
+            **scheme_data,
+            "name": "Scheme",
+            "scheme_id": 101,
+            "amc_code": "NEWAMC",
+        },
+        "202": {**scheme_data, "name": "Other", "scheme_id": 202, "amc_code": "NA"},
+    }
+
+    counts = await parse_and_save_scheme_data(data, dbsession)
+
+    assert counts == (1, 0, 0)
+
+    result = await dbsession.execute(select(MutualFundScheme))
+    schemes = result.scalars().all()
+    assert len(schemes) == 1
+    assert schemes[0].scheme_id == 101
+    assert schemes[0].amc_id == amc.id
+    assert schemes[0].nav == pytest.approx(12.5)
+
+
 @pytest.mark.anyio
 async def test_insert_dummy_amc(dbsession: AsyncSession) -> None:
     """Test inserting dummy AMC."""
@@ -93,15 +215,13 @@ async def test_insert_dummy_schemes(dbsession: AsyncSession, amc: AMC) -> None:
 async def test_insert_dummy_scheme_navs(dbsession: AsyncSession, amc: AMC) -> None:
     """Test inserting dummy scheme NAVs."""
     schemes = await insert_dummy_schemes(dbsession, amc)
-    scheme_navs = await insert_dummy_scheme_navs(dbsession, schemes)
-    for scheme_nav in scheme_navs:
+    rows_inserted = await insert_dummy_scheme_navs(dbsession, schemes)
+    assert rows_inserted == 365 * 10 * len(schemes)
+    for scheme in schemes:
         result = await dbsession.execute(
-            select(SchemeNAV).where(SchemeNAV.id == scheme_nav.id),
+            select(func.count()).where(SchemeNavHistory.scheme_id == scheme.id),
         )
-        fetched_scheme_nav = result.scalars().first()
-        assert fetched_scheme_nav is not None
-        assert fetched_scheme_nav.nav_data is not None
-        assert fetched_scheme_nav.scheme_id in {scheme.id for scheme in schemes}
+        assert result.scalar_one() == 365 * 10
 
 
 @pytest.mark.anyio
@@ -4,8 +4,7 @@ from typing import Any, AsyncGenerator, Awaitable, Callable, Coroutine, List, Tu
 from unittest.mock import MagicMock, patch
 
 import pytest
-from fakeredis import FakeServer
-from fakeredis.aioredis import FakeConnection
+from fakeredis import FakeServer, aioredis
 from fastapi import FastAPI
 from httpx import AsyncClient
 from redis.asyncio import ConnectionPool
@@ -34,9 +33,9 @@ from myfi_backend.db.models.employee_model import Employee
 from myfi_backend.db.models.mutual_fund_scheme_model import MutualFundScheme
 from myfi_backend.db.models.organization_model import Organization
 from myfi_backend.db.models.portfolio_model import Portfolio, PortfolioMutualFund
-from myfi_backend.db.models.scheme_nav_model import SchemeNAV
 from myfi_backend.db.utils import create_database, drop_database
-from myfi_backend.services.redis.dependency import get_redis_pool
+from myfi_backend.services.local_cache.cache import LocalCache
+from myfi_backend.services.redis.dependency import get_redis
 from myfi_backend.settings import settings
 from myfi_backend.web.api.otp.schema import OtpDTO, OtpResponseDTO, UserDTO
 from myfi_backend.web.application import get_app
@@ -115,17 +114,34 @@ async def fake_redis_pool() -> AsyncGenerator[ConnectionPool, None]:
     """
     server = FakeServer()
     server.connected = True
-    pool = ConnectionPool(connection_class=FakeConnection, server=server)
+    pool = ConnectionPool(connection_class=aioredis.FakeConnection, server=server)
 
     yield pool
 
     await pool.disconnect()
 
 
+@pytest.fixture
+async def fake_redis(
+    fake_redis_pool: ConnectionPool,
+) -> AsyncGenerator[aioredis.FakeRedis, None]:
+    """
+    Get a client of the fake redis.
+
+    :param fake_redis_pool: fake redis pool.
+    :yield: Redis client using the fake redis pool.
+    """
+    redis = aioredis.FakeRedis(connection_pool=fake_redis_pool)
+
+    yield redis
+
+    await redis.close()
+
+
 @pytest.fixture
 def fastapi_app(
     dbsession: AsyncSession,
-    fake_redis_pool: ConnectionPool,
+    fake_redis: aioredis.FakeRedis,
 ) -> FastAPI:
     """
     Fixture for creating FastAPI app.
@@ -134,7 +150,13 @@ def fastapi_app(
     """
     application = get_app()
     application.dependency_overrides[get_db_session] = lambda: dbsession
-    application.dependency_overrides[get_redis_pool] = lambda: fake_redis_pool
+    application.dependency_overrides[get_redis] = lambda: fake_redis
+    application.state.local_cache = LocalCache(max_size=100, ttl=60)
+    # Sessions of their own share the connection and transaction of dbsession
+    application.state.db_session_factory = async_sessionmaker(
+        dbsession.bind,
+        expire_on_commit=False,
+    )
     return application  # noqa: WPS331
 
 
@@ -365,17 +387,17 @@ async def mutualfundscheme(dbsession: AsyncSession, amc: AMC) -> MutualFundSchem
 
 
 @pytest.fixture
-async def schemenav(
+async def scheme_with_navs(
     dbsession: AsyncSession,
     mutualfundscheme: MutualFundScheme,
-) -> SchemeNAV:
+) -> MutualFundScheme:
     """
-    Fixture for creating a SchemeNAV.
+    Fixture for creating the NAV history of a MutualFundScheme.
 
-    :return: SchemeNAV instance written to db.
+    :return: MutualFundScheme instance with NAV history and summary written to db.
     """
     schemenav_dao = SchemeNavDAO(dbsession)
-    schemenav_instance = await schemenav_dao.create(
+    await schemenav_dao.upsert(
         {
             "scheme_id": mutualfundscheme.id,
             "nav_data": {
@@ -385,8 +407,9 @@ async def schemenav(
             },
         },
     )
+    await schemenav_dao.refresh_summaries([mutualfundscheme.id])
     await dbsession.commit()
-    return schemenav_instance
+    return mutualfundscheme
 
 
 @pytest.fixture
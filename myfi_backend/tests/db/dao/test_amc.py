@@ -69,55 +69,6 @@ async def test_create_amc_with_duplicate_name(dbsession: AsyncSession) -> None:
         )
 
 
-@pytest.mark.anyio
-async def test_upsert(dbsession: AsyncSession) -> None:
-    """Test AMC upsert."""
-    # Mock amc data
-    amc_data = {
-        "name": "Test AMC",
-        "code": "123",
-        "address": "Address 1 Address 2 Address 3",
-        "email": "test@example.com",
-        "phone": "1234567890",
-        "website": "www.example.com",
-        "fund_name": "Test Fund",
-    }
-
-    # Create a DAO object using the session
-    amc_dao = AmcDAO(dbsession)
-
-    # Call upsert function
-    await amc_dao.upsert(amc_data)
-
-    amc_data_updated = {
-        "name": "Test AMC",
-        "code": "123",
-        "address": "Address 1 Address 2 Address 3",
-        "email": "test_updated@example.com",  # Updated email
-        "phone": "1234567890",
-        "website": "www.example.com",
-        "fund_name": "Test Fund",
-    }
-
-    # Call upsert function again
-    await amc_dao.upsert(amc_data_updated)
-
-    # Query the database for the inserted AMC data
-    stmt = select(AMC).where(AMC.code == amc_data["code"])
-    result = await dbsession.execute(stmt)
-    db_amc = result.scalars().first()
-
-    # Assert that the AMC data was inserted correctly
-    assert db_amc is not None
-    assert db_amc.name == amc_data["name"]
-    assert db_amc.code == amc_data["code"]
-    assert db_amc.address == amc_data["address"]
-    assert db_amc.email == amc_data_updated["email"]  # check updated email
-    assert db_amc.phone == amc_data["phone"]
-    assert db_amc.website == amc_data["website"]
-    assert db_amc.fund_name == amc_data["fund_name"]
-
-
 @pytest.mark.anyio
 async def test_amc_mutual_fund_schemes(dbsession: AsyncSession) -> None:
     """Test getting schemes for an amc."""
@@ -220,3 +171,29 @@ async def test_amc_mutual_fund_schemes(dbsession: AsyncSession) -> None:
     assert schemes_from_db[1].name == "Test Scheme 2"
     assert schemes_from_db[1].amc_id == amc.id
     assert schemes_from_db[1].id == schemes[1].id
+
+
+@pytest.mark.anyio
+async def test_upsert_many(dbsession: AsyncSession, amc: AMC) -> None:
+    """Test upserting many AMCs inserts new codes and updates existing ones."""
+    amc_data = {
+        "address": "Address",
+        "email": "test@example.com",
+        "phone": "1234567890",
+        "website": "www.example.com",
+        "fund_name": "Test Fund",
+    }
+    amc_dao = AmcDAO(dbsession)
+
+    amc_ids = await amc_dao.upsert_many(
+        [
+            {**amc_data, "name": "Test AMC", "code": "NEWAMC"},
+            {**amc_data, "name": "Other AMC", "code": "OTHER"},
+        ],
+    )
+    await dbsession.commit()
+
+    assert amc_ids["NEWAMC"] == amc.id
+    assert await amc_dao.get_code_to_id_map() == amc_ids
+    await dbsession.refresh(amc)
+    assert amc.email == "test@example.com"
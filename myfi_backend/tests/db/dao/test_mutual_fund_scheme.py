@@ -1,9 +1,14 @@
 import uuid
+from typing import Awaitable, Callable, List, Optional
 
 import pytest
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from myfi_backend.db.dao.mutual_fund_scheme_dao import MutualFundSchemeDAO
+from myfi_backend.db.dao.mutual_fund_scheme_dao import (
+    MutualFundSchemeDAO,
+    SyncCounts,
+    scheme_fingerprint,
+)
 from myfi_backend.db.models.amc_model import AMC
 from myfi_backend.db.models.mutual_fund_scheme_model import MutualFundScheme
 
@@ -98,3 +103,266 @@ async def test_get_amc_for_scheme(
     result = await dao.get_by_id(uuid.UUID(str(mutualfundscheme.id)))
     assert result is not None
     assert result.amc_id == amc.id
+
+
+@pytest.mark.anyio
+async def test_get_ids_by_codes(
+    dbsession: AsyncSession,
+    mutualfundscheme: MutualFundScheme,
+) -> None:
+    """Test resolving scheme codes to ids, unknown codes are left out."""
+    mutualfundscheme.scheme_id = 101
+    await dbsession.commit()
+    dao = MutualFundSchemeDAO(dbsession)
+
+    result = await dao.get_ids_by_codes([101, 101, 202])
+
+    assert result == {101: mutualfundscheme.id}
+    assert not await dao.get_ids_by_codes([])
+
+
+@pytest.mark.anyio
+async def test_upsert_many(
+    dbsession: AsyncSession,
+    mutualfundscheme: MutualFundScheme,
+) -> None:
+    """Test upserting many schemes inserts new codes and updates existing ones."""
+    mutualfundscheme.scheme_id = 101
+    await dbsession.commit()
+    scheme_data = {
+        "amc_id": mutualfundscheme.amc_id,
+        "scheme_plan": "Test Plan",
+        "scheme_type": "Test Type",
+        "scheme_category": "Test Category",
+        "nav": 12.0,
+        "cagr": 5.0,
+        "risk_level": "Test Risk Level",
+        "aum": 1000000.0,
+        "ter": 1.0,
+        "rating": 5,
+        "benchmark_index": "Test Benchmark Index",
+        "min_investment_sip": 500.0,
+        "min_investment_one_time": 5000.0,
+        "exit_load": "Test Exit Load",
+        "fund_manager": "Test Fund Manager",
+        "return_since_inception": 10.0,
+        "return_last_year": 5.0,
+        "return_last3_years": 15.0,
+        "return_last5_years": 25.0,
+        "standard_deviation": 0.05,
+        "sharpe_ratio": 1.0,
+        "sortino_ratio": 1.0,
+        "alpha": 0.1,
+        "beta": 1.0,
+    }
+    dao = MutualFundSchemeDAO(dbsession)
+
+    scheme_ids = await dao.upsert_many(
+        [
+            {**scheme_data, "scheme_id": 101, "name": "Test Scheme", "isin": "A"},
+            {**scheme_data, "scheme_id": 202, "name": "New Scheme", "isin": "B"},
+        ],
+    )
+    await dbsession.commit()
+
+    assert scheme_ids[101] == mutualfundscheme.id
+    await dbsession.refresh(mutualfundscheme)
+    assert mutualfundscheme.nav == pytest.approx(12)
+    new_scheme = await dao.get_by_code(202)
+    assert new_scheme is not None
+    assert new_scheme.id == scheme_ids[202]
+
+
+@pytest.mark.anyio
+async def test_sync_many(
+    dbsession: AsyncSession,
+    mutualfundscheme: MutualFundScheme,
+) -> None:
+    """Test that syncing only writes new and changed schemes."""
+    mutualfundscheme.scheme_id = 101
+    await dbsession.commit()
+    scheme_data = {
+        "amc_id": mutualfundscheme.amc_id,
+        "scheme_plan": "Test Plan",
+        "scheme_type": "Test Type",
+        "scheme_category": "Test Category",
+        "nav": 12.0,
+        "cagr": 5.0,
+        "risk_level": "Test Risk Level",
+        "aum": 1000000.0,
+        "ter": 1.0,
+        "rating": 5,
+        "benchmark_index": "Test Benchmark Index",
+        "min_investment_sip": 500.0,
+        "min_investment_one_time": 5000.0,
+        "exit_load": "Test Exit Load",
+        "fund_manager": "Test Fund Manager",
+        "return_since_inception": 10.0,
+        "return_last_year": 5.0,
+        "return_last3_years": 15.0,
+        "return_last5_years": 25.0,
+        "standard_deviation": 0.05,
+        "sharpe_ratio": 1.0,
+        "sortino_ratio": 1.0,
+        "alpha": 0.1,
+        "beta": 1.0,
+    }
+    dao = MutualFundSchemeDAO(dbsession)
+    schemes_data = [
+        {**scheme_data, "scheme_id": 101, "name": "Test Scheme", "isin": "A"},
+        {**scheme_data, "scheme_id": 202, "name": "New Scheme", "isin": "B"},
+    ]
+
+    assert await dao.sync_many(schemes_data) == SyncCounts(1, 1, 0)
+    assert await dao.sync_many(schemes_data) == SyncCounts(0, 0, 2)
+    schemes_data[1] = {**schemes_data[1], "nav": 13.0}
+    assert await dao.sync_many(schemes_data) == SyncCounts(0, 1, 1)
+    await dbsession.commit()
+
+    new_scheme = await dao.get_by_code(202)
+    assert new_scheme is not None
+    assert new_scheme.nav == pytest.approx(13)
+    assert new_scheme.fingerprint == scheme_fingerprint(schemes_data[1])
+
+
+@pytest.mark.anyio
+async def test_sync_many_name_conflicts(
+    dbsession: AsyncSession,
+    mutualfundscheme: MutualFundScheme,
+) -> None:
+    """Test that schemes with colliding names are synced without errors."""
+    mutualfundscheme.scheme_id = 101
+    await dbsession.commit()
+    scheme_data = {
+        "amc_id": mutualfundscheme.amc_id,
+        "scheme_plan": "Test Plan",
+        "scheme_type": "Test Type",
+        "scheme_category": "Test Category",
+        "nav": 12.0,
+        "cagr": 5.0,
+        "risk_level": "Test Risk Level",
+        "aum": 1000000.0,
+        "ter": 1.0,
+        "rating": 5,
+        "benchmark_index": "Test Benchmark Index",
+        "min_investment_sip": 500.0,
+        "min_investment_one_time": 5000.0,
+        "exit_load": "Test Exit Load",
+        "fund_manager": "Test Fund Manager",
+        "return_since_inception": 10.0,
+        "return_last_year": 5.0,
+        "return_last3_years": 15.0,
+        "return_last5_years": 25.0,
+        "standard_deviation": 0.05,
+        "sharpe_ratio": 1.0,
+        "sortino_ratio": 1.0,
+        "alpha": 0.1,
+        "beta": 1.0,
+    }
+    dao = MutualFundSchemeDAO(dbsession)
+
+    # the scheme code 101 of "Test Scheme" became 303, two schemes have no name
+    counts = await dao.sync_many(
+        [
+            {**scheme_data, "scheme_id": 303, "name": "Test Scheme", "isin": "A"},
+            {**scheme_data, "scheme_id": 404, "name": "NA", "isin": "B"},
+            {**scheme_data, "scheme_id": 505, "name": "NA", "isin": "C"},
+        ],
+    )
+    await dbsession.commit()
+
+    assert counts == SyncCounts(2, 1, 0)
+    await dbsession.refresh(mutualfundscheme)
+    assert mutualfundscheme.scheme_id == 303
+    assert await _name_of(dao, 404) == "NA (404)"
+    assert await _name_of(dao, 505) == "NA (505)"
+
+    # "Test Scheme" is renamed while another scheme takes its name
+    await dao.sync_many(
+        [
+            {**scheme_data, "scheme_id": 303, "name": "Old Scheme", "isin": "A"},
+            {**scheme_data, "scheme_id": 404, "name": "Test Scheme", "isin": "B"},
+        ],
+    )
+    await dbsession.commit()
+
+    await dbsession.refresh(mutualfundscheme)
+    assert mutualfundscheme.name == "Old Scheme"
+    assert await _name_of(dao, 404) == "Test Scheme (404)"
+
+
+async def _name_of(dao: MutualFundSchemeDAO, scheme_code: int) -> Optional[str]:
+    scheme = await dao.get_by_code(scheme_code)
+    return scheme.name if scheme else None
+
+
+@pytest.mark.anyio
+async def test_get_page(
+    dbsession: AsyncSession,
+    mutualfundschemes_factory: Callable[[int], Awaitable[List[MutualFundScheme]]],
+) -> None:
+    """Test walking the pages of a sorted and filtered catalogue by keyset."""
+    schemes = await mutualfundschemes_factory(5)
+    for aum, scheme in zip([300, 100, 300, 200, 400], schemes):
+        scheme.aum = aum
+    schemes[4].scheme_category = "Other Category"
+    await dbsession.commit()
+    dao = MutualFundSchemeDAO(dbsession)
+    filters = {"scheme_category": "Test Category"}
+
+    first_page = await dao.get_page(filters, "aum", descending=True, limit=2)
+    last = first_page[-1]
+    second_page = await dao.get_page(
+        filters,
+        "aum",
+        descending=True,
+        limit=2,
+        after=(last.aum, last.id),
+    )
+
+    ties = sorted([schemes[0], schemes[2]], key=lambda tie: tie.id, reverse=True)
+    assert list(first_page) == ties
+    assert list(second_page) == [schemes[3], schemes[1]]
+
+
+@pytest.mark.anyio
+async def test_stream_export(
+    dbsession: AsyncSession,
+    scheme_with_navs: MutualFundScheme,
+    mutualfundschemes_factory: Callable[[int], Awaitable[List[MutualFundScheme]]],
+) -> None:
+    """Test streaming every scheme with its latest NAV in small batches."""
+    schemes = await mutualfundschemes_factory(2)
+    dao = MutualFundSchemeDAO(dbsession)
+
+    rows = [dict(row) async for row in dao.stream_export(batch_size=1)]
+
+    rows_by_id = {row["id"]: row for row in rows}
+    assert set(rows_by_id) == {scheme_with_navs.id, *(each.id for each in schemes)}
+    exported = rows_by_id[scheme_with_navs.id]
+    assert exported["name"] == scheme_with_navs.name
+    assert str(exported["latest_nav_date"]) == "2023-01-03"
+    assert exported["latest_nav"] == pytest.approx(7.89)
+    assert "fingerprint" not in exported
+    assert rows_by_id[schemes[0].id]["latest_nav"] is None
+
+
+@pytest.mark.anyio
+async def test_stream_iter_all_and_page(
+    dbsession: AsyncSession,
+    mutualfundschemes_factory: Callable[[int], Awaitable[List[MutualFundScheme]]],
+) -> None:
+    """Test reading all schemes by cursor, in chunks and by keyset pages."""
+    schemes = await mutualfundschemes_factory(5)
+    scheme_ids = sorted(scheme.id for scheme in schemes)
+    dao = MutualFundSchemeDAO(dbsession)
+
+    streamed = [scheme.id async for scheme in dao.stream(batch_size=2)]
+    chunks = [list(chunk) async for chunk in dao.iter_all(chunk_size=2)]
+    first_page = await dao.page(None, limit=3)
+    second_page = await dao.page(first_page[-1].id, limit=3)
+
+    assert sorted(streamed) == scheme_ids
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    paged_ids = [scheme.id for scheme in (*first_page, *second_page)]
+    assert paged_ids == scheme_ids
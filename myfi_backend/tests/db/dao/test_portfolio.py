@@ -211,3 +211,51 @@ async def test_get_portfolio_mutual_fund_by_id(
     )
     # Check that the fetched PortfolioMutualFund is the same as the original one
     assert fetched_portfolio_mutualfundscheme == portfolio_mutualfundscheme
+
+
+@pytest.mark.anyio
+async def test_get_all_proportions(
+    dbsession: AsyncSession,
+    portfolio_mutualfundscheme: PortfolioMutualFund,
+) -> None:
+    """Test getting the proportions of the schemes of all portfolios."""
+    portfolio_mutualfundscheme_dao = PortfolioMutualFundDAO(dbsession)
+    proportions = await portfolio_mutualfundscheme_dao.get_all_proportions()
+    assert list(proportions) == [
+        (
+            portfolio_mutualfundscheme.portfolio_id,
+            portfolio_mutualfundscheme.mutualfundscheme_id,
+            100,
+        ),
+    ]
+
+
+@pytest.mark.anyio
+async def test_update_many_portfolios(
+    dbsession: AsyncSession,
+    portfolio: Portfolio,
+) -> None:
+    """Test updating columns of many portfolios at once."""
+    portfolio_dao = PortfolioDAO(dbsession)
+    updated = await portfolio_dao.update_many(
+        {portfolio.id: {"one_year_return": 12.5, "five_year_return": None}},
+    )
+    await dbsession.commit()
+    await dbsession.refresh(portfolio)
+    assert updated == 1
+    assert portfolio.one_year_return == pytest.approx(12.5)
+    assert portfolio.five_year_return is None
+
+
+@pytest.mark.anyio
+async def test_get_all_columns(dbsession: AsyncSession, portfolio: Portfolio) -> None:
+    """Test selecting some columns of all portfolios without loading instances."""
+    dao = PortfolioDAO(dbsession)
+    expected = (portfolio.id, portfolio.name)
+    dbsession.expunge_all()
+
+    rows = await dao.get_all_columns(["id", "name"])
+
+    assert [tuple(row) for row in rows] == [expected]
+    assert rows[0].name == expected[1]
+    assert not dbsession.identity_map
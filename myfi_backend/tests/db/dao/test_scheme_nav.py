@@ -1,106 +1,273 @@
 import uuid
+from datetime import date
 
 import pytest
+from sqlalchemy import func, select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from myfi_backend.db.dao.scheme_nav_dao import SchemeNavDAO
+from myfi_backend.db.dao.scheme_nav_dao import (
+    SchemeNavDAO,
+    parse_nav_date,
+    partition_name,
+)
 from myfi_backend.db.models.mutual_fund_scheme_model import MutualFundScheme
-from myfi_backend.db.models.scheme_nav_model import SchemeNAV
+from myfi_backend.db.models.scheme_nav_model import (
+    NAV_HISTORY_DEFAULT_PARTITION,
+    SchemeNavHistory,
+)
+
+
+def test_parse_nav_date() -> None:
+    """Test parsing NAV dates in the formats used by the feeds."""
+    assert parse_nav_date("2022-01-01") == date(2022, 1, 1)
+    assert parse_nav_date("2022-01-01T00:00:00") == date(2022, 1, 1)
+    assert parse_nav_date(date(2022, 1, 1)) == date(2022, 1, 1)
 
 
 @pytest.mark.anyio
 async def test_get_by_scheme_id_success(
     dbsession: AsyncSession,
-    schemenav: SchemeNAV,
+    scheme_with_navs: MutualFundScheme,
 ) -> None:
-    """Test getting a SchemeNAV by scheme_id."""
+    """Test getting the NAV history of a scheme sorted by date."""
     dao = SchemeNavDAO(dbsession)
-    result = await dao.get_by_scheme_id(uuid.UUID(str(schemenav.scheme_id)))
-    assert result is not None
+    result = await dao.get_by_scheme_id(scheme_with_navs.id)
+    assert result == {
+        "2019-01-03": 1.23,
+        "2021-01-03": 4.56,
+        "2023-01-03": 7.89,
+    }
 
 
 @pytest.mark.anyio
 async def test_get_by_scheme_id_failure(dbsession: AsyncSession) -> None:
-    """Test getting a SchemeNAV by a non-existent scheme_id."""
+    """Test getting the NAV history of a non-existent scheme_id."""
     dao = SchemeNavDAO(dbsession)
     result = await dao.get_by_scheme_id(
         uuid.UUID("00000000-0000-0000-0000-000000000000"),
     )  # non-existent scheme_id
-    assert result is None
+    assert not result
 
 
 @pytest.mark.anyio
-async def test_create_success(
-    mutualfundscheme: MutualFundScheme,
+async def test_upsert_success(
     dbsession: AsyncSession,
+    scheme_with_navs: MutualFundScheme,
 ) -> None:
-    """Test creating a new SchemeNAV."""
+    """Test upserting adds new dates and overwrites existing ones."""
     dao = SchemeNavDAO(dbsession)
-    result = await dao.create(
+    rows_written = await dao.upsert(
         {
-            "scheme_id": mutualfundscheme.id,
-            "nav_data": {"2022-01-01": 10.0},
+            "scheme_id": scheme_with_navs.id,
+            "nav_data": {"2022-01-03": 30.0, "2023-01-03T00:00:00": 31.0},
         },
     )
-    assert result is not None
-    result_by_id = await dao.get_by_scheme_id(uuid.UUID(str(result.scheme_id)))
-    assert result_by_id is not None
-    assert result_by_id.nav_data == {"2022-01-01": 10.0}  # type: ignore
+
+    assert rows_written == 2
+    result = await dao.get_by_scheme_id(scheme_with_navs.id)
+    assert result == {
+        "2019-01-03": 1.23,
+        "2021-01-03": 4.56,
+        "2022-01-03": 30.0,
+        "2023-01-03": 31.0,
+    }
 
 
 @pytest.mark.anyio
-async def test_update_success(
+async def test_upsert_invalid_nav_data(
     dbsession: AsyncSession,
-    schemenav: SchemeNAV,
+    mutualfundscheme: MutualFundScheme,
 ) -> None:
-    """Test updating a SchemeNAV."""
+    """Test upserting NAV data which is not a dictionary writes nothing."""
     dao = SchemeNavDAO(dbsession)
-    schemenav.nav_data = {"2022-01-02": 20.0}  # type: ignore
-    await dao.update(schemenav)
-    result = await dao.get_by_scheme_id(uuid.UUID(str(schemenav.scheme_id)))
-    assert result is not None
-    assert result.nav_data == {"2022-01-02": 20.0}  # type: ignore
+    rows_written = await dao.upsert(
+        {"scheme_id": mutualfundscheme.id, "nav_data": []},  # type: ignore
+    )
+    assert rows_written == 0
 
 
 @pytest.mark.anyio
-async def test_upsert_success(
+async def test_add_latest_nav_success(
     dbsession: AsyncSession,
-    schemenav: SchemeNAV,
+    scheme_with_navs: MutualFundScheme,
 ) -> None:
-    """Test upserting a SchemeNAV."""
+    """Test adding the latest NAV inserts a single row."""
+    dao = SchemeNavDAO(dbsession)
+    await dao.add_latest_nav(scheme_with_navs.id, "2024-01-04", 40.0)
+
+    result = await dbsession.execute(
+        select(func.count()).where(
+            SchemeNavHistory.scheme_id == scheme_with_navs.id,
+        ),
+    )
+    assert result.scalar_one() == 4
+    nav_data = await dao.get_by_scheme_id(scheme_with_navs.id)
+    assert nav_data["2024-01-04"] == pytest.approx(40)
+
+
+@pytest.mark.anyio
+async def test_get_by_scheme_id_bucketed(
+    dbsession: AsyncSession,
+    mutualfundscheme: MutualFundScheme,
+) -> None:
+    """Test that bucketing returns the last NAV of every bucket in the range."""
     dao = SchemeNavDAO(dbsession)
-    new_nav_data = {"2022-01-03": 30.0, "2023-01-03": 30.0}
     await dao.upsert(
         {
-            "scheme_id": schemenav.scheme_id,
-            "nav_data": new_nav_data,
+            "scheme_id": mutualfundscheme.id,
+            "nav_data": {
+                "2022-01-03": 1.0,
+                "2022-01-05": 2.0,
+                "2022-01-10": 3.0,
+                "2022-02-01": 4.0,
+                "2022-02-07": 5.0,
+            },
         },
     )
 
-    # Retrieve the updated SchemeNAV from the database
-    result = await dao.get_by_id(schemenav.id)
+    weekly = await dao.get_by_scheme_id(mutualfundscheme.id, bucket="week")
+    assert weekly == {
+        "2022-01-05": 2.0,
+        "2022-01-10": 3.0,
+        "2022-02-01": 4.0,
+        "2022-02-07": 5.0,
+    }
+    monthly = await dao.get_by_scheme_id(
+        mutualfundscheme.id,
+        to_date=date(2022, 2, 6),
+        bucket="month",
+    )
+    assert monthly == {"2022-01-10": 3.0, "2022-02-01": 4.0}
+
+
+@pytest.mark.anyio
+async def test_upsert_many_success(
+    dbsession: AsyncSession,
+    scheme_with_navs: MutualFundScheme,
+    mutualfundscheme: MutualFundScheme,
+) -> None:
+    """Test writing NAVs of several schemes, the last NAV of a day wins."""
+    dao = SchemeNavDAO(dbsession)
+    rows_written = await dao.upsert_many(
+        [
+            (scheme_with_navs.id, "2023-01-03", 8.0),
+            (scheme_with_navs.id, "2024-01-03", 9.0),
+            (scheme_with_navs.id, date(2024, 1, 3), 10.0),
+        ],
+    )
+
+    assert rows_written == 2
+    result = await dao.get_by_scheme_id(mutualfundscheme.id)
+    assert result == {
+        "2019-01-03": 1.23,
+        "2021-01-03": 4.56,
+        "2023-01-03": 8.0,
+        "2024-01-03": 10.0,
+    }
+    assert await dao.upsert_many([]) == 0
+
+
+@pytest.mark.anyio
+async def test_get_last_navs(
+    dbsession: AsyncSession,
+    mutualfundscheme: MutualFundScheme,
+) -> None:
+    """Test getting the last NAV of schemes on or before a date."""
+    dao = SchemeNavDAO(dbsession)
+    await dao.upsert_many(
+        [
+            (mutualfundscheme.id, "2020-01-01", 1.0),
+            (mutualfundscheme.id, "2022-06-30", 2.0),
+        ],
+    )
 
-    assert result is not None
-    for item in new_nav_data.items():
-        assert item in result.nav_data.items()  # type: ignore
+    assert await dao.get_last_navs(
+        date(2022, 6, 29),
+        scheme_ids=[mutualfundscheme.id],
+    ) == {mutualfundscheme.id: (date(2020, 1, 1), 1.0)}
+    assert await dao.get_last_navs(date(2022, 6, 30)) == {
+        mutualfundscheme.id: (date(2022, 6, 30), 2.0),
+    }
+    assert not await dao.get_last_navs(date(2019, 12, 31))
 
 
 @pytest.mark.anyio
-async def test_add_latest_nav_success(
+async def test_refresh_summaries(
     dbsession: AsyncSession,
-    schemenav: SchemeNAV,
+    mutualfundscheme: MutualFundScheme,
 ) -> None:
-    """Test adding the latest NAV to a SchemeNAV."""
+    """Test that refreshing the NAV summary of a scheme follows its NAVs."""
     dao = SchemeNavDAO(dbsession)
-    await dao.add_latest_nav(schemenav.scheme_id, "2022-01-04", 40.0)
+    await dao.upsert_many(
+        [
+            (mutualfundscheme.id, "2019-01-01", 50.0),
+            (mutualfundscheme.id, "2021-01-01", 80.0),
+            (mutualfundscheme.id, "2023-01-01", 90.0),
+            (mutualfundscheme.id, "2023-06-01", 120.0),
+            (mutualfundscheme.id, "2023-12-29", 100.0),
+        ],
+    )
+    # writing NAVs doesn't refresh the summary
+    assert await dao.get_summary(mutualfundscheme.id) is None
+    await dao.refresh_summaries([mutualfundscheme.id])
 
-    # Retrieve the updated SchemeNAV from the database
-    await dao.get_by_id(schemenav.id)
+    summary = await dao.get_summary(mutualfundscheme.id)
+    assert summary is not None
+    assert summary.nav_date == date(2023, 12, 29)
+    assert summary.previous_nav == pytest.approx(120.0)
+    assert summary.day_change == pytest.approx(-100 / 6)
+    assert (summary.week52_low, summary.week52_high) == (90.0, 120.0)
+    assert summary.return_last_year == pytest.approx(25)
+    assert summary.return_last3_years == pytest.approx(100)
+    assert summary.return_last5_years is None
 
-    # Retrieve the updated SchemeNAV from the database
-    result = await dao.get_by_id(schemenav.id)
+    await dao.add_latest_nav(mutualfundscheme.id, "2024-01-01", 110.0)
+    await dao.refresh_summaries([mutualfundscheme.id])
+    await dbsession.refresh(summary)
 
-    assert result is not None
-    assert ("2022-01-04", 40.0) in result.nav_data.items()  # type: ignore
-    for item in schemenav.nav_data.items():  # type: ignore
-        assert item in result.nav_data.items()  # type: ignore
+    assert summary.nav == pytest.approx(110.0)
+    assert summary.day_change == pytest.approx(10)
+    assert await dao.get_summaries([mutualfundscheme.id, uuid.uuid4()]) == {
+        mutualfundscheme.id: summary,
+    }
+
+
+@pytest.mark.anyio
+async def test_create_year_partition(
+    dbsession: AsyncSession,
+    mutualfundscheme: MutualFundScheme,
+) -> None:
+    """Test that NAVs move to a new year partition and date ranges prune others."""
+    dao = SchemeNavDAO(dbsession)
+    await dao.upsert_many(
+        [
+            (mutualfundscheme.id, "2020-12-31", 1.0),
+            (mutualfundscheme.id, "2021-06-30", 2.0),
+        ],
+    )
+    await dao.upsert_many([(mutualfundscheme.id, "2021-03-31", 3.0)])
+
+    assert await dao.create_year_partition(2021)
+    assert not await dao.create_year_partition(2021)
+
+    partition = partition_name(2021)
+    # Without an ORDER BY rows are read in the order they were written.
+    partition_navs = await dbsession.execute(
+        text(f"SELECT nav FROM {partition}"),  # noqa: S608
+    )
+    assert partition_navs.scalars().all() == [3.0, 2.0]
+    navs = await dao.get_by_scheme_id(
+        mutualfundscheme.id,
+        from_date=date(2021, 1, 1),
+        to_date=date(2021, 12, 31),
+    )
+    assert navs == {"2021-03-31": 3.0, "2021-06-30": 2.0}
+    plan = await dbsession.execute(
+        text(
+            "EXPLAIN SELECT nav FROM scheme_nav_history "
+            "WHERE nav_date BETWEEN '2021-01-01' AND '2021-12-31'",
+        ),
+    )
+    scanned = " ".join(plan.scalars())
+    assert partition in scanned
+    assert NAV_HISTORY_DEFAULT_PARTITION not in scanned
@@ -0,0 +1,23 @@
+import uuid
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from myfi_backend.db.dao.user_holding_dao import UserHoldingDAO
+from myfi_backend.db.models.mutual_fund_scheme_model import MutualFundScheme
+
+
+@pytest.mark.anyio
+async def test_upsert_and_get_units(
+    dbsession: AsyncSession,
+    mutualfundscheme: MutualFundScheme,
+) -> None:
+    """Test that the units of a holding are set and overwritten."""
+    dao = UserHoldingDAO(dbsession)
+    user_id = uuid.uuid4()
+
+    await dao.upsert(user_id, mutualfundscheme.id, 10)
+    await dao.upsert(user_id, mutualfundscheme.id, 12.5)
+
+    assert await dao.get_units_by_user_id(user_id) == {mutualfundscheme.id: 12.5}
+    assert not await dao.get_units_by_user_id(uuid.uuid4())
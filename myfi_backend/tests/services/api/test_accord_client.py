@@ -1,8 +1,35 @@
+import asyncio
+import datetime
+import json
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Optional
 from unittest.mock import AsyncMock, patch
 
 import pytest
+from prometheus_client import REGISTRY
 
-from myfi_backend.services.api.accord_client import AmcClient
+from myfi_backend.services.api.accord_client import AccordFile, AmcClient, accord_date
+from myfi_backend.services.api.feed_cache import FeedCache
+from myfi_backend.settings import settings
+
+
+def _fetch_count(filename: str, source: str = "network") -> float:
+    sample: Optional[float] = REGISTRY.get_sample_value(
+        "accord_file_fetch_seconds_count",
+        {"file": filename, "section": "MFMaster", "source": source},
+    )
+    return sample or 0
+
+
+async def _slow_stream_amc_data(**params: str) -> AsyncIterator[Dict[str, Any]]:
+    await asyncio.sleep(1)
+    yield {}
+
+
+def test_accord_date() -> None:
+    """Test that days are formatted as the Accord API expects."""
+    assert accord_date(datetime.date(2022, 9, 30)) == "30092022"
+    assert accord_date() == datetime.date.today().strftime("%d%m%Y")
 
 
 @pytest.mark.anyio
@@ -44,3 +71,135 @@ async def test_fetch_amc_data() -> None:
 
         # Assert that the function returned the correct result
         assert result == api_response
+
+
+@pytest.mark.anyio
+async def test_fetch_amc_files() -> None:
+    """Test fetching files concurrently without exceeding the concurrency limit."""
+    running = []
+    max_running = []
+
+    async def stream_amc_data(  # noqa: WPS430
+        **params: str,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        running.append(params["filename"])
+        max_running.append(len(running))
+        await asyncio.sleep(0.01)
+        running.remove(params["filename"])
+        for code in range(2):
+            yield {"code": code, "name": params["filename"], "other": "dropped"}
+
+    amc_client = AmcClient("test_base_url")
+    files = [
+        AccordFile(f"file_{index}", "MFMaster", key="code", columns={"n": "name"})
+        for index in range(5)
+    ]
+    fetches = _fetch_count("file_3")
+    with patch.object(amc_client, "stream_amc_data", new=stream_amc_data):
+        result = await amc_client.fetch_amc_files(
+            files,
+            date="30092022",
+            token="test_token",  # noqa: S106
+            concurrency=2,
+            timeout=1,
+        )
+
+    assert result["file_3"] == {0: {"n": "file_3"}, 1: {"n": "file_3"}}
+    assert len(result) == 5
+    assert max(max_running) == 2
+    assert _fetch_count("file_3") == fetches + 1
+
+
+@pytest.mark.anyio
+async def test_fetch_amc_files_timeout() -> None:
+    """Test that a file taking longer than the timeout fails the fetch."""
+    amc_client = AmcClient("test_base_url")
+    with patch.object(amc_client, "stream_amc_data", new=_slow_stream_amc_data):
+        with pytest.raises(asyncio.TimeoutError):
+            await amc_client.fetch_amc_files(
+                [AccordFile("Scheme_Details", "MFMaster", key="code", columns={})],
+                date="30092022",
+                token="test_token",  # noqa: S106
+                concurrency=2,
+                timeout=0.01,
+            )
+
+
+@pytest.mark.anyio
+async def test_fetch_amc_files_cached(tmp_path: Path) -> None:
+    """Test that cached files are read from the cache instead of downloaded."""
+    body = json.dumps({"Table": [{"plan_code": 1, "plan": "Growth"}]}).encode()
+    cache = FeedCache(tmp_path)
+    plan_file = AccordFile(
+        "Plan_mst",
+        "MFMaster",
+        key="plan_code",
+        columns={"scheme_plan": "plan"},
+    )
+    amc_client = AmcClient("test_base_url")
+    downloads = []
+    fetches, reads = _fetch_count("Plan_mst"), _fetch_count("Plan_mst", "cache")
+
+    async def stream_bytes(  # noqa: WPS430
+        endpoint: str,
+        params: Dict[str, Any],
+    ) -> AsyncIterator[bytes]:
+        downloads.append(params["filename"])
+        yield body
+
+    with patch.object(amc_client, "stream_bytes", new=stream_bytes):
+        for _ in range(2):
+            entries = await amc_client.cache_amc_files(
+                [plan_file],
+                date="30092022",
+                token="test_token",  # noqa: S106
+                concurrency=2,
+                timeout=1,
+                cache=cache,
+            )
+        result = await amc_client.fetch_amc_files(
+            [plan_file],
+            date="30092022",
+            token="test_token",  # noqa: S106
+            concurrency=2,
+            timeout=1,
+            cache=cache,
+        )
+
+    assert downloads == ["Plan_mst"]
+    assert _fetch_count("Plan_mst") == fetches + 1
+    assert _fetch_count("Plan_mst", "cache") == reads + 1
+    assert entries["Plan_mst"].path.read_bytes() == body
+    assert result == {"Plan_mst": {1: {"scheme_plan": "Growth"}}}
+
+
+@pytest.mark.anyio
+async def test_cache_amc_files_expired(tmp_path: Path) -> None:
+    """Test that an expired response of today is downloaded again."""
+    cache = FeedCache(tmp_path)
+    plan_file = AccordFile("Plan_mst", "MFMaster", key="plan_code", columns={})
+    amc_client = AmcClient("test_base_url")
+    bodies = [{"Table": [{"plan_code": code}]} for code in range(2)]
+
+    async def stream_bytes(  # noqa: WPS430
+        endpoint: str,
+        params: Dict[str, Any],
+    ) -> AsyncIterator[bytes]:
+        yield json.dumps(bodies.pop(0)).encode()
+
+    with patch.object(amc_client, "stream_bytes", new=stream_bytes):
+        with patch.object(settings, "accord_cache_ttl", 0):
+            for _ in range(2):
+                entries = await amc_client.cache_amc_files(
+                    [plan_file],
+                    date=accord_date(),
+                    token="test_token",  # noqa: S106
+                    concurrency=1,
+                    timeout=1,
+                    cache=cache,
+                )
+
+    assert not bodies
+    assert json.loads(entries["Plan_mst"].path.read_bytes()) == {
+        "Table": [{"plan_code": 1}],
+    }
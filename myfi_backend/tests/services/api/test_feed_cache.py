@@ -0,0 +1,169 @@
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import AsyncIterator, List
+
+import pytest
+
+from myfi_backend.services.api.feed_cache import FeedCache
+
+
+async def _chunks(body: bytes) -> AsyncIterator[bytes]:
+    for start in range(0, len(body), 5):
+        yield body[start : start + 5]
+
+
+def _body(*rows: object) -> bytes:
+    return json.dumps({"Table": rows}).encode()
+
+
+@pytest.mark.anyio
+async def test_store_and_get(tmp_path: Path) -> None:
+    """Test that responses are stored once per content and found by their key."""
+    cache = FeedCache(tmp_path)
+    body = json.dumps({"Table": [{"plan_code": 1, "plan": "Growth"}]}).encode()
+
+    assert cache.get("Plan_mst", "MFMaster", "30092022") is None
+    entry = await cache.store(
+        "Plan_mst",
+        "MFMaster",
+        "30092022",
+        _chunks(body),
+        "Table",
+    )
+    next_entry = await cache.store(
+        "Plan_mst",
+        "MFMaster",
+        "01102022",
+        _chunks(body),
+        "Table",
+    )
+
+    assert cache.get("Plan_mst", "MFMaster", "30092022") == entry
+    assert entry.size == len(body)
+    assert entry.path.read_bytes() == body
+    assert next_entry.path == entry.path
+    assert len(list((tmp_path / "blobs").iterdir())) == 1
+
+
+@pytest.mark.anyio
+async def test_stream_rows(tmp_path: Path) -> None:
+    """Test streaming the rows of a cached response."""
+    cache = FeedCache(tmp_path)
+    rows = [{"schemecode": code, "s_name": "Fund ₹"} for code in range(3)]
+    body = json.dumps({"Table": rows}, ensure_ascii=False).encode()
+    entry = await cache.store(
+        "Scheme_Details",
+        "MFMaster",
+        "30092022",
+        _chunks(body),
+        "Table",
+    )
+
+    streamed: List[object] = [row async for row in cache.stream_rows(entry, "Table")]
+
+    assert streamed == rows
+
+
+@pytest.mark.anyio
+async def test_is_imported(tmp_path: Path) -> None:
+    """Test that a response counts as imported if the last import had its hash."""
+    cache = FeedCache(tmp_path)
+    entry = await cache.store(
+        "Plan_mst",
+        "MFMaster",
+        "30092022",
+        _chunks(_body(1)),
+        "Table",
+    )
+    same_entry = await cache.store(
+        "Plan_mst",
+        "MFMaster",
+        "01102022",
+        _chunks(_body(1)),
+        "Table",
+    )
+    new_entry = await cache.store(
+        "Plan_mst",
+        "MFMaster",
+        "02102022",
+        _chunks(_body(2)),
+        "Table",
+    )
+
+    assert not cache.is_imported(entry)
+    cache.mark_imported(entry)
+    assert cache.is_imported(same_entry)
+    assert not cache.is_imported(new_entry)
+
+
+async def _failing_chunks() -> AsyncIterator[bytes]:
+    yield b'{"Table": ['
+    raise ConnectionError("Connection lost")
+
+
+@pytest.mark.anyio
+async def test_store_failure(tmp_path: Path) -> None:
+    """Test that a failed download leaves neither a blob nor an entry behind."""
+    cache = FeedCache(tmp_path)
+
+    with pytest.raises(ConnectionError):
+        await cache.store(
+            "Plan_mst",
+            "MFMaster",
+            "30092022",
+            _failing_chunks(),
+            "Table",
+        )
+
+    assert not list((tmp_path / "blobs").iterdir())
+    assert cache.get("Plan_mst", "MFMaster", "30092022") is None
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("body", [b"", b'{"Table": [{"plan_code": 1}', b"<html>"])
+async def test_store_invalid(tmp_path: Path, body: bytes) -> None:
+    """Test that empty, truncated or unparsable responses aren't stored."""
+    cache = FeedCache(tmp_path)
+
+    with pytest.raises(ValueError):
+        await cache.store("Plan_mst", "MFMaster", "30092022", _chunks(body), "Table")
+
+    assert not list((tmp_path / "blobs").iterdir())
+    assert cache.get("Plan_mst", "MFMaster", "30092022") is None
+
+
+@pytest.mark.anyio
+async def test_evict(tmp_path: Path) -> None:
+    """Test that old entries are evicted with the blobs only they referenced."""
+    cache = FeedCache(tmp_path)
+    imported = await cache.store(
+        "Plan_mst",
+        "MFMaster",
+        "28092022",
+        _chunks(_body(1)),
+        "Table",
+    )
+    old = await cache.store(
+        "Plan_mst",
+        "MFMaster",
+        "29092022",
+        _chunks(_body(2)),
+        "Table",
+    )
+    cache.mark_imported(imported)
+    cutoff = datetime.now(timezone.utc)
+    recent = await cache.store(
+        "Plan_mst",
+        "MFMaster",
+        "30092022",
+        _chunks(_body(3)),
+        "Table",
+    )
+
+    assert cache.evict(cutoff) == 1
+
+    assert cache.get("Plan_mst", "MFMaster", "29092022") is None
+    assert not old.path.exists()
+    assert imported.path.exists()
+    assert cache.get("Plan_mst", "MFMaster", "30092022") == recent
@@ -1,9 +1,18 @@
+import json
+from typing import AsyncIterator
 from unittest.mock import AsyncMock, patch
 
 import pytest
-from httpx import Response
+from httpx import (
+    AsyncClient,
+    HTTPStatusError,
+    MockTransport,
+    ReadTimeout,
+    Request,
+    Response,
+)
 
-from myfi_backend.services.api.http_client import HttpClient
+from myfi_backend.services.api.http_client import HttpClient, HttpClientPool
 
 
 @pytest.mark.anyio
@@ -32,3 +41,141 @@ async def test_fetch_data() -> None:
 
         # Assert that the function returned the correct result
         assert result == api_response
+
+
+@pytest.mark.anyio
+async def test_fetch_data_retries() -> None:
+    """Test that server errors and timeouts are retried."""
+    http_client = HttpClient("http://test.com")
+    http_client.retry_backoff = 0
+    server_error = AsyncMock(spec=Response, status_code=503)
+    success = AsyncMock(spec=Response, status_code=200)
+    success.json.return_value = {"data": "Test data"}
+
+    with patch("httpx.AsyncClient.get", new_callable=AsyncMock) as mock_get:
+        mock_get.side_effect = [ReadTimeout("timeout"), server_error, success]
+        result = await http_client.fetch_data("test_endpoint", {})
+        assert mock_get.call_count == 3
+
+    assert result == {"data": "Test data"}
+
+
+@pytest.mark.anyio
+async def test_fetch_data_gives_up() -> None:
+    """Test that the error of the last attempt is raised."""
+    http_client = HttpClient("http://test.com")
+    http_client.retry_backoff = 0
+
+    with patch("httpx.AsyncClient.get", new_callable=AsyncMock) as mock_get:
+        mock_get.side_effect = ReadTimeout("timeout")
+        with pytest.raises(ReadTimeout):
+            await http_client.fetch_data("test_endpoint", {})
+        assert mock_get.call_count == http_client.max_retries
+
+
+@pytest.mark.anyio
+async def test_fetch_data_max_retries() -> None:
+    """Test that max_retries is the total number of requests."""
+    http_client = HttpClient("http://test.com")
+    http_client.retry_backoff = 0
+    http_client.max_retries = 2
+    server_error = AsyncMock(spec=Response, status_code=503)
+    server_error.raise_for_status.side_effect = RuntimeError("503")
+
+    with patch("httpx.AsyncClient.get", new_callable=AsyncMock) as mock_get:
+        mock_get.return_value = server_error
+        with pytest.raises(RuntimeError):
+            await http_client.fetch_data("test_endpoint", {})
+        assert mock_get.call_count == 2
+
+        http_client.max_retries = 1
+        mock_get.reset_mock()
+        with pytest.raises(RuntimeError):
+            await http_client.fetch_data("test_endpoint", {})
+        mock_get.assert_called_once()
+
+
+@pytest.mark.anyio
+async def test_http_client_pool() -> None:
+    """Test that the pool hands out one client until it is closed."""
+    pool = HttpClientPool()
+    client = pool.get()
+    assert pool.get() is client
+
+    await pool.close()
+    assert client.is_closed
+    assert pool.get() is not client
+    await pool.close()
+
+
+@pytest.mark.anyio
+async def test_stream_rows() -> None:
+    """Test streaming the rows of a JSON response."""
+    rows = [{"schemecode": code} for code in range(3)]
+
+    def handler(request: Request) -> Response:  # noqa: WPS430
+        assert request.url.params["key"] == "value"
+        return Response(200, content=json.dumps({"Table": rows}).encode())
+
+    http_client = HttpClient(
+        "http://test.com",
+        client=AsyncClient(transport=MockTransport(handler)),
+    )
+    streamed = [
+        row
+        async for row in http_client.stream_rows(
+            "test_endpoint",
+            {"key": "value"},
+            "Table",
+        )
+    ]
+    await http_client.close()
+
+    assert streamed == rows
+
+
+async def _join(chunks: AsyncIterator[bytes]) -> bytes:
+    return b"".join([chunk async for chunk in chunks])
+
+
+@pytest.mark.anyio
+async def test_download_retries() -> None:
+    """Test that downloads are retried on server errors and timeouts."""
+    responses = [503, 200]
+
+    def handler(request: Request) -> Response:  # noqa: WPS430
+        if not responses:
+            raise ReadTimeout("timeout", request=request)
+        return Response(responses.pop(0), content=b"body")
+
+    http_client = HttpClient(
+        "http://test.com",
+        client=AsyncClient(transport=MockTransport(handler)),
+    )
+    http_client.retry_backoff = 0
+    body = await http_client.download("test_endpoint", {}, _join)
+
+    assert body == b"body"
+    with pytest.raises(ReadTimeout):
+        await http_client.download("test_endpoint", {}, _join)
+    await http_client.close()
+
+
+@pytest.mark.anyio
+async def test_download_client_error() -> None:
+    """Test that client errors aren't retried."""
+    requests = []
+
+    def handler(request: Request) -> Response:  # noqa: WPS430
+        requests.append(request)
+        return Response(404)
+
+    http_client = HttpClient(
+        "http://test.com",
+        client=AsyncClient(transport=MockTransport(handler)),
+    )
+    with pytest.raises(HTTPStatusError):
+        await http_client.download("test_endpoint", {}, _join)
+    await http_client.close()
+
+    assert len(requests) == 1
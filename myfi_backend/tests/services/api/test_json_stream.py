@@ -0,0 +1,38 @@
+import json
+
+import pytest
+
+from myfi_backend.services.api.json_stream import JsonArrayParser
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+def test_feed_yields_rows(chunk_size: int) -> None:
+    """Test that rows are parsed whatever the size of the fed pieces."""
+    rows = [{"schemecode": code, "s_name": 'Fund "A", ] [x'} for code in range(20)]
+    document = json.dumps({"Status": "ok", "Table": rows, "Other": [1]})
+    parser = JsonArrayParser("Table")
+
+    parsed = []
+    for start in range(0, len(document), chunk_size):
+        parsed.extend(parser.feed(document[start : start + chunk_size]))
+    parser.close()
+
+    assert parsed == rows
+
+
+def test_feed_yields_complete_rows_only() -> None:
+    """Test that a row is returned once its closing bracket was read."""
+    parser = JsonArrayParser("Table")
+
+    assert parser.feed('{"Table": [{"a": 1}, {"a"') == [{"a": 1}]
+    assert parser.feed(": 2}]}") == [{"a": 2}]
+    parser.close()
+
+
+def test_close_incomplete_document() -> None:
+    """Test that a truncated document is reported."""
+    parser = JsonArrayParser("Table")
+    parser.feed('{"Table": [{"a": 1}, {"a"')
+
+    with pytest.raises(ValueError):
+        parser.close()
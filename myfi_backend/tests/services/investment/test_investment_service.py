@@ -0,0 +1,132 @@
+import uuid
+from datetime import date, timedelta
+from unittest.mock import patch
+
+import pytest
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from myfi_backend.db.dao.scheme_nav_dao import SchemeNavDAO
+from myfi_backend.db.dao.user_holding_dao import UserHoldingDAO
+from myfi_backend.db.models.mutual_fund_scheme_model import MutualFundScheme
+from myfi_backend.services.investment.investment_service import (
+    INVESTMENT_VALUE_DAYS,
+    compute_daily_values,
+    get_investment_values,
+)
+from myfi_backend.services.scheme.nav_cache import bump_nav_version
+
+
+def test_compute_daily_values() -> None:
+    """Test that values are forward filled over days without NAV."""
+    first, second = uuid.uuid4(), uuid.uuid4()
+    nav_rows = [
+        (first, date(2022, 1, 3), 10.0),
+        (first, date(2022, 1, 5), 11.0),
+        (second, date(2022, 1, 4), 2.0),
+    ]
+    days = [date(2022, 1, 3) + timedelta(days=index) for index in range(4)]
+
+    values = compute_daily_values({first: 2, second: 5}, nav_rows, days)
+
+    assert values.tolist() == [20, 30, 32, 32]
+
+
+@pytest.mark.anyio
+async def test_get_investment_values(
+    dbsession: AsyncSession,
+    fake_redis: Redis,
+    mutualfundscheme: MutualFundScheme,
+) -> None:
+    """Test that values are computed once and only new days are computed after."""
+    today = date(2022, 6, 30)
+    user_id = uuid.uuid4()
+    holding_dao = UserHoldingDAO(dbsession)
+    schemenav_dao = SchemeNavDAO(dbsession)
+    await holding_dao.upsert(user_id, mutualfundscheme.id, 2)
+    await schemenav_dao.upsert_many(
+        (mutualfundscheme.id, today - timedelta(days=day), 10 + day)
+        for day in range(1, 100)
+    )
+
+    investment_values = await get_investment_values(
+        user_id,
+        holding_dao,
+        schemenav_dao,
+        fake_redis,
+        today,
+    )
+
+    assert len(investment_values) == INVESTMENT_VALUE_DAYS
+    assert investment_values[0].date.date() == today
+    assert investment_values[0].value == 22  # today has no NAV yet
+    assert investment_values[1].value == 22
+    assert investment_values[-1].value == 2 * (10 + INVESTMENT_VALUE_DAYS - 1)
+
+    await schemenav_dao.upsert_many([(mutualfundscheme.id, today, 5)])
+    with patch.object(
+        schemenav_dao,
+        "get_all_navs",
+        wraps=schemenav_dao.get_all_navs,
+    ) as get_all_navs:
+        investment_values = await get_investment_values(
+            user_id,
+            holding_dao,
+            schemenav_dao,
+            fake_redis,
+            today,
+        )
+        get_all_navs.assert_awaited_once_with(
+            from_date=today + timedelta(days=1),
+            scheme_ids=[mutualfundscheme.id],
+        )
+    assert investment_values[0].value == 10
+    assert investment_values[1].value == 22
+
+
+@pytest.mark.anyio
+async def test_get_investment_values_nav_version(
+    dbsession: AsyncSession,
+    fake_redis: Redis,
+    mutualfundscheme: MutualFundScheme,
+) -> None:
+    """Test that stale NAVs are filled forward and new NAV versions recompute."""
+    today = date(2022, 6, 30)
+    user_id = uuid.uuid4()
+    holding_dao = UserHoldingDAO(dbsession)
+    schemenav_dao = SchemeNavDAO(dbsession)
+    await holding_dao.upsert(user_id, mutualfundscheme.id, 2)
+    # no NAV was published for a long time before the last one
+    await schemenav_dao.upsert_many(
+        [(mutualfundscheme.id, date(2021, 1, 1), 10), (mutualfundscheme.id, today, 10)],
+    )
+
+    investment_values = await get_investment_values(
+        user_id,
+        holding_dao,
+        schemenav_dao,
+        fake_redis,
+        today,
+    )
+    assert {investment.value for investment in investment_values} == {20}
+
+    # a corrected NAV is only picked up once the NAV version changed
+    await schemenav_dao.upsert_many([(mutualfundscheme.id, date(2021, 1, 1), 11)])
+    investment_values = await get_investment_values(
+        user_id,
+        holding_dao,
+        schemenav_dao,
+        fake_redis,
+        today,
+    )
+    assert investment_values[-1].value == 20
+    await bump_nav_version(fake_redis)
+    investment_values = await get_investment_values(
+        user_id,
+        holding_dao,
+        schemenav_dao,
+        fake_redis,
+        today,
+    )
+    assert investment_values[0].value == 20
+    assert investment_values[-1].value == 22
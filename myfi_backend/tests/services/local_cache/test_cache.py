@@ -0,0 +1,75 @@
+import asyncio
+from contextlib import suppress
+
+import pytest
+from redis.asyncio import Redis
+
+from myfi_backend.services.local_cache.cache import (
+    LocalCache,
+    cache_key,
+    listen_for_invalidations,
+    publish_invalidation,
+)
+
+
+def test_lru_and_ttl() -> None:
+    """Test that the least recently used and expired entries are dropped."""
+    cache = LocalCache(max_size=2, ttl=60)
+    cache.set("first", 1)
+    cache.set("second", 2)
+    cache.get("first")
+    cache.set("third", 3)
+
+    assert cache.get("first") == 1
+    assert cache.get("second") is None
+    cache.set("expired", 4, ttl=0)
+    assert cache.get("expired") is None
+
+
+def test_discard() -> None:
+    """Test that entries are dropped by key prefix."""
+    cache = LocalCache(max_size=10, ttl=60)
+    cache.set(cache_key("scheme_nav", 1, None), 1)
+    cache.set(cache_key("scheme_nav", 2, None), 2)
+    cache.set(cache_key("portfolios"), 3)
+
+    assert cache.discard("scheme_nav:") == 2
+    assert cache.get("scheme_nav:1:None") is None
+    assert cache.get("portfolios") == 3
+
+
+@pytest.mark.anyio
+async def test_get_or_load_single_flight() -> None:
+    """Test that concurrent misses of a key share a single load."""
+    cache = LocalCache(max_size=10, ttl=60)
+    loads = []
+
+    async def load() -> str:  # noqa: WPS430
+        loads.append(1)
+        await asyncio.sleep(0.01)
+        return "loaded"
+
+    results = await asyncio.gather(*(cache.get_or_load("key", load) for _ in range(5)))
+
+    assert set(results) == {"loaded"}
+    assert await cache.get_or_load("key", load) == "loaded"
+    assert len(loads) == 1
+
+
+@pytest.mark.anyio
+async def test_listen_for_invalidations(fake_redis: Redis) -> None:
+    """Test that published invalidations are applied to the local cache."""
+    cache = LocalCache(max_size=10, ttl=60)
+    listener = asyncio.create_task(listen_for_invalidations(cache, fake_redis))
+    await asyncio.sleep(0.05)
+    cache.set("portfolios", 1)
+    cache.set("scheme_nav:1", 2)
+
+    await publish_invalidation(fake_redis, "portfolios")
+    await asyncio.sleep(0.05)
+
+    listener.cancel()
+    with suppress(asyncio.CancelledError):
+        await listener
+    assert cache.get("portfolios") is None
+    assert cache.get("scheme_nav:1") == 2
@@ -0,0 +1,88 @@
+import uuid
+from datetime import date, timedelta
+from typing import Callable, Coroutine, List
+
+import numpy as np
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from myfi_backend.db.dao.portfolio_dao import PortfolioMutualFundDAO
+from myfi_backend.db.dao.scheme_nav_dao import SchemeNavDAO
+from myfi_backend.db.models.mutual_fund_scheme_model import MutualFundScheme
+from myfi_backend.db.models.portfolio_model import Portfolio
+from myfi_backend.services.portfolio.returns import (
+    compute_portfolio_navs,
+    compute_portfolio_returns,
+    refresh_portfolio_returns,
+)
+from myfi_backend.services.scheme.metrics import NavMatrix
+
+
+def test_compute_portfolio_navs() -> None:
+    """Test that portfolio returns are the weighted returns of the schemes."""
+    first, second, portfolio_id = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    matrix = NavMatrix(
+        np.arange("2022-01-01", "2022-01-04", dtype="datetime64[D]"),
+        [first, second],
+        np.array([[10, np.nan], [11, 20], [11, 30]], dtype=float),
+    )
+
+    portfolio_navs = compute_portfolio_navs(
+        matrix,
+        [(portfolio_id, first, 75), (portfolio_id, second, 25)],
+    )
+
+    assert portfolio_navs.scheme_ids == [portfolio_id]
+    # the second scheme has no return until its second NAV
+    assert portfolio_navs.navs[:, 0].tolist() == pytest.approx(
+        [1, 1.1, 1.1 * (1 + 0.25 * 0.5)],
+    )
+
+
+def test_compute_portfolio_returns_short_history() -> None:
+    """Test that returns longer than the history are None."""
+    scheme_id, portfolio_id = uuid.uuid4(), uuid.uuid4()
+    matrix = NavMatrix(
+        np.array(["2022-01-01", "2022-07-03"], dtype="datetime64[D]"),
+        [scheme_id],
+        np.array([[10], [12]], dtype=float),
+    )
+
+    returns = compute_portfolio_returns(matrix, [(portfolio_id, scheme_id, 100)])
+
+    assert returns[portfolio_id]["six_month_return"] == pytest.approx(20)
+    assert returns[portfolio_id]["one_year_return"] is None
+
+
+@pytest.mark.anyio
+async def test_refresh_portfolio_returns(
+    dbsession: AsyncSession,
+    portfolio: Portfolio,
+    mutualfundschemes_factory: Callable[
+        [int],
+        Coroutine[None, None, List[MutualFundScheme]],
+    ],
+) -> None:
+    """Test that the returns of portfolios are computed and stored."""
+    first, second = await mutualfundschemes_factory(2)
+    await PortfolioMutualFundDAO(dbsession).update_schemes_in_portfolio(
+        portfolio.id,
+        [(first.id, 50), (second.id, 50)],
+    )
+    start = date.today() - timedelta(days=91)
+    await SchemeNavDAO(dbsession).upsert_many(
+        [
+            # older than the longest return period, not loaded
+            (first.id, date(2000, 1, 1), 1),
+            (first.id, start, 10),
+            (first.id, start + timedelta(days=91), 11),
+            (second.id, start, 10),
+            (second.id, start + timedelta(days=91), 13),
+        ],
+    )
+
+    assert await refresh_portfolio_returns(dbsession) == 1
+
+    await dbsession.refresh(portfolio)
+    assert portfolio.three_month_return == pytest.approx(20)
+    assert portfolio.six_month_return is None
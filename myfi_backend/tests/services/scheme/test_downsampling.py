@@ -0,0 +1,27 @@
+from datetime import date, timedelta
+
+from myfi_backend.services.scheme.downsampling import downsample_nav_data
+
+
+def test_downsample_nav_data_keeps_short_series() -> None:
+    """Test that series shorter than max_points are returned as they are."""
+    nav_data = {"2022-01-01": 1.0, "2022-01-02": 2.0}
+    assert downsample_nav_data(nav_data, 5) == nav_data
+
+
+def test_downsample_nav_data() -> None:
+    """Test that downsampling keeps the end points and the extremes."""
+    start = date(2022, 1, 1)
+    nav_data = {
+        (start + timedelta(days=index)).isoformat(): float(index % 50)
+        for index in range(1000)
+    }
+    nav_data["2022-06-01"] = 500.0  # a spike must survive downsampling
+
+    result = downsample_nav_data(nav_data, 100)
+
+    assert len(result) == 100
+    assert list(result) == sorted(result)
+    assert "2022-01-01" in result
+    assert (start + timedelta(days=999)).isoformat() in result
+    assert result["2022-06-01"] == 500
@@ -0,0 +1,208 @@
+import uuid
+from datetime import date, timedelta
+from typing import Awaitable, Callable, List
+
+import numpy as np
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from myfi_backend.db.dao.scheme_nav_dao import SchemeNavDAO
+from myfi_backend.db.models.mutual_fund_scheme_model import MutualFundScheme
+from myfi_backend.services.scheme.metrics import (  # noqa: WPS235
+    NavMatrix,
+    alpha_beta,
+    build_nav_matrix,
+    compute_all_scheme_metrics,
+    compute_scheme_metrics,
+    daily_returns,
+    max_drawdown,
+    refresh_scheme_metrics,
+    rolling_cagr,
+    trailing_returns,
+)
+
+
+def _yearly_matrix(navs: List[float]) -> NavMatrix:
+    dates = np.array(
+        [date(2015 + year, 1, 1) for year in range(len(navs))],
+        dtype="datetime64[D]",
+    )
+    return NavMatrix(dates, [uuid.uuid4()], np.array(navs, dtype=float)[:, None])
+
+
+def test_build_nav_matrix() -> None:
+    """Test that NAVs are aligned on dates and forward filled per scheme."""
+    first, second = uuid.uuid4(), uuid.uuid4()
+    matrix = build_nav_matrix(
+        [
+            (first, date(2022, 1, 3), 11.0),
+            (first, date(2022, 1, 1), 10.0),
+            (second, date(2022, 1, 2), 20.0),
+        ],
+    )
+
+    assert matrix.scheme_ids == [first, second]
+    assert list(matrix.dates.astype(str)) == ["2022-01-01", "2022-01-02", "2022-01-03"]
+    assert matrix.navs[:, 0].tolist() == [10.0, 10.0, 11.0]
+    assert np.isnan(matrix.navs[0, 1])
+    assert matrix.navs[1:, 1].tolist() == [20.0, 20.0]
+    assert matrix.observed is not None
+    assert matrix.observed.tolist() == [[True, False], [False, True], [True, False]]
+
+
+def test_trailing_returns_and_cagr() -> None:
+    """Test returns over trailing years and the rolling CAGR."""
+    matrix = _yearly_matrix([100, 110, 121, 133.1])
+
+    assert trailing_returns(matrix, 1)[0] == pytest.approx(0.1)
+    assert trailing_returns(matrix, 3)[0] == pytest.approx(0.331)
+    assert np.isnan(trailing_returns(matrix, 5)[0])
+    cagrs = rolling_cagr(matrix, 2)[:, 0]
+    assert np.isnan(cagrs[:2]).all()
+    assert cagrs[2:] == pytest.approx([0.1, 0.1])
+
+
+def test_max_drawdown() -> None:
+    """Test that the largest fall from a peak is found."""
+    navs = np.array([[10, np.nan], [20, 5], [15, 5], [30, 6], [12, 4]], dtype=float)
+
+    assert max_drawdown(navs).tolist() == pytest.approx([-0.6, -1 / 3])
+
+
+def test_alpha_beta() -> None:
+    """Test the beta and alpha of a scheme moving twice as much as the benchmark."""
+    benchmark_returns = np.array([0.01, -0.02, 0.015, 0.005, -0.01])
+    returns = (benchmark_returns * 2 + 0.001)[:, None]
+
+    alphas, betas = alpha_beta(returns, benchmark_returns, 0)
+
+    assert betas[0] == pytest.approx(2)
+    assert alphas[0] == pytest.approx(0.252)
+
+
+def test_compute_scheme_metrics() -> None:
+    """Test the metrics of a scheme with a short and a long history."""
+    rng = np.random.default_rng(1)
+    dates = np.arange("2017-01-01", "2023-01-01", dtype="datetime64[D]")
+    returns = rng.normal(0.0005, 0.01, (len(dates), 2))
+    navs = np.asarray(10 * np.cumprod(1 + returns, axis=0), dtype=np.float64)
+    navs[: len(dates) - 500, 1] = np.nan
+    short, long = uuid.uuid4(), uuid.uuid4()
+    matrix = NavMatrix(dates, [long, short], navs)
+
+    metrics = compute_scheme_metrics(matrix, 0.05, benchmark_navs=navs[:, 0])
+
+    assert metrics[long].return_last5_years is not None
+    assert metrics[long].beta == pytest.approx(1)
+    assert metrics[short].return_last_year is not None
+    assert metrics[short].return_last3_years is None
+    window_returns = daily_returns(navs[-1097:, 0])
+    # a NAV every calendar day
+    volatility = np.std(window_returns, ddof=1) * np.sqrt(365.25) * 100
+    assert metrics[long].standard_deviation == pytest.approx(volatility)
+    drawdown = metrics[long].max_drawdown
+    assert drawdown is not None
+    assert drawdown < 0
+
+
+def test_compute_scheme_metrics_other_schemes() -> None:
+    """Test that the metrics of a scheme don't depend on the other schemes."""
+    rng = np.random.default_rng(2)
+    weekdays = [
+        day
+        for day in np.arange("2020-01-01", "2023-01-01", dtype="datetime64[D]")
+        if np.is_busday(day)
+    ]
+    navs = 10 * np.cumprod(1 + rng.normal(0.0005, 0.01, len(weekdays)))
+    equity, liquid = uuid.uuid4(), uuid.uuid4()
+    rows = [(equity, day.item(), nav) for day, nav in zip(weekdays, navs)]
+    liquid_rows = [
+        (liquid, day.item(), 10 + index / 1000)
+        for index, day in enumerate(
+            np.arange("2020-01-01", "2023-01-01", dtype="datetime64[D]"),
+        )
+    ]
+
+    alone = build_nav_matrix(rows)
+    together = build_nav_matrix(rows + liquid_rows)
+    benchmark = np.linspace(100, 150, len(together.dates))
+    alone_benchmark = benchmark[np.isin(together.dates, alone.dates)]
+
+    metrics = compute_scheme_metrics(alone, 0.05, alone_benchmark)[equity]
+    other_metrics = compute_scheme_metrics(together, 0.05, benchmark)[equity]
+    assert tuple(other_metrics) == pytest.approx(tuple(metrics))
+    # annualized with the NAVs the scheme published a year, not 252 or 365
+    days = (alone.dates[-1] - alone.dates[0]).astype(float)
+    window_returns = daily_returns(navs[alone.dates >= alone.dates[-1] - 1096])
+    assert metrics.standard_deviation == pytest.approx(
+        np.std(window_returns, ddof=1)
+        * np.sqrt((len(weekdays) - 1) / days * 365.25)
+        * 100,
+    )
+
+
+@pytest.mark.anyio
+async def test_compute_all_scheme_metrics(
+    dbsession: AsyncSession,
+    mutualfundschemes_factory: Callable[[int], Awaitable[List[MutualFundScheme]]],
+) -> None:
+    """Test computing the metrics of the schemes stored in the database."""
+    first, second, without_navs = await mutualfundschemes_factory(3)
+    start = date.today() - timedelta(days=399)
+    dao = SchemeNavDAO(dbsession)
+    await dao.upsert_many(
+        (scheme.id, start + timedelta(days=day), 10 + day / 100)
+        for day in range(400)
+        for scheme in (first, second)
+    )
+    # outside of the loaded history, only used for the return since inception
+    await dao.upsert_many([(first.id, date(2000, 1, 1), 5)])
+
+    chunks = [
+        rows
+        async for rows in compute_all_scheme_metrics(
+            dao,
+            [first.id, second.id, without_navs.id],
+            chunk_size=1,
+        )
+    ]
+
+    assert [[row["scheme_id"] for row in rows] for rows in chunks] == [
+        [first.id],
+        [second.id],
+    ]
+    metrics = chunks[0][0]
+    assert metrics["nav_date"] == date.today()
+    last_year_start = 10 + (399 - 365) / 100
+    assert metrics["return_last_year"] == pytest.approx(
+        (13.99 / last_year_start - 1) * 100,
+    )
+    assert metrics["return_last3_years"] is None
+    assert metrics["return_since_inception"] == pytest.approx((13.99 / 5 - 1) * 100)
+
+
+@pytest.mark.anyio
+async def test_refresh_scheme_metrics(
+    dbsession: AsyncSession,
+    mutualfundscheme: MutualFundScheme,
+) -> None:
+    """Test that computed metrics are stored apart from the feed figures."""
+    start = date.today() - timedelta(days=399)
+    dao = SchemeNavDAO(dbsession)
+    await dao.upsert_many(
+        (mutualfundscheme.id, start + timedelta(days=day), 10 + day / 100)
+        for day in range(400)
+    )
+    feed_return = mutualfundscheme.return_last_year
+
+    assert await refresh_scheme_metrics(dbsession) == 1
+    assert await refresh_scheme_metrics(dbsession) == 1
+
+    metrics = await dao.get_metrics(mutualfundscheme.id)
+    assert metrics is not None
+    assert metrics.return_last_year == pytest.approx(
+        (13.99 / (10 + 34 / 100) - 1) * 100,
+    )
+    assert metrics.return_last3_years is None
+    await dbsession.refresh(mutualfundscheme)
+    assert mutualfundscheme.return_last_year == feed_return
@@ -0,0 +1,42 @@
+from typing import Optional
+from unittest.mock import patch
+
+import pytest
+from prometheus_client import REGISTRY
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from myfi_backend.db.dao.scheme_nav_dao import SchemeNavDAO
+from myfi_backend.db.models.mutual_fund_scheme_model import MutualFundScheme
+from myfi_backend.services.scheme.nav_cache import bump_nav_version, get_cached_nav_data
+
+
+def _cache_requests(result: str) -> float:
+    sample: Optional[float] = REGISTRY.get_sample_value(
+        "scheme_nav_cache_requests_total",
+        {"result": result},
+    )
+    return sample or 0
+
+
+@pytest.mark.anyio
+async def test_get_cached_nav_data(
+    dbsession: AsyncSession,
+    fake_redis: Redis,
+    scheme_with_navs: MutualFundScheme,
+) -> None:
+    """Test that NAVs are read once per version and hits and misses are counted."""
+    dao = SchemeNavDAO(dbsession)
+    hits, misses = _cache_requests("hit"), _cache_requests("miss")
+
+    with patch.object(dao, "get_by_scheme_id", wraps=dao.get_by_scheme_id) as get:
+        first = await get_cached_nav_data(dao, fake_redis, scheme_with_navs.id)
+        second = await get_cached_nav_data(dao, fake_redis, scheme_with_navs.id)
+        assert get.await_count == 1
+        await bump_nav_version(fake_redis)
+        await get_cached_nav_data(dao, fake_redis, scheme_with_navs.id)
+        assert get.await_count == 2
+
+    assert first == second == await dao.get_by_scheme_id(scheme_with_navs.id)
+    assert _cache_requests("hit") == hits + 1
+    assert _cache_requests("miss") == misses + 2
@@ -0,0 +1,40 @@
+import uuid
+
+from myfi_backend.services.scheme.search import SchemeSearchIndex, trigrams
+
+
+def test_trigrams() -> None:
+    """Test that words are lowercased and padded like pg_trgm does."""
+    assert trigrams("Hdfc-TOP") == {
+        "  h",
+        " hd",
+        "hdf",
+        "dfc",
+        "fc ",
+        "  t",
+        " to",
+        "top",
+        "op ",
+    }
+    assert trigrams(" - ") == set()
+
+
+def test_search_index() -> None:
+    """Test that partial and misspelt queries find the closest names first."""
+    names = [
+        "HDFC Flexi Cap Fund - Direct Plan - Growth",
+        "HDFC Flexi Cap Fund - Regular Plan - Growth",
+        "HDFC Flexi Cap Fund - Direct Plan - IDCW Reinvestment",
+        "Axis Bluechip Fund - Direct Plan - Growth",
+    ]
+    schemes = [(uuid.uuid4(), name) for name in names]
+    index = SchemeSearchIndex(schemes)
+
+    matches = index.search("hdfc flexi direct growth", 2)
+
+    matched_names = [match.name for match in matches]
+    assert matched_names == names[:2]
+    assert matches[0].scheme_id == schemes[0][0]
+    assert matches[1].score < matches[0].score
+    assert index.search("axis bluchip", 5)[0].name == names[3]
+    assert not index.search("zzzz", 5)
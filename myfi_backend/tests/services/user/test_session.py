@@ -0,0 +1,48 @@
+import uuid
+
+import pytest
+from redis.asyncio import Redis
+
+from myfi_backend.services.local_cache.cache import LocalCache
+from myfi_backend.services.user.session import add_user_session, is_valid_user
+from myfi_backend.utils.redis import (
+    REDIS_HASH_USER,
+    REDIS_SET_USER_IDS,
+    is_member_of_redis_set,
+    set_to_redis,
+)
+
+
+@pytest.mark.anyio
+async def test_is_valid_user(fake_redis: Redis) -> None:
+    """Test that only verified users are valid and that they get cached."""
+    local_cache = LocalCache(max_size=10, ttl=60)
+    user_id = uuid.uuid4()
+
+    assert not await is_valid_user(fake_redis, local_cache, user_id)
+    await add_user_session(fake_redis, str(user_id))
+    assert await is_valid_user(fake_redis, local_cache, user_id)
+
+    # the cached answer is used while the id is trusted
+    await fake_redis.delete(REDIS_SET_USER_IDS)
+    assert await is_valid_user(fake_redis, local_cache, user_id)
+    assert not await is_valid_user(
+        fake_redis,
+        LocalCache(max_size=10, ttl=60),
+        user_id,
+    )
+
+
+@pytest.mark.anyio
+async def test_is_valid_user_backfills_set(fake_redis: Redis) -> None:
+    """Test that users verified before the set existed are added to it."""
+    local_cache = LocalCache(max_size=10, ttl=60)
+    user_id = uuid.uuid4()
+    await set_to_redis(fake_redis, str(user_id), "{}", REDIS_HASH_USER)
+
+    assert await is_valid_user(fake_redis, local_cache, user_id)
+    assert await is_member_of_redis_set(
+        fake_redis,
+        REDIS_SET_USER_IDS,
+        str(user_id),
+    )
@@ -1,13 +1,29 @@
+import uuid
+
 import pytest
-from redis.asyncio import ConnectionPool
+from redis.asyncio import Redis
 
-from myfi_backend.utils.redis import (
+from myfi_backend.utils.redis import (  # noqa: WPS235
     REDIS_HASH_NEW_USER,
+    REDIS_HASH_USER,
+    add_to_redis_set,
     delete_from_redis,
+    exists_in_redis,
     generate_redis_key,
+    get_first_record_of,
     get_from_redis,
+    get_many_from_redis,
+    get_record,
+    get_record_field,
+    is_member_of_redis_set,
+    migrate_records,
+    move_record,
+    set_many_to_redis,
+    set_record,
     set_to_redis,
 )
+from myfi_backend.web.api.otp.schema import OTP_RECORD_SERIALIZER, OtpDTO
+from myfi_backend.web.api.user.schema import UserDTO
 
 
 def test_generate_redis_key() -> None:
@@ -24,7 +40,7 @@ def test_generate_redis_key() -> None:
 
 
 @pytest.mark.anyio
-async def test_set_and_get_from_redis(fake_redis_pool: ConnectionPool) -> None:
+async def test_set_and_get_from_redis(fake_redis: Redis) -> None:
     """
     Test the set_to_redis and get_from_redis function.
 
@@ -35,13 +51,13 @@ async def test_set_and_get_from_redis(fake_redis_pool: ConnectionPool) -> None:
     test_key = "test_key"
     test_value = "test_value"
 
-    await set_to_redis(fake_redis_pool, test_key, test_value, REDIS_HASH_NEW_USER)
-    value = await get_from_redis(fake_redis_pool, test_key, REDIS_HASH_NEW_USER)
+    await set_to_redis(fake_redis, test_key, test_value, REDIS_HASH_NEW_USER)
+    value = await get_from_redis(fake_redis, test_key, REDIS_HASH_NEW_USER)
     assert value == test_value
 
 
 @pytest.mark.anyio
-async def test_delete_from_redis(fake_redis_pool: ConnectionPool) -> None:
+async def test_delete_from_redis(fake_redis: Redis) -> None:
     """
     Test the delete_from_redis function.
 
@@ -49,7 +65,7 @@ async def test_delete_from_redis(fake_redis_pool: ConnectionPool) -> None:
     Redis given a key and Redis connection pool.
 
     Parameters:
-    - fake_redis_pool (ConnectionPool): The fake Redis connection pool.
+    - fake_redis (ConnectionPool): The fake Redis client.
 
     Returns:
     - None
@@ -57,14 +73,204 @@ async def test_delete_from_redis(fake_redis_pool: ConnectionPool) -> None:
     test_key = "test_key"
     test_value = "test_value"
 
-    await set_to_redis(fake_redis_pool, test_key, test_value, REDIS_HASH_NEW_USER)
-    value = await get_from_redis(fake_redis_pool, test_key, REDIS_HASH_NEW_USER)
+    await set_to_redis(fake_redis, test_key, test_value, REDIS_HASH_NEW_USER)
+    value = await get_from_redis(fake_redis, test_key, REDIS_HASH_NEW_USER)
     assert value == test_value
     num_key_deleted = await delete_from_redis(
-        fake_redis_pool,
+        fake_redis,
         test_key,
         REDIS_HASH_NEW_USER,
     )
     assert num_key_deleted == 1
-    value = await get_from_redis(fake_redis_pool, test_key, REDIS_HASH_NEW_USER)
+    value = await get_from_redis(fake_redis, test_key, REDIS_HASH_NEW_USER)
     assert value is None
+
+
+@pytest.mark.anyio
+async def test_exists_in_redis(fake_redis: Redis) -> None:
+    """Test that exists_in_redis finds a key without reading it."""
+    assert not await exists_in_redis(fake_redis, "test_key", REDIS_HASH_NEW_USER)
+    await set_to_redis(fake_redis, "test_key", "test_value", REDIS_HASH_NEW_USER)
+    assert await exists_in_redis(fake_redis, "test_key", REDIS_HASH_NEW_USER)
+
+
+@pytest.mark.anyio
+async def test_redis_set(fake_redis: Redis) -> None:
+    """Test adding members to a Redis set and checking for them."""
+    assert await add_to_redis_set(fake_redis, "test_set", "member")
+    assert not await add_to_redis_set(fake_redis, "test_set", "member")
+    assert await is_member_of_redis_set(fake_redis, "test_set", "member")
+    assert not await is_member_of_redis_set(fake_redis, "test_set", "other")
+
+
+@pytest.mark.anyio
+async def test_get_first_record_of(fake_redis: Redis) -> None:
+    """Test that the record of the first hash holding the key is returned."""
+    hash_keys = (REDIS_HASH_USER, REDIS_HASH_NEW_USER)
+    new_otp = OtpDTO(user=UserDTO(email="a@b.c", user_id=uuid.uuid4()), email_otp="1")
+    assert await get_first_record_of(
+        fake_redis,
+        "a@b.c",
+        hash_keys,
+        OTP_RECORD_SERIALIZER,
+    ) == (None, None)
+
+    await set_record(
+        fake_redis,
+        "a@b.c",
+        new_otp,
+        REDIS_HASH_NEW_USER,
+        OTP_RECORD_SERIALIZER,
+        expire=60,
+    )
+    assert await get_first_record_of(
+        fake_redis,
+        "a@b.c",
+        hash_keys,
+        OTP_RECORD_SERIALIZER,
+    ) == (new_otp, REDIS_HASH_NEW_USER)
+    redis_key = generate_redis_key("a@b.c", REDIS_HASH_NEW_USER)
+    assert await fake_redis.ttl(redis_key) == 60
+
+
+@pytest.mark.anyio
+async def test_move_record(fake_redis: Redis) -> None:
+    """Test that a record is moved once, with its aliases and set members."""
+    user_otp = OtpDTO(user=UserDTO(mobile="99", user_id=uuid.uuid4()), pin="1234")
+    await set_to_redis(fake_redis, "99", user_otp.json(), REDIS_HASH_NEW_USER)
+
+    for expected in (True, False):
+        moved = await move_record(
+            fake_redis,
+            "99",
+            REDIS_HASH_NEW_USER,
+            REDIS_HASH_USER,
+            user_otp,
+            OTP_RECORD_SERIALIZER,
+            aliases=["test_alias"],
+            set_members={"test_set": "member"},
+        )
+        assert moved is expected
+
+    assert not await exists_in_redis(fake_redis, "99", REDIS_HASH_NEW_USER)
+    for moved_key in ("99", "test_alias"):
+        moved_otp = await get_record(
+            fake_redis,
+            moved_key,
+            REDIS_HASH_USER,
+            OTP_RECORD_SERIALIZER,
+        )
+        assert moved_otp == user_otp
+    assert (
+        await get_record_field(
+            fake_redis,
+            "test_alias",
+            REDIS_HASH_USER,
+            OTP_RECORD_SERIALIZER,
+            "pin",
+        )
+        == "1234"
+    )
+    assert await is_member_of_redis_set(fake_redis, "test_set", "member")
+
+
+@pytest.mark.anyio
+async def test_move_record_replaced(fake_redis: Redis) -> None:
+    """Test that a record replaced since it was read isn't moved."""
+    user = UserDTO(mobile="99", user_id=uuid.uuid4())
+    read_otp = OtpDTO(user=user, mobile_otp="1111")
+    resent_otp = OtpDTO(user=user, mobile_otp="2222")
+    await set_record(
+        fake_redis,
+        "99",
+        resent_otp,
+        REDIS_HASH_NEW_USER,
+        OTP_RECORD_SERIALIZER,
+    )
+
+    moved = await move_record(
+        fake_redis,
+        "99",
+        REDIS_HASH_NEW_USER,
+        REDIS_HASH_USER,
+        read_otp,
+        OTP_RECORD_SERIALIZER,
+    )
+
+    assert not moved
+    assert not await exists_in_redis(fake_redis, "99", REDIS_HASH_USER)
+    assert (
+        await get_record(fake_redis, "99", REDIS_HASH_NEW_USER, OTP_RECORD_SERIALIZER)
+        == resent_otp
+    )
+
+
+@pytest.mark.anyio
+async def test_json_records_are_migrated(fake_redis: Redis) -> None:
+    """Test that records stored as JSON text are read and rewritten as hashes."""
+    user_otp = OtpDTO(user=UserDTO(email="a@b.c", user_id=uuid.uuid4()), pin="1234")
+    for json_key in ("first", "second", "third"):
+        await set_to_redis(fake_redis, json_key, user_otp.json(), REDIS_HASH_USER, 60)
+
+    pin = await get_record_field(
+        fake_redis,
+        "first",
+        REDIS_HASH_USER,
+        OTP_RECORD_SERIALIZER,
+        "pin",
+    )
+    assert pin == "1234"
+    migrated_otp = await get_record(
+        fake_redis,
+        "second",
+        REDIS_HASH_USER,
+        OTP_RECORD_SERIALIZER,
+    )
+    assert migrated_otp == user_otp
+
+    assert (
+        await migrate_records(fake_redis, REDIS_HASH_USER, OTP_RECORD_SERIALIZER) == 1
+    )
+    for hash_name in ("first", "second", "third"):
+        redis_key = generate_redis_key(hash_name, REDIS_HASH_USER)
+        assert await fake_redis.type(redis_key) == b"hash"
+        assert 0 < await fake_redis.ttl(redis_key) <= 60
+
+
+def test_record_serializer() -> None:
+    """Test that records are stored compactly and of one layout version only."""
+    user_otp = OtpDTO(user=UserDTO(mobile="99", user_id=uuid.uuid4()), mobile_otp="1")
+
+    record_fields = OTP_RECORD_SERIALIZER.dumps(user_otp)
+
+    assert record_fields == {
+        "_v": "1",
+        "m": "99",
+        "u": str(user_otp.user.user_id),
+        "mo": "1",
+        "rc": "0",
+    }
+    encoded_fields = {
+        field.encode(): field_value.encode()
+        for field, field_value in record_fields.items()
+    }
+    assert OTP_RECORD_SERIALIZER.loads(encoded_fields) == user_otp
+    with pytest.raises(ValueError):
+        OTP_RECORD_SERIALIZER.loads({**encoded_fields, b"_v": b"2"})
+
+
+@pytest.mark.anyio
+async def test_get_and_set_many(fake_redis: Redis) -> None:
+    """Test writing and reading several keys in one round trip."""
+    await set_many_to_redis(fake_redis, {"first": "1", "second": "2"}, REDIS_HASH_USER)
+    await set_many_to_redis(fake_redis, {"third": "3"}, REDIS_HASH_USER, expire=60)
+
+    values = await get_many_from_redis(
+        fake_redis,
+        ["first", "missing", "third", "second"],
+        REDIS_HASH_USER,
+    )
+
+    assert values == ["1", None, "3", "2"]
+    assert await fake_redis.ttl(generate_redis_key("third", REDIS_HASH_USER)) == 60
+    assert await fake_redis.ttl(generate_redis_key("first", REDIS_HASH_USER)) == -1
@@ -1,3 +1,4 @@
+from typing import Any
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -6,8 +7,15 @@ from httpx import AsyncClient
 from redis.asyncio import ConnectionPool, Redis
 from starlette import status
 
-from myfi_backend.utils.redis import REDIS_HASH_NEW_USER, generate_redis_key
+from myfi_backend.utils.redis import (
+    REDIS_HASH_NEW_USER,
+    REDIS_HASH_USER,
+    exists_in_redis,
+    generate_redis_key,
+    move_record,
+)
 from myfi_backend.web.api.otp.schema import (
+    OTP_RECORD_SERIALIZER,
     OtpDTO,
     OtpResponseDTO,
     PinDTO,
@@ -54,11 +62,11 @@ async def test_signup_success(
                 redis_key = generate_redis_key(user.email, REDIS_HASH_NEW_USER)
             elif user.mobile:
                 redis_key = generate_redis_key(user.mobile, REDIS_HASH_NEW_USER)
-            redis_value = await redis.get(str(redis_key))
+            redis_value = await redis.hgetall(str(redis_key))
 
-            assert redis_value is not None
+            assert redis_value
 
-            otp_data = OtpDTO.parse_raw(redis_value.decode("utf-8"))
+            otp_data = OTP_RECORD_SERIALIZER.loads(redis_value)
             assert otp_data.user.user_id == response_ob.user_id
 
             if user.email:
@@ -338,3 +346,47 @@ async def test_set_pin(
         assert response.status_code == status.HTTP_200_OK
         verify_pin_response_ob = VerifyPinResponseDTO.parse_obj(response.json())
         assert verify_pin_response_ob.message == "SUCCESS."
+
+
+@pytest.mark.anyio
+@patch("myfi_backend.web.api.otp.views.generate_otp")
+async def test_verify_expired_while_verifying(
+    mock_generate_otp: MagicMock,
+    user_with_email: UserDTO,
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    fake_redis_pool: ConnectionPool,
+) -> None:
+    """
+    Test that an OTP which expires while it is verified isn't accepted.
+
+    :param mock_generate_otp: mock generate otp.
+    :param user_with_email: User data with email.
+    :param fastapi_app: current application.
+    :param client: client for the app.
+    :param fake_redis_pool: fake redis pool.
+    """
+    mock_generate_otp.return_value = "123456"
+    response = await client.post(
+        fastapi_app.url_path_for("signup"),
+        json=user_with_email.dict(),
+    )
+    user_with_email.user_id = response.json()["user_id"]
+    otp_data = OtpDTO(user=user_with_email, email_otp="123456")
+
+    async def expire_and_move(**kwargs: Any) -> bool:  # noqa: WPS430
+        await kwargs["redis"].delete(
+            generate_redis_key(kwargs["key"], REDIS_HASH_NEW_USER),
+        )
+        return await move_record(**kwargs)
+
+    with patch("myfi_backend.web.api.otp.views.move_record", new=expire_and_move):
+        response = await client.post(
+            fastapi_app.url_path_for("verify_otp"),
+            json=otp_data.dict(),
+        )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["detail"] == "Invalid request."
+    redis = Redis(connection_pool=fake_redis_pool)
+    assert not await exists_in_redis(redis, str(otp_data.user.user_id), REDIS_HASH_USER)
@@ -1,32 +1,258 @@
-from typing import Dict
+import base64
+import csv
+import io
+import json
+import uuid
+from typing import Awaitable, Callable, Dict, List
 
 import pytest
 from fastapi import FastAPI, status
 from httpx import AsyncClient
 from pydantic import parse_obj_as
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from myfi_backend.db.models.scheme_nav_model import SchemeNAV
-from myfi_backend.web.api.scheme.schema import SchemeNavDTO
+from myfi_backend.db.dao.scheme_nav_dao import SchemeNavDAO
+from myfi_backend.db.models.mutual_fund_scheme_model import MutualFundScheme
+from myfi_backend.web.api.scheme.schema import (
+    SchemeNavDTO,
+    SchemeNavSummaryDTO,
+    SchemePageDTO,
+    SchemeSearchResultDTO,
+)
 
 
 @pytest.mark.anyio
 async def test_get_scheme_nav(
     fastapi_app: FastAPI,
     client: AsyncClient,
-    schemenav: SchemeNAV,
+    scheme_with_navs: MutualFundScheme,
 ) -> None:
     """
     Tests that get_scheme_nav route works.
 
     :param fastapi_app: current application.
     :param client: client for the app.
-    :param schemenav: A SchemeNAV instance for testing.
+    :param scheme_with_navs: A scheme with NAV history for testing.
     """
-    url = fastapi_app.url_path_for("get_scheme_nav", scheme_id=schemenav.scheme_id)
+    url = fastapi_app.url_path_for("get_scheme_nav", scheme_id=scheme_with_navs.id)
     response = await client.get(url)
     response_data = response.json()
     assert response.status_code == status.HTTP_200_OK
-    assert response_data["scheme_id"] == str(schemenav.scheme_id)
+    assert response_data["scheme_id"] == str(scheme_with_navs.id)
     assert isinstance(response_data["nav_data"], Dict)
+    assert list(response_data["nav_data"]) == [
+        "2019-01-03",
+        "2021-01-03",
+        "2023-01-03",
+    ]
     schemenav_dto = parse_obj_as(SchemeNavDTO, response_data)
     assert schemenav_dto
+
+
+@pytest.mark.anyio
+async def test_get_scheme_nav_date_range(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    scheme_with_navs: MutualFundScheme,
+) -> None:
+    """
+    Tests that get_scheme_nav only returns NAVs within from and to.
+
+    :param fastapi_app: current application.
+    :param client: client for the app.
+    :param scheme_with_navs: A scheme with NAV history for testing.
+    """
+    url = fastapi_app.url_path_for("get_scheme_nav", scheme_id=scheme_with_navs.id)
+    response = await client.get(url, params={"from": "2020-01-01", "to": "2022-12-31"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["nav_data"] == {"2021-01-03": 4.56}
+
+    response = await client.get(url, params={"from": "2024-01-01"})
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.anyio
+async def test_get_scheme_nav_downsampled(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    scheme_with_navs: MutualFundScheme,
+    dbsession: AsyncSession,
+) -> None:
+    """
+    Tests that get_scheme_nav buckets and downsamples the NAVs.
+
+    :param fastapi_app: current application.
+    :param client: client for the app.
+    :param scheme_with_navs: A scheme with NAV history for testing.
+    :param dbsession: database session.
+    """
+    await SchemeNavDAO(dbsession).upsert(
+        {
+            "scheme_id": scheme_with_navs.id,
+            "nav_data": {
+                "2023-01-02": 7.5,
+                "2023-01-04": 8.0,
+                "2023-01-31": 9.0,
+            },
+        },
+    )
+    url = fastapi_app.url_path_for("get_scheme_nav", scheme_id=scheme_with_navs.id)
+
+    response = await client.get(url, params={"interval": "monthly"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["nav_data"] == {
+        "2019-01-03": 1.23,
+        "2021-01-03": 4.56,
+        "2023-01-31": 9.0,
+    }
+
+    response = await client.get(url, params={"max_points": 3})
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()["nav_data"]) == 3
+
+    response = await client.get(url, params={"max_points": 2})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.anyio
+async def test_get_schemes_pages(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    create_user: uuid.UUID,
+    mutualfundschemes_factory: Callable[[int], Awaitable[List[MutualFundScheme]]],
+) -> None:
+    """
+    Tests that get_schemes pages through the catalogue with cursors.
+
+    :param fastapi_app: current application.
+    :param client: client for the app.
+    :param create_user: Fixture to create a new user.
+    :param mutualfundschemes_factory: Factory of schemes.
+    """
+    schemes = await mutualfundschemes_factory(3)
+    url = fastapi_app.url_path_for("get_schemes")
+    params = {"user_id": str(create_user), "limit": "2", "scheme_plan": "Test Plan"}
+
+    response = await client.get(url, params=params)
+    assert response.status_code == status.HTTP_200_OK
+    first_page = parse_obj_as(SchemePageDTO, response.json())
+    assert first_page.next_cursor is not None
+    response = await client.get(
+        url,
+        params={**params, "cursor": first_page.next_cursor},
+    )
+    second_page = parse_obj_as(SchemePageDTO, response.json())
+
+    assert second_page.next_cursor is None
+    names = [scheme.scheme_name for scheme in first_page.schemes + second_page.schemes]
+    assert names == sorted(scheme.name for scheme in schemes)
+
+    response = await client.get(
+        url,
+        params={**params, "cursor": first_page.next_cursor, "sort": "aum"},
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    # a cursor whose sort value doesn't match the type of the sort column
+    for sort_value in ("not a number", True, None, [1]):
+        tampered = json.dumps(["aum", sort_value, str(schemes[0].id)])
+        response = await client.get(
+            url,
+            params={
+                **params,
+                "cursor": base64.urlsafe_b64encode(tampered.encode()).decode(),
+                "sort": "aum",
+            },
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json() == {"detail": "Invalid cursor."}
+
+
+@pytest.mark.anyio
+async def test_search_schemes_by_name(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    create_user: uuid.UUID,
+    mutualfundschemes_factory: Callable[[int], Awaitable[List[MutualFundScheme]]],
+) -> None:
+    """
+    Tests that search_schemes_by_name finds schemes by a part of their name.
+
+    :param fastapi_app: current application.
+    :param client: client for the app.
+    :param create_user: Fixture to create a new user.
+    :param mutualfundschemes_factory: Factory of schemes.
+    """
+    schemes = await mutualfundschemes_factory(3)
+    url = fastapi_app.url_path_for("search_schemes_by_name")
+    query = schemes[1].name.split()[-1]
+
+    response = await client.get(url, params={"user_id": str(create_user), "q": query})
+
+    assert response.status_code == status.HTTP_200_OK
+    results = parse_obj_as(List[SchemeSearchResultDTO], response.json())
+    assert results[0].scheme_id == schemes[1].id
+    assert results[0].scheme_name == schemes[1].name
+
+
+@pytest.mark.anyio
+async def test_export_scheme_catalogue(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    create_user: uuid.UUID,
+    scheme_with_navs: MutualFundScheme,
+) -> None:
+    """
+    Tests that export_scheme_catalogue streams the schemes as NDJSON and CSV.
+
+    :param fastapi_app: current application.
+    :param client: client for the app.
+    :param create_user: Fixture to create a new user.
+    :param scheme_with_navs: Scheme with a NAV history.
+    """
+    url = fastapi_app.url_path_for("export_scheme_catalogue")
+
+    response = await client.get(url, params={"user_id": str(create_user)})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in rows] == [str(scheme_with_navs.id)]
+    assert rows[0]["latest_nav"] == pytest.approx(7.89)
+
+    response = await client.get(
+        url,
+        params={"user_id": str(create_user), "format": "csv"},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    csv_rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["name"] for row in csv_rows] == [scheme_with_navs.name]
+    assert csv_rows[0]["latest_nav_date"] == "2023-01-03"
+
+
+@pytest.mark.anyio
+async def test_get_scheme_nav_summary(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    scheme_with_navs: MutualFundScheme,
+) -> None:
+    """
+    Tests that get_scheme_nav_summary returns the summary kept by the NAV ingest.
+
+    :param fastapi_app: current application.
+    :param client: client for the app.
+    :param scheme_with_navs: A scheme with NAV history for testing.
+    """
+    url = fastapi_app.url_path_for(
+        "get_scheme_nav_summary",
+        scheme_id=scheme_with_navs.id,
+    )
+    response = await client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+    summary = parse_obj_as(SchemeNavSummaryDTO, response.json())
+    assert summary.nav_date.isoformat() == "2023-01-03"
+    assert summary.previous_nav == pytest.approx(4.56)
+    assert summary.return_last3_years == pytest.approx((7.89 / 1.23 - 1) * 100)
+
+    url = fastapi_app.url_path_for("get_scheme_nav_summary", scheme_id=uuid.uuid4())
+    response = await client.get(url)
+    assert response.status_code == status.HTTP_404_NOT_FOUND
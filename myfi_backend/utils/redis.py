@@ -1,16 +1,54 @@
-from typing import Optional
+from functools import reduce
+from typing import (  # noqa: WPS235
+    Any,
+    Dict,
+    Generic,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypeVar,
+)
 
-from redis.asyncio import ConnectionPool, Redis
+from pydantic import BaseModel
+from redis.asyncio import Redis, ResponseError, WatchError
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
 
 # redis hash for keys
 REDIS_DUMMY_HASH = "DUMMY_HASH"
 REDIS_HASH_USER = "REDIS_USER"
 REDIS_HASH_SESSION = "REDIS_USER_SESSION"
 REDIS_HASH_NEW_USER = "REDIS_NEW_USER"
+REDIS_HASH_INVESTMENT_VALUE = "REDIS_INVESTMENT_VALUE"
+REDIS_HASH_SCHEME_NAV = "REDIS_SCHEME_NAV"
+REDIS_HASH_SCHEME_NAV_VERSION = "REDIS_SCHEME_NAV_VERSION"
+
+# redis set of the ids of verified users
+REDIS_SET_USER_IDS = "REDIS_USER_IDS"
+
+# field of a record stored as a redis hash holding the version of its layout
+RECORD_VERSION_FIELD = "_v"
+_ENCODED_VERSION_FIELD = RECORD_VERSION_FIELD.encode("utf-8")
 
 # redis expiry time
 REDIS_NEW_USER_EXPIRY_TIME = 180
 REDIS_SESSION_EXPIRY_TIME = 3600 * 24 * 7
+REDIS_INVESTMENT_VALUE_EXPIRY_TIME = 3600 * 24
+REDIS_SCHEME_NAV_EXPIRY_TIME = 3600 * 24
+
+
+def _get_path(record: BaseModel, path: str) -> Any:
+    return reduce(getattr, path.split("."), record)
+
+
+def _set_path(record_values: Dict[str, Any], path: str, field_value: str) -> None:
+    *parents, name = path.split(".")
+    for parent in parents:
+        record_values = record_values.setdefault(parent, {})
+    record_values[name] = field_value
 
 
 def generate_redis_key(key: str, redis_hash_key: str) -> str:
@@ -25,8 +63,84 @@ def generate_redis_key(key: str, redis_hash_key: str) -> str:
     return f"{redis_hash_key}:{key}"
 
 
+class RecordSerializer(Generic[ModelT]):
+    """
+    Serializer of pydantic records stored as Redis hashes.
+
+    Every field of a record, nested ones included, is stored in a hash field
+    with a short name, None values are left out. Redis keeps such small hashes
+    in a compact encoding, and single fields can be read or updated without
+    parsing the whole record.
+
+    The version of the layout is stored with every record, records of another
+    version are rejected. Records written as JSON text by earlier releases are
+    read with loads_json and rewritten in the current layout.
+
+    :param model: The pydantic model of the records.
+    :type model: Type[ModelT]
+    :param fields: The hash field name of every field of the model, by dotted path.
+    :type fields: Mapping[str, str]
+    :param version: The version of the layout.
+    :type version: int
+    """
+
+    def __init__(
+        self,
+        model: Type[ModelT],
+        fields: Mapping[str, str],
+        version: int = 1,
+    ):
+        self.model = model
+        self.fields = fields
+        self.version = version
+        self._encoded_fields = {
+            path: field.encode("utf-8") for path, field in fields.items()
+        }
+
+    def dumps(self, record: ModelT) -> Dict[str, str]:
+        """
+        Convert a record to the fields of a Redis hash.
+
+        :param record: The record.
+        :return: The fields of the hash.
+        """
+        record_fields = {RECORD_VERSION_FIELD: str(self.version)}
+        for path, field in self.fields.items():
+            record_value = _get_path(record, path)
+            if record_value is not None:
+                record_fields[field] = str(record_value)
+        return record_fields
+
+    def loads(self, record_fields: Mapping[bytes, bytes]) -> ModelT:
+        """
+        Convert the fields of a Redis hash to a record.
+
+        :param record_fields: The fields of the hash, as returned by HGETALL.
+        :return: The record.
+        :raises ValueError: If the record was written with another layout.
+        """
+        version = int(record_fields.get(_ENCODED_VERSION_FIELD, b"0"))
+        if version != self.version:
+            raise ValueError(f"Unsupported record version {version}")
+        record_values: Dict[str, Any] = {}
+        for path, field in self._encoded_fields.items():
+            field_value = record_fields.get(field)
+            if field_value is not None:
+                _set_path(record_values, path, field_value.decode("utf-8"))
+        return self.model.parse_obj(record_values)
+
+    def loads_json(self, text: str) -> ModelT:
+        """
+        Parse a record stored as JSON text.
+
+        :param text: The JSON text.
+        :return: The record.
+        """
+        return self.model.parse_raw(text)
+
+
 async def set_to_redis(
-    redis_pool: ConnectionPool,
+    redis: Redis,
     key: str,
     value: str,
     hash_key: str,
@@ -35,7 +149,7 @@ async def set_to_redis(
     """
     Write a value to Redis.
 
-    :param redis_pool: The Redis connection pool.
+    :param redis: The Redis client.
     :param key: The Redis key.
     :param value: The value to write to Redis.
     :param hash_key: The Redis hash key.
@@ -43,44 +157,394 @@ async def set_to_redis(
 
     """
     redis_key = generate_redis_key(key, hash_key)
-    async with Redis(connection_pool=redis_pool) as redis:
-        await redis.set(name=redis_key, value=value, ex=expire)
+    await redis.set(name=redis_key, value=value, ex=expire)
 
 
 async def get_from_redis(
-    redis_pool: ConnectionPool,
+    redis: Redis,
     key: str,
     hash_key: str,
 ) -> Optional[str]:
     """
     Get a value from Redis.
 
-    :param redis_pool: The Redis connection pool.
+    :param redis: The Redis client.
     :param key: The Redis key.
     :param hash_key: The Redis hash key.
 
     :returns: The value from Redis or None.
     """
     redis_key = generate_redis_key(key, hash_key)
-    async with Redis(connection_pool=redis_pool) as redis:
-        value = await redis.get(redis_key)
-        return value.decode("utf-8") if value else None
+    value = await redis.get(redis_key)
+    return value.decode("utf-8") if value else None
+
+
+async def get_many_from_redis(
+    redis: Redis,
+    keys: Sequence[str],
+    hash_key: str,
+) -> List[Optional[str]]:
+    """
+    Get the values of several keys from Redis with a single MGET.
+
+    :param redis: The Redis client.
+    :param keys: The Redis keys.
+    :param hash_key: The Redis hash key.
+
+    :returns: The values from Redis, None for the missing keys, in order of keys.
+    """
+    if not keys:
+        return []
+    values = await redis.mget([generate_redis_key(key, hash_key) for key in keys])
+    return [value.decode("utf-8") if value else None for value in values]
+
+
+async def set_many_to_redis(  # noqa: WPS210
+    redis: Redis,
+    key_values: Mapping[str, str],
+    hash_key: str,
+    expire: Optional[int] = None,
+) -> None:
+    """
+    Write several values to Redis in a single round trip.
+
+    Values without expiry are written with one MSET, otherwise the SETs are sent
+    in one pipeline.
+
+    :param redis: The Redis client.
+    :param key_values: The values to write, by Redis key.
+    :param hash_key: The Redis hash key.
+    :param expire: The number of seconds until the keys expire.
+    """
+    redis_values = {
+        generate_redis_key(key, hash_key): key_value
+        for key, key_value in key_values.items()
+    }
+    if not redis_values:
+        return
+    if expire is None:
+        await redis.mset(redis_values)
+        return
+    async with redis.pipeline(transaction=False) as pipe:
+        for redis_key, redis_value in redis_values.items():
+            pipe.set(redis_key, redis_value, ex=expire)
+        await pipe.execute()
+
+
+async def get_first_record_of(  # noqa: WPS210
+    redis: Redis,
+    key: str,
+    hash_keys: Sequence[str],
+    serializer: RecordSerializer[ModelT],
+) -> Tuple[Optional[ModelT], Optional[str]]:
+    """
+    Get a record from the first Redis hash holding its key.
+
+    All hashes are read with a single pipeline. Records still stored as JSON
+    text are migrated to the current layout when they are read.
+
+    :param redis: The Redis client.
+    :param key: The Redis key.
+    :param hash_keys: The Redis hash keys, in order of preference.
+    :param serializer: The serializer of the records.
+
+    :returns: The record and the hash key it was found in, or None and None.
+    """
+    redis_keys = [generate_redis_key(key, hash_key) for hash_key in hash_keys]
+    async with redis.pipeline(transaction=False) as pipe:
+        for pending_key in redis_keys:
+            pipe.hgetall(pending_key)
+        replies = await pipe.execute(raise_on_error=False)
+    for hash_key, redis_key, reply in zip(hash_keys, redis_keys, replies):
+        if isinstance(reply, ResponseError):
+            # the key holds JSON text written before records were hashes
+            return await _migrate_record(redis, redis_key, serializer), hash_key
+        if reply:
+            return serializer.loads(reply), hash_key
+    return None, None
+
+
+async def get_record(
+    redis: Redis,
+    key: str,
+    hash_key: str,
+    serializer: RecordSerializer[ModelT],
+) -> Optional[ModelT]:
+    """
+    Get a record from Redis.
+
+    :param redis: The Redis client.
+    :param key: The Redis key.
+    :param hash_key: The Redis hash key.
+    :param serializer: The serializer of the record.
+
+    :returns: The record or None.
+    """
+    record, _ = await get_first_record_of(redis, key, [hash_key], serializer)
+    return record
+
+
+async def get_record_field(
+    redis: Redis,
+    key: str,
+    hash_key: str,
+    serializer: RecordSerializer[ModelT],
+    path: str,
+) -> Optional[str]:
+    """
+    Get a single field of a record from Redis, without reading the whole record.
+
+    :param redis: The Redis client.
+    :param key: The Redis key.
+    :param hash_key: The Redis hash key.
+    :param serializer: The serializer of the record.
+    :param path: The dotted path of the field in the record.
+
+    :returns: The value of the field, None if it or the record is missing.
+    """
+    redis_key = generate_redis_key(key, hash_key)
+    try:
+        field_value = await redis.hget(redis_key, serializer.fields[path])
+    except ResponseError:
+        record = await _migrate_record(redis, redis_key, serializer)
+        if record is None:
+            return None
+        record_value = _get_path(record, path)
+        return None if record_value is None else str(record_value)
+    return field_value.decode("utf-8") if field_value else None
+
+
+async def set_record(  # noqa: WPS211
+    redis: Redis,
+    key: str,
+    record: ModelT,
+    hash_key: str,
+    serializer: RecordSerializer[ModelT],
+    expire: Optional[int] = None,
+) -> None:
+    """
+    Write a record to Redis, replacing the previous one.
+
+    :param redis: The Redis client.
+    :param key: The Redis key.
+    :param record: The record to write.
+    :param hash_key: The Redis hash key.
+    :param serializer: The serializer of the record.
+    :param expire: The number of seconds until the key expires.
+    """
+    redis_key = generate_redis_key(key, hash_key)
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.delete(redis_key)
+        pipe.hset(redis_key, mapping=serializer.dumps(record))
+        if expire is not None:
+            pipe.expire(redis_key, expire)
+        await pipe.execute()
+
+
+async def move_record(  # noqa: WPS210, WPS211
+    redis: Redis,
+    key: str,
+    from_hash_key: str,
+    to_hash_key: str,
+    record: ModelT,
+    serializer: RecordSerializer[ModelT],
+    aliases: Sequence[str] = (),
+    set_members: Optional[Mapping[str, str]] = None,
+) -> bool:
+    """
+    Atomically move a record from one Redis hash to another.
+
+    The key is deleted from the first hash and the record is written to the
+    second one under the key and all its aliases, in a single MULTI/EXEC
+    transaction, so no reader sees the key in both hashes or in neither.
+
+    The key in the first hash is watched and only moved while it still holds
+    the given record, so a record replaced or removed since it was read, by a
+    concurrent request or because it expired, is never moved.
+
+    :param redis: The Redis client.
+    :param key: The Redis key.
+    :param from_hash_key: The Redis hash key the key is moved from.
+    :param to_hash_key: The Redis hash key the key is moved to.
+    :param record: The record read from the first hash, written to the second.
+    :param serializer: The serializer of the record.
+    :param aliases: Other keys to write the record under in the second hash.
+    :param set_members: Members to add to Redis sets in the same transaction, by
+        key of the set.
+
+    :returns: True if the record was moved, False if the first hash no longer
+        held it.
+    """
+    from_key = generate_redis_key(key, from_hash_key)
+    record_fields = serializer.dumps(record)
+    async with redis.pipeline(transaction=True) as pipe:
+        try:
+            await pipe.watch(from_key)
+            if not await _holds_record(pipe, from_key, record, serializer):
+                return False
+            pipe.multi()
+            pipe.delete(from_key)
+            for target in (key, *aliases):
+                redis_key = generate_redis_key(target, to_hash_key)
+                pipe.delete(redis_key)
+                pipe.hset(redis_key, mapping=record_fields)
+            for set_key, member in (set_members or {}).items():
+                pipe.sadd(set_key, member)
+            await pipe.execute()
+        except WatchError:
+            return False
+    return True
+
+
+async def migrate_records(
+    redis: Redis,
+    hash_key: str,
+    serializer: RecordSerializer[ModelT],
+) -> int:
+    """
+    Migrate all the records of a Redis hash still stored as JSON text.
+
+    :param redis: The Redis client.
+    :param hash_key: The Redis hash key.
+    :param serializer: The serializer of the records.
+
+    :returns: The number of migrated records.
+    """
+    migrated = 0
+    pattern = generate_redis_key("*", hash_key)
+    async for redis_key in redis.scan_iter(match=pattern, _type="string"):
+        if await _migrate_record(redis, redis_key, serializer) is not None:
+            migrated += 1
+    return migrated
+
+
+async def _migrate_record(
+    redis: Redis,
+    redis_key: str,
+    serializer: RecordSerializer[ModelT],
+) -> Optional[ModelT]:
+    async with redis.pipeline(transaction=False) as reads:
+        reads.get(redis_key)
+        reads.pttl(redis_key)
+        text, ttl = await reads.execute()
+    if text is None:
+        return None
+    record = serializer.loads_json(text.decode("utf-8"))
+    async with redis.pipeline(transaction=True) as rewrite:
+        rewrite.delete(redis_key)
+        rewrite.hset(redis_key, mapping=serializer.dumps(record))
+        if ttl > 0:
+            rewrite.pexpire(redis_key, ttl)
+        await rewrite.execute()
+    return record
+
+
+async def _holds_record(
+    pipe: Redis,
+    redis_key: str,
+    record: ModelT,
+    serializer: RecordSerializer[ModelT],
+) -> bool:
+    try:
+        record_fields = await pipe.hgetall(redis_key)
+    except ResponseError:
+        # the key holds JSON text written before records were hashes
+        text = await pipe.get(redis_key)
+        return serializer.loads_json(text.decode("utf-8")) == record
+    if not record_fields:
+        return False
+    try:
+        return serializer.loads(record_fields) == record
+    except ValueError:
+        # written with another layout
+        return False
 
 
 async def delete_from_redis(
-    redis_pool: ConnectionPool,
+    redis: Redis,
     key: str,
     hash_key: str,
 ) -> int:
     """
     Remove a key from Redis.
 
-    :param redis_pool: The Redis connection pool.
+    :param redis: The Redis client.
     :param key: The Redis key.
     :param hash_key: The Redis hash key.
 
     :returns: The number of keys deleted.
     """
     redis_key = generate_redis_key(key, hash_key)
-    async with Redis(connection_pool=redis_pool) as redis:
-        return await redis.delete(redis_key)
+    return await redis.delete(redis_key)
+
+
+async def increment_in_redis(
+    redis: Redis,
+    key: str,
+    hash_key: str,
+) -> int:
+    """
+    Atomically increment an integer value in Redis.
+
+    A missing key counts as 0.
+
+    :param redis: The Redis client.
+    :param key: The Redis key.
+    :param hash_key: The Redis hash key.
+
+    :returns: The value after the increment.
+    """
+    redis_key = generate_redis_key(key, hash_key)
+    return await redis.incr(redis_key)
+
+
+async def exists_in_redis(
+    redis: Redis,
+    key: str,
+    hash_key: str,
+) -> bool:
+    """
+    Check whether a key exists in Redis, without reading its value.
+
+    :param redis: The Redis client.
+    :param key: The Redis key.
+    :param hash_key: The Redis hash key.
+
+    :returns: True if the key exists.
+    """
+    redis_key = generate_redis_key(key, hash_key)
+    return bool(await redis.exists(redis_key))
+
+
+async def add_to_redis_set(
+    redis: Redis,
+    set_key: str,
+    member: str,
+) -> bool:
+    """
+    Add a member to a Redis set.
+
+    :param redis: The Redis client.
+    :param set_key: The key of the set.
+    :param member: The member to add.
+
+    :returns: True if the member was added, False if it already was in the set.
+    """
+    return bool(await redis.sadd(set_key, member))
+
+
+async def is_member_of_redis_set(
+    redis: Redis,
+    set_key: str,
+    member: str,
+) -> bool:
+    """
+    Check whether a member is in a Redis set.
+
+    :param redis: The Redis client.
+    :param set_key: The key of the set.
+    :param member: The member to look for.
+
+    :returns: True if the member is in the set.
+    """
+    return bool(await redis.sismember(set_key, member))
@@ -1,13 +1,15 @@
 from typing import List
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter
 from fastapi.param_functions import Depends
-from redis.asyncio import ConnectionPool
+from redis.asyncio import Redis
 
+from myfi_backend.db.dao.scheme_nav_dao import SchemeNavDAO
+from myfi_backend.db.dao.user_holding_dao import UserHoldingDAO
 from myfi_backend.services.investment.investment_service import get_investment_values
-from myfi_backend.services.redis.dependency import get_redis_pool
-from myfi_backend.utils.redis import REDIS_HASH_USER, get_from_redis
+from myfi_backend.services.redis.dependency import get_redis
+from myfi_backend.services.user.dependency import get_valid_user_id
 from myfi_backend.web.api.investment.schema import InvestmentValueDTO
 
 router = APIRouter()
@@ -15,27 +17,23 @@ router = APIRouter()
 
 @router.get("/user_investment_value/", response_model=List[InvestmentValueDTO])
 async def user_investment_value(
-    user_id: UUID,
-    redis_pool: ConnectionPool = Depends(get_redis_pool),
+    user_id: UUID = Depends(get_valid_user_id),
+    redis: Redis = Depends(get_redis),
+    holding_dao: UserHoldingDAO = Depends(),
+    schemenav_dao: SchemeNavDAO = Depends(),
 ) -> List[InvestmentValueDTO]:
     """
     Retrieve the investment values for a given user.
 
     :param user_id: The user for whom to retrieve the investment values.
-    :param redis_pool: Redis connection pool.
+    :param redis: Redis client.
+    :param holding_dao: DAO for user holdings.
+    :param schemenav_dao: DAO for scheme NAV history.
     :return: A list of investment values for the user.
-    :raises HTTPException: If the user ID is not provided.
-
     """
-    # Here you can handle the user_investment_value data.
-    # For example, you can save it to a database.
-    # For now, let's just return it as is.
-    value = await get_from_redis(
-        redis_pool=redis_pool,
-        key=str(user_id),
-        hash_key=REDIS_HASH_USER,
+    return await get_investment_values(
+        user_id,
+        holding_dao,
+        schemenav_dao,
+        redis,
     )
-    if value is None:
-        raise HTTPException(status_code=400, detail="Invalid request.")
-
-    return get_investment_values(user_id)
@@ -3,6 +3,7 @@ from typing import Optional, Union
 
 from pydantic import BaseModel, validator
 
+from myfi_backend.utils.redis import RecordSerializer
 from myfi_backend.web.api.user.schema import UserDTO
 
 
@@ -23,6 +24,24 @@ class OtpDTO(BaseModel):
     retry_count: Optional[int] = 0
 
 
+# Layout of the OtpDTOs stored in Redis.
+OTP_RECORD_SERIALIZER = RecordSerializer(
+    OtpDTO,
+    {
+        "user.email": "e",
+        "user.mobile": "m",
+        "user.user_id": "u",
+        "user.user_name": "n",
+        "user.dob": "d",
+        "user.user_picture_url": "p",
+        "email_otp": "eo",
+        "mobile_otp": "mo",
+        "pin": "pin",
+        "retry_count": "rc",
+    },
+)
+
+
 class OtpResponseDTO(BaseModel):
     """
     Represents the response returned by the OTP verification API endpoint.
@@ -4,18 +4,22 @@ from typing import Tuple
 
 from fastapi import APIRouter, HTTPException
 from fastapi.param_functions import Depends
-from redis.asyncio import ConnectionPool
+from redis.asyncio import Redis
 
-from myfi_backend.services.redis.dependency import get_redis_pool
-from myfi_backend.utils.redis import (
+from myfi_backend.services.redis.dependency import get_redis
+from myfi_backend.utils.redis import (  # noqa: WPS235
     REDIS_HASH_NEW_USER,
     REDIS_HASH_USER,
     REDIS_NEW_USER_EXPIRY_TIME,
-    delete_from_redis,
-    get_from_redis,
-    set_to_redis,
+    REDIS_SET_USER_IDS,
+    get_first_record_of,
+    get_record,
+    get_record_field,
+    move_record,
+    set_record,
 )
 from myfi_backend.web.api.otp.schema import (
+    OTP_RECORD_SERIALIZER,
     OtpDTO,
     OtpResponseDTO,
     PinDTO,
@@ -37,25 +41,25 @@ class UserAuthType(Enum):
 @router.post("/signup/", response_model=OtpResponseDTO)
 async def signup(
     user: UserDTO,
-    redis_pool: ConnectionPool = Depends(get_redis_pool),
+    redis: Redis = Depends(get_redis),
 ) -> OtpResponseDTO:
     """
     Sends OTP to the user's email or mobile number.
 
     :param user: User object containing email or mobile number and password.
-    :param redis_pool: Redis connection pool.
+    :param redis: Redis client.
     :returns: Dictionary containing success message.
     :raises HTTPException: If email or mobile is not provided.
     """
     try:
         if user.email:
             user_otp, is_existing_user = await signup_email(
-                redis_pool=redis_pool,
+                redis=redis,
                 user=user,
             )
         elif user.mobile:
             user_otp, is_existing_user = await signup_mobile(
-                redis_pool=redis_pool,
+                redis=redis,
                 user=user,
             )
         else:
@@ -75,13 +79,13 @@ async def signup(
 @router.post("/verify/otp", response_model=OtpResponseDTO)
 async def verify_otp(
     otp: OtpDTO,
-    redis_pool: ConnectionPool = Depends(get_redis_pool),
+    redis: Redis = Depends(get_redis),
 ) -> OtpResponseDTO:
     """
     Verifies the OTP sent to the user's email or mobile number.
 
     :param otp: OTP object containing email or mobile number and OTP.
-    :param redis_pool: Redis connection pool.
+    :param redis: Redis client.
     :returns: VerifyResponse object containing success message.
     :raises HTTPException: If email or mobile is not provided or if the OTP is \
         invalid. returns 400 if request is invalid, returns 404 if user or OTP \
@@ -90,12 +94,12 @@ async def verify_otp(
     try:
         if otp.user.email and otp.user.user_id:
             is_verified, is_existing_user = await verify_email_otp(
-                redis_pool=redis_pool,
+                redis=redis,
                 otp=otp,
             )
         elif otp.user.mobile and otp.user.user_id:
             is_verified, is_existing_user = await verify_mobile_otp(
-                redis_pool=redis_pool,
+                redis=redis,
                 otp=otp,
             )
         else:
@@ -116,32 +120,33 @@ async def verify_otp(
 @router.post("/set/pin/", response_model=SetPinResponseDTO)
 async def set_pin(
     pin: PinDTO,
-    redis_pool: ConnectionPool = Depends(get_redis_pool),
+    redis: Redis = Depends(get_redis),
 ) -> SetPinResponseDTO:
     """
     Sets the PIN for the user's account.
 
     :param pin: PinDTO object containing user_id and PIN.
-    :param redis_pool: Redis connection pool.
+    :param redis: Redis client.
     :returns: SetPinResponseDTO object containing response.
     :raises HTTPException: If the request is invalid or the user is not found.
     """
     try:
-        value = await get_from_redis(
-            redis_pool=redis_pool,
+        user_otp = await get_record(
+            redis=redis,
             key=str(pin.user_id),
             hash_key=REDIS_HASH_USER,
+            serializer=OTP_RECORD_SERIALIZER,
         )
         # check if user is already an existing user
-        if value:
+        if user_otp:
             # user is already an existing user
-            user_otp = OtpDTO.parse_raw(value)
             user_otp.pin = pin.pin
-            await set_to_redis(
-                redis_pool=redis_pool,
+            await set_record(
+                redis=redis,
                 key=str(user_otp.user.user_id),
-                value=user_otp.json(),
+                record=user_otp,
                 hash_key=REDIS_HASH_USER,
+                serializer=OTP_RECORD_SERIALIZER,
             )
             return SetPinResponseDTO(user_id=pin.user_id, message="SUCCESS.")
 
@@ -153,45 +158,44 @@ async def set_pin(
 @router.post("/verify/pin/", response_model=VerifyPinResponseDTO)
 async def verify_pin(
     pin: PinDTO,
-    redis_pool: ConnectionPool = Depends(get_redis_pool),
+    redis: Redis = Depends(get_redis),
 ) -> VerifyPinResponseDTO:
     """
     Verifies the PIN for the user's account.
 
     :param pin: PinDTO object containing user_id and PIN.
-    :param redis_pool: Redis connection pool.
+    :param redis: Redis client.
     :returns: VerifyPinResponseDTO object containing response.
     :raises HTTPException: If the request is invalid or the pin does not match.
     """
     try:
-        value = await get_from_redis(
-            redis_pool=redis_pool,
+        # only the PIN of the user is read
+        user_pin = await get_record_field(
+            redis=redis,
             key=str(pin.user_id),
             hash_key=REDIS_HASH_USER,
+            serializer=OTP_RECORD_SERIALIZER,
+            path="pin",
         )
-        # check if user is already an existing user
-        if value:
-            # user is already an existing user
-            user_otp = OtpDTO.parse_raw(value)
-            if user_otp.pin == pin.pin:
-                return VerifyPinResponseDTO(
-                    user_id=pin.user_id,
-                    is_verified=True,
-                    message="SUCCESS.",
-                )
+        if user_pin is not None and user_pin == pin.pin:
+            return VerifyPinResponseDTO(
+                user_id=pin.user_id,
+                is_verified=True,
+                message="SUCCESS.",
+            )
         raise HTTPException(status_code=400, detail="Invalid request.")
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid request.")
 
 
 async def signup_email(
-    redis_pool: ConnectionPool,
+    redis: Redis,
     user: UserDTO,
 ) -> Tuple[OtpDTO, bool]:
     """
     Signup user with email.
 
-    :param redis_pool: Redis connection pool.
+    :param redis: Redis client.
     :param user: User object containing email or mobile number.
     :returns: OTP object containing email or mobile number and OTP. Return True if is \
     existing user else False.
@@ -199,23 +203,25 @@ async def signup_email(
     """
     try:
         if user.email:
-            value = await get_from_redis(
-                redis_pool=redis_pool,
+            existing_otp = await get_record(
+                redis=redis,
                 key=user.email,
                 hash_key=REDIS_HASH_USER,
+                serializer=OTP_RECORD_SERIALIZER,
             )
-            if value:
+            if existing_otp:
                 # user is already an existing user
-                user_otp = OtpDTO.parse_raw(value)
+                user_otp = existing_otp
                 otp = generate_otp(UserAuthType.EMAIL)
                 user_otp.email_otp = otp
 
                 # update the user with the new otp
-                await set_to_redis(
-                    redis_pool=redis_pool,
+                await set_record(
+                    redis=redis,
                     key=user.email,
-                    value=user_otp.json(),
+                    record=user_otp,
                     hash_key=REDIS_HASH_USER,
+                    serializer=OTP_RECORD_SERIALIZER,
                 )
                 # send OTP to email
                 return user_otp, True
@@ -225,11 +231,12 @@ async def signup_email(
             otp = generate_otp(UserAuthType.EMAIL)
             user_otp = OtpDTO(user=user, email_otp=otp)
 
-            await set_to_redis(
-                redis_pool=redis_pool,
+            await set_record(
+                redis=redis,
                 key=user.email,
-                value=user_otp.json(),
+                record=user_otp,
                 hash_key=REDIS_HASH_NEW_USER,
+                serializer=OTP_RECORD_SERIALIZER,
                 expire=REDIS_NEW_USER_EXPIRY_TIME,
             )
 
@@ -242,13 +249,13 @@ async def signup_email(
 
 
 async def signup_mobile(
-    redis_pool: ConnectionPool,
+    redis: Redis,
     user: UserDTO,
 ) -> Tuple[OtpDTO, bool]:
     """
     Signup user with mobile.
 
-    :param redis_pool: Redis connection pool.
+    :param redis: Redis client.
     :param user: User object containing email or mobile number.
     :returns: OTP object containing user_id, email or mobile number and OTP. Return \
     True if is a existing user else False.
@@ -256,23 +263,25 @@ async def signup_mobile(
     """
     try:
         if user.mobile:
-            value = await get_from_redis(
-                redis_pool=redis_pool,
+            existing_otp = await get_record(
+                redis=redis,
                 key=user.mobile,
                 hash_key=REDIS_HASH_USER,
+                serializer=OTP_RECORD_SERIALIZER,
             )
-            if value:
+            if existing_otp:
                 # user is already an existing user
-                user_otp = OtpDTO.parse_raw(value)
+                user_otp = existing_otp
                 otp = generate_otp(UserAuthType.MOBILE)
                 user_otp.mobile_otp = otp
 
                 # update the user with the new otp
-                await set_to_redis(
-                    redis_pool=redis_pool,
+                await set_record(
+                    redis=redis,
                     key=user.mobile,
-                    value=user_otp.json(),
+                    record=user_otp,
                     hash_key=REDIS_HASH_USER,
+                    serializer=OTP_RECORD_SERIALIZER,
                 )
                 # send OTP to mobile
                 return user_otp, True
@@ -282,11 +291,12 @@ async def signup_mobile(
             otp = generate_otp(UserAuthType.MOBILE)
             user_otp = OtpDTO(user=user, mobile_otp=otp)
 
-            await set_to_redis(
-                redis_pool=redis_pool,
+            await set_record(
+                redis=redis,
                 key=user.mobile,
-                value=user_otp.json(),
+                record=user_otp,
                 hash_key=REDIS_HASH_NEW_USER,
+                serializer=OTP_RECORD_SERIALIZER,
                 expire=REDIS_NEW_USER_EXPIRY_TIME,
             )
 
@@ -299,138 +309,102 @@ async def signup_mobile(
 
 
 async def verify_mobile_otp(
-    redis_pool: ConnectionPool,
+    redis: Redis,
     otp: OtpDTO,
 ) -> Tuple[bool, bool]:
     """
     Verify OTP for mobile.
 
-    :param redis_pool: Redis connection pool.
+    :param redis: Redis client.
     :param otp: OTP object containing email or mobile number and OTP.
     :returns: True if OTP verification for mobile success, False otherwise. Return \
     True if the user is an existing user, False otherwise.
+    :raises HTTPException: If the user is not found.
     """
     if otp.user.mobile:
-        value = await get_from_redis(
-            redis_pool=redis_pool,
+        # check if user is an existing user or a new user
+        stored_otp, hash_key = await get_first_record_of(
+            redis=redis,
             key=otp.user.mobile,
-            hash_key=REDIS_HASH_USER,
+            hash_keys=(REDIS_HASH_USER, REDIS_HASH_NEW_USER),
+            serializer=OTP_RECORD_SERIALIZER,
         )
-        # check if user is already an existing user
-        if value:
-            # user is already an existing user
-            user_otp = OtpDTO.parse_raw(value)
-            is_existing_user = True
-        else:
-            # check if user a new user
-            value = await get_from_redis(
-                redis_pool=redis_pool,
-                key=otp.user.mobile,
-                hash_key=REDIS_HASH_NEW_USER,
-            )
-            if value:
-                # user is a new user
-                user_otp = OtpDTO.parse_raw(value)
-                is_existing_user = False
-            else:
-                # user not found
-                HTTPException(status_code=400, detail="Invalid request.")
+        if stored_otp is None:
+            # user not found
+            raise HTTPException(status_code=400, detail="Invalid request.")
+        user_otp = stored_otp
+        is_existing_user = hash_key == REDIS_HASH_USER
 
         if (
             (user_otp.user.mobile == otp.user.mobile)
             and (user_otp.mobile_otp == otp.mobile_otp)
             and (user_otp.user.user_id == otp.user.user_id)
         ):
-            # delete the user from new user hash as OTP succeeded
-            if not is_existing_user:
-                await delete_from_redis(
-                    redis_pool=redis_pool,
-                    key=otp.user.mobile,
-                    hash_key=REDIS_HASH_NEW_USER,
-                )
-                # add the user to user hash as OTP succeeded
-                await set_to_redis(
-                    redis_pool=redis_pool,
-                    key=otp.user.mobile,
-                    value=user_otp.json(),
-                    hash_key=REDIS_HASH_USER,
-                )
-                # also add the user_id as key as OTP succeeded
-                await set_to_redis(
-                    redis_pool=redis_pool,
-                    key=str(otp.user.user_id),
-                    value=user_otp.json(),
-                    hash_key=REDIS_HASH_USER,
-                )
+            # move the user from new user hash to user hash as OTP succeeded,
+            # also keyed by user_id
+            if not is_existing_user and not await move_record(
+                redis=redis,
+                key=otp.user.mobile,
+                from_hash_key=REDIS_HASH_NEW_USER,
+                to_hash_key=REDIS_HASH_USER,
+                record=user_otp,
+                serializer=OTP_RECORD_SERIALIZER,
+                aliases=[str(otp.user.user_id)],
+                set_members={REDIS_SET_USER_IDS: str(otp.user.user_id)},
+            ):
+                # the OTP expired or was replaced by a new signup since it was read
+                raise HTTPException(status_code=400, detail="Invalid request.")
             return True, is_existing_user
 
     return False, is_existing_user
 
 
 async def verify_email_otp(
-    redis_pool: ConnectionPool,
+    redis: Redis,
     otp: OtpDTO,
 ) -> Tuple[bool, bool]:
     """
     Verify OTP for email.
 
-    :param redis_pool: Redis connection pool.
+    :param redis: Redis client.
     :param otp: OTP object containing email or mobile number and OTP.
     :returns: True if OTP verification for mobile success, False otherwise. Return \
     True if the user is an existing user, False otherwise.
+    :raises HTTPException: If the user is not found.
     """
     if otp.user.email:
-        value = await get_from_redis(
-            redis_pool=redis_pool,
+        # check if user is an existing user or a new user
+        stored_otp, hash_key = await get_first_record_of(
+            redis=redis,
             key=otp.user.email,
-            hash_key=REDIS_HASH_USER,
+            hash_keys=(REDIS_HASH_USER, REDIS_HASH_NEW_USER),
+            serializer=OTP_RECORD_SERIALIZER,
         )
-        # check if user is already an existing user
-        if value:
-            # user is already an existing user
-            user_otp = OtpDTO.parse_raw(value)
-            is_existing_user = True
-        else:
-            # check if user a new user
-            value = await get_from_redis(
-                redis_pool=redis_pool,
-                key=otp.user.email,
-                hash_key=REDIS_HASH_NEW_USER,
-            )
-            if value:
-                # user is a new user
-                user_otp = OtpDTO.parse_raw(value)
-                is_existing_user = False
-            else:
-                # user not found
-                HTTPException(status_code=400, detail="Invalid request.")
+        if stored_otp is None:
+            # user not found
+            raise HTTPException(status_code=400, detail="Invalid request.")
+        user_otp = stored_otp
+        is_existing_user = hash_key == REDIS_HASH_USER
 
         if (
             (user_otp.user.email == otp.user.email)
             and (user_otp.email_otp == otp.email_otp)
             and (user_otp.user.user_id == otp.user.user_id)
         ):
-            # delete the user from new user hash as OTP succeeded
-            if not is_existing_user:
-                await delete_from_redis(
-                    redis_pool=redis_pool,
-                    key=otp.user.email,
-                    hash_key=REDIS_HASH_NEW_USER,
-                )
-                # add the user to user hash as OTP succeeded
-                await set_to_redis(
-                    redis_pool=redis_pool,
-                    key=otp.user.email,
-                    value=user_otp.json(),
-                    hash_key=REDIS_HASH_USER,
-                )
-                # also add the user_id as key as OTP succeeded
-                await set_to_redis(
-                    redis_pool=redis_pool,
-                    key=str(otp.user.user_id),
-                    value=user_otp.json(),
-                    hash_key=REDIS_HASH_USER,
-                )
+            # move the user from new user hash to user hash as OTP succeeded,
+            # also keyed by user_id
+            if not is_existing_user and not await move_record(
+                redis=redis,
+                key=otp.user.email,
+                from_hash_key=REDIS_HASH_NEW_USER,
+                to_hash_key=REDIS_HASH_USER,
+                record=user_otp,
+                serializer=OTP_RECORD_SERIALIZER,
+                aliases=[str(otp.user.user_id)],
+                set_members={REDIS_SET_USER_IDS: str(otp.user.user_id)},
+            ):
+                # the OTP expired or was replaced by a new signup since it was read
+                raise HTTPException(status_code=400, detail="Invalid request.")
             return True, is_existing_user
 
     return False, is_existing_user
@@ -3,13 +3,14 @@ from uuid import UUID
 
 from fastapi import APIRouter, HTTPException
 from fastapi.param_functions import Depends
-from redis.asyncio import ConnectionPool
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from myfi_backend.db.dependencies import get_db_session
+from myfi_backend.db.dependencies import get_db_session_factory, run_in_session
+from myfi_backend.services.local_cache.cache import LocalCache, cache_key
+from myfi_backend.services.local_cache.dependency import get_local_cache
 from myfi_backend.services.portfolio.portfolio_service import get_portfolios
-from myfi_backend.services.redis.dependency import get_redis_pool
-from myfi_backend.utils.redis import REDIS_HASH_USER, get_from_redis
+from myfi_backend.services.portfolio.returns import PORTFOLIO_CACHE_NAMESPACE
+from myfi_backend.services.user.dependency import get_valid_user_id
 from myfi_backend.web.api.portfolio.schema import PortfolioDTO
 
 router = APIRouter()
@@ -17,27 +18,26 @@ router = APIRouter()
 
 @router.get("/portfolios", response_model=List[PortfolioDTO])
 async def get_portfolio(
-    user_id: UUID,
-    redis_pool: ConnectionPool = Depends(get_redis_pool),
-    session: AsyncSession = Depends(get_db_session),
+    user_id: UUID = Depends(get_valid_user_id),
+    session_factory: async_sessionmaker[AsyncSession] = Depends(
+        get_db_session_factory,
+    ),
+    local_cache: LocalCache = Depends(get_local_cache),
 ) -> List[PortfolioDTO]:
     """
     Retrieve portfolios based on user_id.
 
     :param user_id: The user for whom to retrieve the portfolios
-    :param redis_pool: Redis connection pool.
-    :param session: Database session.
+    :param session_factory: Factory of the database session the portfolios are
+        loaded with, shared by the requests waiting for them.
+    :param local_cache: In-process cache of the worker.
     :return: A list of portfolios for the user.
     :raises HTTPException: If the user ID is not provided or portfolios not found.
     """
-    value = await get_from_redis(
-        redis_pool=redis_pool,
-        key=str(user_id),
-        hash_key=REDIS_HASH_USER,
+    portfolios = await local_cache.get_or_load(
+        cache_key(PORTFOLIO_CACHE_NAMESPACE),
+        lambda: run_in_session(session_factory, get_portfolios),
     )
-    if value is None:
-        raise HTTPException(status_code=400, detail="Invalid request.")
-    portfolios = await get_portfolios(session)
     if portfolios is None:
         raise HTTPException(status_code=404, detail="Portfolios not found")
     return portfolios
@@ -1,8 +1,8 @@
 from fastapi import APIRouter, HTTPException
 from fastapi.param_functions import Depends
-from redis.asyncio import ConnectionPool
+from redis.asyncio import Redis
 
-from myfi_backend.services.redis.dependency import get_redis_pool
+from myfi_backend.services.redis.dependency import get_redis
 from myfi_backend.utils.redis import REDIS_DUMMY_HASH, get_from_redis, set_to_redis
 from myfi_backend.web.api.redis.schema import RedisValueDTO
 
@@ -12,13 +12,13 @@ router = APIRouter()
 @router.get("/", response_model=RedisValueDTO)
 async def get_redis_value(
     key: str,
-    redis_pool: ConnectionPool = Depends(get_redis_pool),
+    redis: Redis = Depends(get_redis),
 ) -> RedisValueDTO:
     """
     Get value from redis.
 
     :param key: redis key, to get data from.
-    :param redis_pool: redis connection pool.
+    :param redis: Redis client.
     :returns: information from redis.
     :raises HTTPException: If redis key is not found.
     """
@@ -27,7 +27,7 @@ async def get_redis_value(
             key=key,
             value=None,
         )
-    redis_value = await get_from_redis(redis_pool, key, REDIS_DUMMY_HASH)
+    redis_value = await get_from_redis(redis, key, REDIS_DUMMY_HASH)
     if redis_value is None:
         raise HTTPException(status_code=404, detail="Key not found.")
     return RedisValueDTO(
@@ -39,19 +39,19 @@ async def get_redis_value(
 @router.put("/")
 async def set_redis_value(
     redis_value: RedisValueDTO,
-    redis_pool: ConnectionPool = Depends(get_redis_pool),
+    redis: Redis = Depends(get_redis),
 ) -> None:
     """
     Set value in redis.
 
     :param redis_value: new value data.
-    :param redis_pool: redis connection pool.
+    :param redis: Redis client.
     :raises HTTPException: If redis value or key is None.
     """
     if not redis_value.key or not redis_value.value:
         raise HTTPException(status_code=400, detail="Key or value cannot be None.")
     await set_to_redis(
-        redis_pool=redis_pool,
+        redis=redis,
         key=redis_value.key,
         value=redis_value.value,
         hash_key=REDIS_DUMMY_HASH,
@@ -1,9 +1,54 @@
-from typing import Dict
+from datetime import date
+from enum import Enum
+from typing import Dict, List, Optional
 from uuid import UUID
 
 from pydantic import BaseModel
 
 
+class NavInterval(str, Enum):  # noqa: WPS600
+    """Spacing of the points in a NAV series."""
+
+    DAILY = "daily"
+    WEEKLY = "weekly"
+    MONTHLY = "monthly"
+
+
+class SchemeSort(str, Enum):  # noqa: WPS600
+    """Columns the scheme catalogue can be sorted by."""
+
+    NAME = "name"
+    ONE_YEAR_RETURN = "one_year_return"
+    THREE_YEAR_RETURN = "three_year_return"
+    FIVE_YEAR_RETURN = "five_year_return"
+    AUM = "aum"
+    TER = "ter"
+
+
+class SortOrder(str, Enum):  # noqa: WPS600
+    """Direction of a sort."""
+
+    ASC = "asc"
+    DESC = "desc"
+
+
+class ExportFormat(str, Enum):  # noqa: WPS600
+    """Formats the scheme catalogue can be exported in."""
+
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+class SchemeFiltersDTO(BaseModel):
+    """Filters of the scheme catalogue, every given one must match."""
+
+    amc_id: Optional[UUID] = None
+    scheme_plan: Optional[str] = None
+    scheme_type: Optional[str] = None
+    scheme_category: Optional[str] = None
+    risk_level: Optional[str] = None
+
+
 class SchemeDTO(BaseModel):
     """DTO for mutual fund schemes."""
 
@@ -12,6 +57,34 @@ class SchemeDTO(BaseModel):
     one_year_return: float
     three_year_return: float
     five_year_return: float
+    amc_id: Optional[UUID] = None
+    scheme_plan: Optional[str] = None
+    scheme_type: Optional[str] = None
+    scheme_category: Optional[str] = None
+    risk_level: Optional[str] = None
+    aum: Optional[float] = None
+    ter: Optional[float] = None
+    # nav, nav_date, day_change: From the NAV summary, None without NAVs.
+    nav: Optional[float] = None
+    nav_date: Optional[date] = None
+    day_change: Optional[float] = None
+
+
+class SchemePageDTO(BaseModel):
+    """DTO for a page of the scheme catalogue."""
+
+    schemes: List[SchemeDTO]
+    # next_cursor: Cursor of the next page, None on the last page.
+    next_cursor: Optional[str] = None
+
+
+class SchemeSearchResultDTO(BaseModel):
+    """DTO for a scheme matching a search query."""
+
+    scheme_id: UUID
+    scheme_name: str
+    # score: Trigram similarity of the name to the query, from 0 to 1.
+    score: float
 
 
 class SchemeNavDTO(BaseModel):
@@ -19,3 +92,23 @@ class SchemeNavDTO(BaseModel):
 
     scheme_id: UUID
     nav_data: Dict[str, float]
+
+
+class SchemeNavSummaryDTO(BaseModel):
+    """DTO for the figures of a scheme derived from its NAV history."""
+
+    scheme_id: UUID
+    nav_date: date
+    nav: float
+    previous_nav_date: Optional[date] = None
+    previous_nav: Optional[float] = None
+    # day_change and the returns are in percent.
+    day_change: Optional[float] = None
+    week52_high: float
+    week52_low: float
+    return_last_year: Optional[float] = None
+    return_last3_years: Optional[float] = None
+    return_last5_years: Optional[float] = None
+
+    class Config:
+        orm_mode = True
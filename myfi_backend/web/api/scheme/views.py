@@ -1,62 +1,211 @@
-from typing import List
+from datetime import date
+from typing import List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from fastapi.param_functions import Depends
-from redis.asyncio import ConnectionPool
+from fastapi.responses import StreamingResponse
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
+from myfi_backend.db.dao.mutual_fund_scheme_dao import MutualFundSchemeDAO
 from myfi_backend.db.dao.scheme_nav_dao import SchemeNavDAO
-from myfi_backend.services.redis.dependency import get_redis_pool
+from myfi_backend.db.dependencies import get_db_session_factory, run_in_session
+from myfi_backend.services.local_cache.cache import LocalCache, cache_key
+from myfi_backend.services.local_cache.dependency import get_local_cache
+from myfi_backend.services.redis.dependency import get_redis
+from myfi_backend.services.scheme.downsampling import MIN_LTTB_POINTS
+from myfi_backend.services.scheme.export import EXPORT_MEDIA_TYPES, export_schemes
+from myfi_backend.services.scheme.nav_cache import SCHEME_NAV_CACHE_NAMESPACE
 from myfi_backend.services.scheme.scheme_service import (
+    MAX_SCHEME_PAGE_SIZE,
+    MAX_SCHEME_SEARCH_SIZE,
+    SCHEME_PAGE_SIZE,
+    SCHEME_SEARCH_SIZE,
     get_scheme_nav_from_db,
+    get_scheme_nav_summary_from_db,
     get_schemes_from_db,
+    search_schemes,
+)
+from myfi_backend.services.user.dependency import get_valid_user_id
+from myfi_backend.web.api.scheme.schema import (  # noqa: WPS235
+    ExportFormat,
+    NavInterval,
+    SchemeFiltersDTO,
+    SchemeNavDTO,
+    SchemeNavSummaryDTO,
+    SchemePageDTO,
+    SchemeSearchResultDTO,
+    SchemeSort,
+    SortOrder,
 )
-from myfi_backend.utils.redis import REDIS_HASH_USER, get_from_redis
-from myfi_backend.web.api.scheme.schema import SchemeDTO, SchemeNavDTO
 
 router = APIRouter()
 
 
-@router.get("/schemes/", response_model=List[SchemeDTO])
-async def get_schemes(
-    user_id: UUID,
-    redis_pool: ConnectionPool = Depends(get_redis_pool),
-) -> List[SchemeDTO]:
+@router.get("/schemes/", response_model=SchemePageDTO)
+async def get_schemes(  # noqa: WPS211
+    user_id: UUID = Depends(get_valid_user_id),
+    filters: SchemeFiltersDTO = Depends(),
+    sort: SchemeSort = SchemeSort.NAME,
+    order: SortOrder = SortOrder.ASC,
+    cursor: Optional[str] = None,
+    limit: int = Query(default=SCHEME_PAGE_SIZE, ge=1, le=MAX_SCHEME_PAGE_SIZE),
+    scheme_dao: MutualFundSchemeDAO = Depends(),
+    schemenav_dao: SchemeNavDAO = Depends(),
+) -> SchemePageDTO:
     """
-    Retrieve schemes based on user_id.
+    Retrieve a page of the scheme catalogue.
+
+    Pass the next_cursor of a page as cursor, with the same filters and sort, to
+    get the next page.
 
     :param user_id: The user for whom to retrieve the schemes
-    :param redis_pool: Redis connection pool.
-    :return: A list of schemes for the user.
-    :raises HTTPException: If the user ID is not provided or schemes not found.
-    """
-    value = await get_from_redis(
-        redis_pool=redis_pool,
-        key=str(user_id),
-        hash_key=REDIS_HASH_USER,
+    :param filters: Only return schemes matching these.
+    :param sort: The column to sort by.
+    :param order: The direction of the sort.
+    :param cursor: The cursor of the page, omitted for the first page.
+    :param limit: The maximum number of schemes of the page.
+    :param scheme_dao: DAO for mutual fund schemes.
+    :param schemenav_dao: DAO for the NAVs of the schemes.
+    :return: A page of schemes.
+    :raises HTTPException: If the cursor is invalid.
+    """
+    try:
+        return await get_schemes_from_db(
+            scheme_dao,
+            schemenav_dao,
+            filters,
+            sort=sort,
+            order=order,
+            cursor=cursor,
+            limit=limit,
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+
+@router.get("/search/", response_model=List[SchemeSearchResultDTO])
+async def search_schemes_by_name(
+    user_id: UUID = Depends(get_valid_user_id),
+    query: str = Query(alias="q", min_length=2),
+    limit: int = Query(default=SCHEME_SEARCH_SIZE, ge=1, le=MAX_SCHEME_SEARCH_SIZE),
+    session_factory: async_sessionmaker[AsyncSession] = Depends(
+        get_db_session_factory,
+    ),
+    local_cache: LocalCache = Depends(get_local_cache),
+) -> List[SchemeSearchResultDTO]:
+    """
+    Search schemes by a partial or misspelt name, for typeahead.
+
+    :param user_id: The user searching the schemes.
+    :param query: The text to search for.
+    :param limit: The maximum number of results.
+    :param session_factory: Factory of database sessions.
+    :param local_cache: In-process cache of the worker.
+    :return: The best matching schemes, best first.
+    """
+    return await search_schemes(session_factory, local_cache, query, limit)
+
+
+@router.get("/export/", response_class=StreamingResponse)
+async def export_scheme_catalogue(
+    user_id: UUID = Depends(get_valid_user_id),
+    export_format: ExportFormat = Query(default=ExportFormat.NDJSON, alias="format"),
+    scheme_dao: MutualFundSchemeDAO = Depends(),
+) -> StreamingResponse:
+    """
+    Export every scheme with its latest NAV as NDJSON or CSV.
+
+    Rows are streamed from a database cursor as they are fetched, the whole
+    catalogue is never held in memory.
+
+    :param user_id: The user exporting the schemes.
+    :param export_format: The format of the export.
+    :param scheme_dao: DAO for mutual fund schemes.
+    :return: The streamed export.
+    """
+    return StreamingResponse(
+        export_schemes(scheme_dao, export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": (
+                f"attachment; filename=schemes.{export_format.value}"
+            ),
+        },
     )
-    if value is None:
-        raise HTTPException(status_code=400, detail="Invalid request.")
-    schemes = get_schemes_from_db()
-    if schemes is None:
-        raise HTTPException(status_code=404, detail="Resource not found")
-    return schemes
 
 
 @router.get("/scheme_nav/{scheme_id}", response_model=SchemeNavDTO)
-async def get_scheme_nav(
+async def get_scheme_nav(  # noqa: WPS211
     scheme_id: UUID,
-    schemenav_dao: SchemeNavDAO = Depends(),
+    from_date: Optional[date] = Query(default=None, alias="from"),
+    to_date: Optional[date] = Query(default=None, alias="to"),
+    interval: NavInterval = NavInterval.DAILY,
+    max_points: Optional[int] = Query(default=None, ge=MIN_LTTB_POINTS),
+    session_factory: async_sessionmaker[AsyncSession] = Depends(
+        get_db_session_factory,
+    ),
+    redis: Redis = Depends(get_redis),
+    local_cache: LocalCache = Depends(get_local_cache),
 ) -> SchemeNavDTO:
     """
     Retrieve scheme NAV based on scheme_id.
 
     :param scheme_id: The ID of the scheme for which to retrieve the NAV.
-    :param schemenav_dao: Database session.
+    :param from_date: Only return NAVs on or after this date.
+    :param to_date: Only return NAVs on or before this date.
+    :param interval: Return the daily NAVs or the last NAV of every week/month.
+    :param max_points: Downsample the NAVs to at most this many points, keeping
+        the shape of the chart.
+    :param session_factory: Factory of the database session the NAVs are loaded
+        with, shared by the requests waiting for the same NAVs.
+    :param redis: Redis client.
+    :param local_cache: In-process cache of the worker.
     :return: SchemeNavDTO that has scheme_id and nav_data of the scheme.
     :raises HTTPException: If the scheme ID is not provided or scheme NAV not found.
     """
-    scheme_nav = await get_scheme_nav_from_db(schemenav_dao, scheme_id)
+    scheme_nav = await local_cache.get_or_load(
+        cache_key(
+            SCHEME_NAV_CACHE_NAMESPACE,
+            scheme_id,
+            from_date,
+            to_date,
+            interval.value,
+            max_points,
+        ),
+        lambda: run_in_session(
+            session_factory,
+            lambda session: get_scheme_nav_from_db(
+                SchemeNavDAO(session),
+                redis,
+                scheme_id,
+                from_date=from_date,
+                to_date=to_date,
+                interval=interval,
+                max_points=max_points,
+            ),
+        ),
+    )
     if scheme_nav is None:
         raise HTTPException(status_code=404, detail="Resource not found")
     return scheme_nav
+
+
+@router.get("/scheme_nav_summary/{scheme_id}", response_model=SchemeNavSummaryDTO)
+async def get_scheme_nav_summary(
+    scheme_id: UUID,
+    schemenav_dao: SchemeNavDAO = Depends(),
+) -> SchemeNavSummaryDTO:
+    """
+    Retrieve the latest NAV, 52 week range and trailing returns of a scheme.
+
+    :param scheme_id: The ID of the scheme.
+    :param schemenav_dao: DAO for the NAVs of the schemes.
+    :return: The NAV summary of the scheme.
+    :raises HTTPException: If the scheme has no NAVs.
+    """
+    summary = await get_scheme_nav_summary_from_db(schemenav_dao, scheme_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Resource not found")
+    return summary
@@ -19,6 +19,10 @@ from prometheus_fastapi_instrumentator.instrumentation import (
 )
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
+from myfi_backend.services.local_cache.lifetime import (
+    init_local_cache,
+    shutdown_local_cache,
+)
 from myfi_backend.services.redis.lifetime import init_redis, shutdown_redis
 from myfi_backend.settings import settings
 
@@ -138,6 +142,7 @@ def register_startup_event(
         _setup_db(app)
         setup_opentelemetry(app)
         init_redis(app)
+        init_local_cache(app)
         setup_prometheus(app)
         pass  # noqa: WPS420
 
@@ -158,6 +163,7 @@ def register_shutdown_event(
     async def _shutdown() -> None:  # noqa: WPS430
         await app.state.db_engine.dispose()
 
+        await shutdown_local_cache(app)
         await shutdown_redis(app)
         stop_opentelemetry(app)
         pass  # noqa: WPS420